@@ -27,10 +27,18 @@ from datetime import datetime
 from pathlib import Path
 from typing import Callable
 
-import matplotlib.pyplot as plt  # type: ignore
 import openai
 from dotenv import load_dotenv  # type: ignore
 
+from llm_cache import LLMCache
+import gotchi_profile
+from gotchi_plot import draw_totals
+from gotchi_telemetry import TelemetryWriter, attach, read_records
+from llm_context import ContextWindow
+from llm_observation import ObservationEncoder
+from llm_decision import REASK, parse_action
+from llm_ratelimit import CircuitOpen, from_env as rate_limiter
+
 # ───────────────────────────────────────────────────────────────────────────
 # 1.  CONFIG
 # ───────────────────────────────────────────────────────────────────────────
@@ -48,7 +56,27 @@ TEMPERATURE  = float(os.getenv("OPENAI_TEMPERATURE", "1"))
 CALL_PERIOD  = 120          # seconds between GPT calls
 MAX_RUNS     = 2
 
-REGEX_CMD  = re.compile(r"\[?\s*([FPSQfpsq])\s*\]?", re.I)
+# LLM response cache: off | record | replay | replay-or-call
+LLM_CACHE = LLMCache(LOG_DIR / "llm_cache.sqlite",
+                     mode=os.getenv("GOTCHI_LLM_CACHE", "off"))
+
+# Shared quota for every call below: GOTCHI_RPM / GOTCHI_TPM /
+# GOTCHI_LLM_CONCURRENCY (unset = unlimited); 429s and transient errors are
+# retried with backoff, honouring Retry-After
+LLM_LIMITER = rate_limiter(metrics=gotchi_profile.observe)
+
+# Context window per run: full | sliding | last_turns | summary
+CONTEXT_STRATEGY = os.getenv("GOTCHI_CONTEXT", "summary")
+CONTEXT_TURNS    = 8        # recent turns sent verbatim
+
+# How each turn shows the screen: full | diff | compact | delta | auto
+# (see llm_observation.py; delta sends only what changed, as key=value)
+OBS_MODE = os.getenv("GOTCHI_OBS", "delta")
+
+# Opt-in profiling: timers/counters dumped here every minute and at exit
+# (Prometheus text for .prom, else JSON); unset = no instrumentation
+PROFILE_PATH = os.getenv("GOTCHI_PROFILE")
+
 REGEX_DEAD = re.compile(r"ascii pet has died", re.I)
 
 # ───────────────────────────────────────────────────────────────────────────
@@ -57,16 +85,18 @@ REGEX_DEAD = re.compile(r"ascii pet has died", re.I)
 try:
     from gotchi_beta import Gotchi, user_input_queue  # type: ignore
 except ModuleNotFoundError:
-    print("✖ Cannot import gotchi_beta.py – place it alongside this file.",
-          file=sys.stderr)
-    raise
+    print("… gotchi_beta.py not found – using gotchi.py.", file=sys.stderr)
+    from gotchi import Gotchi, user_input_queue
 
 # ───────────────────────────────────────────────────────────────────────────
 # 3.  GLOBAL STATE (spans both runs)
 # ───────────────────────────────────────────────────────────────────────────
-stat_rows: list[dict[str, float | str]] = []
-stats_lock = threading.Lock()
+# Decisions, pet events and LLM calls stream to logs/telemetry_<ts>.*.jsonl
+# as they happen (see main), so a crash mid-run loses at most a second
+telemetry: TelemetryWriter | None = None
+STAT_FIELDS = ("timestamp", "command", "hunger", "happiness", "energy", "total")
 summaries: list[str] = []
+context_stats: list[dict[str, int | str]] = []
 
 # ───────────────────────────────────────────────────────────────────────────
 # 4.  HELPERS
@@ -79,9 +109,32 @@ def capture_screen(pet: Gotchi) -> str:
     return "\n".join(pet.generate_display_lines())
 
 
+def chat_completion(**kwargs):
+    """openai.ChatCompletion.create through LLM_LIMITER, answered from
+    LLM_CACHE when enabled (cache hits cost no quota)."""
+    return LLM_CACHE.create(LLM_LIMITER.wrap(openai.ChatCompletion.create), **kwargs)
+
+
+def summarise_turns(messages: list[dict[str, str]]) -> str:
+    """Compaction call for the rolling-summary context window."""
+    resp = chat_completion(model=MODEL, messages=messages, temperature=1, timeout=90)
+    return resp.choices[0].message.content.strip()
+
+
+def new_context(system: str) -> ContextWindow:
+    return ContextWindow(
+        system,
+        strategy=CONTEXT_STRATEGY,
+        max_turns=CONTEXT_TURNS,
+        summarise=summarise_turns,
+        # replaying from the cache needs every request to come out the same
+        wait_for_summary=LLM_CACHE.mode == "replay",
+    )
+
+
 def parse_command(text: str) -> str | None:
-    m = REGEX_CMD.search(text or "")
-    return m.group(1).lower() if m else None
+    action = parse_action(text)
+    return action.lower() if action else None
 
 
 def enqueue_command(cmd: str) -> None:
@@ -97,55 +150,67 @@ def flush_input_queue() -> None:
         pass
 
 
+def record(kind: str, **fields) -> None:
+    """Queue a telemetry record (never blocks on disk)."""
+    if telemetry is not None:
+        telemetry.log(kind, **fields)
+
+
 def log_stats(pet: Gotchi, cmd: str) -> None:
-    with stats_lock:
-        stat_rows.append(
-            {
-                "timestamp": timestamp(),
-                "command": cmd.upper(),
-                "hunger":    round(pet.hunger, 3),
-                "happiness": round(pet.happiness, 3),
-                "energy":    round(pet.energy, 3),
-                "total":     round(pet.hunger + pet.happiness + pet.energy, 3),
-            }
-        )
+    record(
+        "action",
+        timestamp=timestamp(),
+        command=cmd.upper(),
+        sim_time=pet.current_time,
+        hunger=round(pet.hunger, 3),
+        happiness=round(pet.happiness, 3),
+        energy=round(pet.energy, 3),
+        total=round(pet.hunger + pet.happiness + pet.energy, 3),
+    )
+
+
+def log_llm(purpose: str, resp, latency: float) -> None:
+    gotchi_profile.observe("llm_latency", latency)
+    usage = getattr(resp, "usage", None)
+    record(
+        "llm",
+        purpose=purpose,
+        model=MODEL,
+        latency=round(latency, 4),
+        prompt_tokens=getattr(usage, "prompt_tokens", None),
+        completion_tokens=getattr(usage, "completion_tokens", None),
+        cached=getattr(resp, "cached", False),
+    )
+
+
+def stat_rows() -> list[dict[str, float | str]]:
+    """The decisions logged so far, read back from the telemetry files."""
+    if telemetry is None:
+        return []
+    return [
+        {k: r[k] for k in STAT_FIELDS}
+        for r in read_records(telemetry.files())
+        if r["kind"] == "action"
+    ]
 
 
 def draw_plot(path: Path, rows) -> None:
-    if not rows:
-        return
-    turns  = list(range(len(rows)))
-    totals = [r["total"] for r in rows]           # type: ignore[index]
-
-    plt.style.use("dark_background")
-    plt.rcParams["font.family"] = "monospace"
-    fig, ax = plt.subplots(figsize=(10, 5), facecolor="black")
-    ax.set_facecolor("black")
-    ax.plot(turns, totals, color="orange",
-            linewidth=2, marker="o", markersize=4,
-            markerfacecolor="orange", markeredgecolor="orange")
-    ax.set_title("Hunger + Happiness + Energy over Time", pad=12)
-    ax.set_xlabel("Turn (#)")
-    ax.set_ylabel("Total Stat Value")
-    ax.grid(color="gray", linestyle="--", linewidth=0.4, alpha=0.4)
-    fig.tight_layout()
-    fig.savefig(path, dpi=150)
-    plt.close(fig)
+    # downsampled, so hours of turns still render quickly and readably
+    draw_totals(path, [r["total"] for r in rows])  # type: ignore[index]
 
 # ───────────────────────────────────────────────────────────────────────────
 # 5.  DEATH DETECTION
 # ───────────────────────────────────────────────────────────────────────────
 def is_pet_dead(pet: Gotchi, screen: str | None = None) -> bool:
     """
-    Returns True as soon as the pet dies.  Checks three things:
-      1) The usual screen‑text regex (fast, language‑agnostic).
+    Returns True as soon as the pet dies.  Checks, cheapest first:
+      1) The structured status (`pet.status`, set when a run ends).
       2) Attribute flags on the Gotchi instance (alive / dead).
       3) A callable `is_alive()` method, if present.
+      4) The screen‑text regex, for builds without any of the above.
     """
-    screen = screen or ""
-    if REGEX_DEAD.search(screen):
+    if getattr(pet, "status", None):
         return True
-
     if hasattr(pet, "alive") and getattr(pet, "alive") is False:
         return True
     if hasattr(pet, "dead") and getattr(pet, "dead") is True:
@@ -156,7 +221,7 @@ def is_pet_dead(pet: Gotchi, screen: str | None = None) -> bool:
                 return True
         except Exception:  # noqa: BLE001
             pass
-    return False
+    return bool(screen and REGEX_DEAD.search(screen))
 
 # ───────────────────────────────────────────────────────────────────────────
 # 6.  GPT‑DRIVER THREAD
@@ -165,7 +230,8 @@ def gpt_loop(
     pet: Gotchi,
     stop_event: threading.Event,
     pet_dead_event: threading.Event,
-    conversation: list[dict[str, str]],
+    conversation: ContextWindow,
+    encoder: ObservationEncoder,
 ) -> None:
     while not stop_event.is_set() and not pet_dead_event.is_set():
         tic = time.time()
@@ -175,23 +241,44 @@ def gpt_loop(
             pet_dead_event.set()
             break
 
-        conversation.append({"role": "user", "content": screen})
+        conversation.append("user", encoder.encode(pet))
 
         try:
-            resp = openai.ChatCompletion.create(
+            call_tic = time.monotonic()
+            resp = chat_completion(
                 model=MODEL,
-                messages=conversation,
+                messages=conversation.messages(),
                 temperature=TEMPERATURE,
                 timeout=90,
             )
+            log_llm("decision", resp, time.monotonic() - call_tic)
         except Exception as exc:  # noqa: BLE001
+            # LLM_LIMITER already retried what was worth retrying; wait out
+            # an open circuit rather than hammering a failing endpoint
             print(f"[GPT] OpenAI error – {exc}", file=sys.stderr)
-            time.sleep(10)
+            record("llm_error", purpose="decision", error=str(exc))
+            stop_event.wait(max(10, LLM_LIMITER.cooldown_left(MODEL)))
             continue
 
-        ai_text = resp.choices[0].message.content.strip()
-        conversation.append({"role": "assistant", "content": ai_text})
+        ai_text = (resp.choices[0].message.content or "").strip()
+        conversation.append("assistant", ai_text)
         cmd = parse_command(ai_text)
+        if cmd is None:
+            # one cheap re-ask, kept out of the context window
+            try:
+                call_tic = time.monotonic()
+                resp = chat_completion(
+                    model=MODEL,
+                    messages=conversation.messages()
+                    + [{"role": "user", "content": REASK}],
+                    temperature=0,
+                    max_tokens=4,
+                    timeout=30,
+                )
+                log_llm("reask", resp, time.monotonic() - call_tic)
+                cmd = parse_command(resp.choices[0].message.content)
+            except Exception as exc:  # noqa: BLE001
+                record("llm_error", purpose="reask", error=str(exc))
 
         if cmd:
             enqueue_command(cmd)
@@ -208,12 +295,12 @@ def gpt_loop(
         for _ in range(int(sleep_for)):
             if stop_event.is_set() or pet_dead_event.is_set():
                 break
-            time.sleep(1)
+            pet_dead_event.wait(1)
 
 # ───────────────────────────────────────────────────────────────────────────
 # 7.  SUMMARISATION
 # ───────────────────────────────────────────────────────────────────────────
-def summarise_run(conv: list[dict[str, str]], run_no: int) -> str:
+def summarise_run(conv: ContextWindow, run_no: int) -> str:
     prompt = [
         {
             "role": "system",
@@ -223,19 +310,27 @@ def summarise_run(conv: list[dict[str, str]], run_no: int) -> str:
                 "strategy, key points and advice for the next run."
             ),
         },
-        *conv[-40:],
+        *conv.tail(40),
         {"role": "user", "content": "Please summarise this run now."},
     ]
-    try:
-        resp = openai.ChatCompletion.create(
-            model=MODEL,
-            messages=prompt,
-            temperature=1,
-            timeout=90,
-        )
-        return resp.choices[0].message.content.strip()
-    except Exception as exc:  # noqa: BLE001
-        return f"[Summary generation failed: {exc}]"
+    for attempt in range(2):
+        try:
+            call_tic = time.monotonic()
+            resp = chat_completion(
+                model=MODEL,
+                messages=prompt,
+                temperature=1,
+                timeout=90,
+            )
+            log_llm("summary", resp, time.monotonic() - call_tic)
+            return resp.choices[0].message.content.strip()
+        except CircuitOpen as exc:
+            # one more try once the endpoint's cooldown is over
+            if attempt:
+                return f"[Summary generation failed: {exc}]"
+            time.sleep(LLM_LIMITER.cooldown_left(MODEL))
+        except Exception as exc:  # noqa: BLE001
+            return f"[Summary generation failed: {exc}]"
 
 # ───────────────────────────────────────────────────────────────────────────
 # 8.  NON‑BLOCKING STDIN (cross‑platform)
@@ -265,25 +360,31 @@ def run_once(run_no: int) -> None:
 
     stop_event     = threading.Event()
     pet_dead_event = threading.Event()
-    conversation: list[dict[str, str]] = [
-        {
-            "role": "system",
-            "content": (
-                "You are caring for this simulation.\n"
-                "At each turn you see the ENTIRE screen and must choose exactly one "
-                "action:\n\n"
-                "  [F]eed   [P]lay   [S]leep   [Q]uit\n\n"
-                "Reply with JUST that letter."
-            ),
-        }
-    ]
+    encoder = ObservationEncoder(OBS_MODE, keyframe=CONTEXT_TURNS)
+    # the legend goes in the system prompt, so the turns stay short and the
+    # prompt prefix stays byte-identical from call to call
+    conversation = new_context(
+        "You are caring for this simulation.\n"
+        "At each turn you see the ENTIRE screen and must choose exactly one "
+        "action:\n\n"
+        "  [F]eed   [P]lay   [S]leep   [Q]uit\n\n"
+        "Reply with JUST that letter." + encoder.legend
+    )
 
     flush_input_queue()                     # clean slate 🔄
     pet = Gotchi()
+    watch_events = callable(getattr(pet, "on", None))
+    if watch_events:
+        # death / running away flag the run as over the moment they happen
+        pet.on("on_death", lambda _pet, _status: pet_dead_event.set())
+        pet.on("on_runaway", lambda _pet, _status: pet_dead_event.set())
+        if telemetry is not None:
+            attach(pet, telemetry, run=run_no)
+    record("run_start", run=run_no)
     pet_thread = threading.Thread(target=pet.realtime, daemon=True)
     gpt_thread = threading.Thread(
         target=gpt_loop,
-        args=(pet, stop_event, pet_dead_event, conversation),
+        args=(pet, stop_event, pet_dead_event, conversation, encoder),
         daemon=True,
     )
     pet_thread.start()
@@ -302,11 +403,11 @@ def run_once(run_no: int) -> None:
                 else:
                     user_input_queue.put(key)
 
-            # independent death check (screen or attribute)
-            if is_pet_dead(pet, capture_screen(pet)):
+            # builds without events: fall back to checking for death
+            if not watch_events and is_pet_dead(pet, capture_screen(pet)):
                 pet_dead_event.set()
 
-            time.sleep(0.05)
+            pet_dead_event.wait(0.05)
 
     except KeyboardInterrupt:
         stop_event.set()
@@ -317,6 +418,8 @@ def run_once(run_no: int) -> None:
     pet_thread.join(timeout=5)
     gpt_thread.join(timeout=5)
 
+    record("run_end", run=run_no, sim_time=pet.current_time,
+           status=getattr(pet, "status", None))
     if pet_dead_event.is_set():
         summary = summarise_run(conversation, run_no)
         summaries.append(summary)
@@ -324,6 +427,20 @@ def run_once(run_no: int) -> None:
     else:
         summaries.append("Run ended by explicit quit (no summary).")
 
+    conversation.close()
+    stats = conversation.stats()
+    obs = encoder.stats()
+    context_stats.append({"run": run_no, **stats, "observations": obs})
+    print(f"Context ({stats['strategy']}): {stats['tokens_sent']} tokens sent over "
+          f"{stats['requests']} calls, ~{stats['net_saved']} saved "
+          f"({stats['compactions']} compactions)", file=sys.stderr)
+    print(f"Observations ({obs['mode']}): {obs['tokens_sent']} tokens for "
+          f"{obs['turns']} screens, {obs['saved_%']}% below full screens", file=sys.stderr)
+    rl = LLM_LIMITER.stats()
+    print(f"Rate limit: {rl['retries']} retries ({rl['throttled']} throttled), "
+          f"mean queue wait {rl['mean_queue_wait_s']}s vs service "
+          f"{rl['mean_service_s']}s", file=sys.stderr)
+
     print(f"Run {run_no} finished.\n", file=sys.stderr)
     time.sleep(1)
 
@@ -336,19 +453,33 @@ def final_shutdown() -> None:
     json_path = LOG_DIR / f"summaries_{ts}.json"
     png_path  = LOG_DIR / f"stats_{ts}.png"
 
-    with stats_lock:
-        if stat_rows:
-            with csv_path.open("w", newline="") as f:
-                w = csv.DictWriter(f, fieldnames=stat_rows[0].keys())
-                w.writeheader()
-                w.writerows(stat_rows)
+    if telemetry is not None:
+        try:
+            telemetry.close()               # everything queued is on disk now
+        except RuntimeError as e:
+            print(f" ➜ {e}", file=sys.stderr)
+    prof = gotchi_profile.active()
+    if prof is not None:
+        prof.dump(PROFILE_PATH)
+    rows = stat_rows()
+    if rows:
+        with csv_path.open("w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=STAT_FIELDS)
+            w.writeheader()
+            w.writerows(rows)
     with json_path.open("w") as f:
-        json.dump({"summaries": summaries}, f, indent=2)
-    draw_plot(png_path, stat_rows)
+        json.dump({"summaries": summaries, "context": context_stats,
+                   "rate_limit": LLM_LIMITER.stats()}, f, indent=2)
+    draw_plot(png_path, rows)
 
     print(f"\n ➜ CSV log saved to  {csv_path}",  file=sys.stderr)
     print(f" ➜ Summaries saved to {json_path}", file=sys.stderr)
     print(f" ➜ Graph     saved to {png_path}", file=sys.stderr)
+    if prof is not None:
+        print(f" ➜ Profile   saved to {PROFILE_PATH}", file=sys.stderr)
+    if telemetry is not None:
+        print(f" ➜ Telemetry saved to {LOG_DIR / telemetry.prefix}.*.jsonl "
+              f"(plot it with gotchi_plot.py)", file=sys.stderr)
     print("Good‑bye!", file=sys.stderr)
     sys.exit(0)
 
@@ -356,6 +487,10 @@ def final_shutdown() -> None:
 # 11.  MAIN
 # ───────────────────────────────────────────────────────────────────────────
 def main() -> None:
+    global telemetry
+    telemetry = TelemetryWriter(LOG_DIR, prefix=f"telemetry_{int(time.time())}")
+    if PROFILE_PATH:
+        gotchi_profile.enable().autodump(PROFILE_PATH, interval=60)
     for rn in range(1, MAX_RUNS + 1):
         run_once(rn)
     final_shutdown()
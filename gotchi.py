@@ -1,13 +1,70 @@
 import csv
 import time
+import struct
+from array import array
 import random
 import sys
 import math
+import heapq
+import functools
 import threading
 import queue
 from datetime import datetime
 import pytz
 
+# Per-step chances for the two "random roll every tick" rules in step()
+NEEDS_PHRASE_CHANCE = 0.01
+OVERFED_SICK_CHANCE = 0.1
+IDLE_MSG = "Thanks for hanging out, friend!"
+
+RAN_AWAY = "Your ascii pet has run away."
+
+MOODS = ("content", "sad", "excited")
+WEATHERS = ("Clear", "Cloudy", "Rain", "Snow")
+
+# --- Snapshot layout ---
+# Fixed-size little-endian header, then (optionally) the six RNG states,
+# then the current message as UTF-8 running to the end of the blob.
+SNAPSHOT_MAGIC = b"GT"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FLOATS = (
+    "hunger", "happiness", "energy", "friendship",
+    "msg_expiration_time", "next_random_event_time",
+)
+SNAPSHOT_INTS = (
+    "current_time", "last_input_time", "last_needs_update", "needs_interval",
+    "away_start", "away_used", "last_away",
+    "last_mood_check", "last_weather_check", "last_weather_period",
+    "last_day_check", "last_phrase_time", "random_events_this_hour",
+    "last_event_hour", "current_hour", "last_clock_update",
+)
+SNAPSHOT_BOOLS = ("pet_sick", "pet_away", "day_time", "trigger_random_event")
+# magic, version, has_rngs, floats, ints, bools, mood, weather, phrase, clock
+SNAPSHOT_HEADER = struct.Struct(
+    "<2sB?%dd%dq%d?bbh5s"
+    % (len(SNAPSHOT_FLOATS), len(SNAPSHOT_INTS), len(SNAPSHOT_BOOLS))
+)
+# RNG attribute -> substream name
+RNG_STREAMS = {
+    "phrase_rng": "phrase",
+    "away_rng": "away",
+    "sick_rng": "sickness",
+    "weather_rng": "weather",
+    "mood_rng": "mood",
+    "event_rng": "event",
+}
+RNG_STATE_WORDS = 625  # Mersenne Twister: 624 words + position
+
+# --- Content packs ---
+# Stats an event may change; anything else is shown but has no effect
+CONTENT_STATS = ("hunger", "happiness", "energy")
+# Binary pack: header, then per entry (delta, weight, text length, stat
+# length) followed by the UTF-8 text and stat; phrases first, then events
+CONTENT_MAGIC = b"GC"
+CONTENT_VERSION = 1
+CONTENT_HEADER = struct.Struct("<2sBII")
+CONTENT_ENTRY = struct.Struct("<ddHB")
+
 # --- Setup for line-based user input in a thread ---
 user_input_queue = queue.Queue()
 
@@ -32,13 +89,250 @@ def read_phrases(filename):
                 rows.append((row[0], row[1], float(row[2])))
         return rows
 
+def parse_event(line):
+    """
+    "text|stat|delta[|weight]" -> (text, stat, delta, weight).  A line in
+    any other form is an event with no effect.
+    """
+    parts = line.split("|")
+    if len(parts) in (3, 4):
+        try:
+            delta = float(parts[2])
+            weight = float(parts[3]) if len(parts) == 4 else 1.0
+        except ValueError:
+            pass
+        else:
+            stat = parts[1].strip().lower()
+            return (parts[0], stat if stat in CONTENT_STATS else None, delta, weight)
+    return (line, None, 0.0, 1.0)
+
 def read_events(filename):
     with open(filename, encoding='utf-8') as f:
-        return [line.strip() for line in f if line.strip()]
+        return [parse_event(line.strip()) for line in f if line.strip()]
+
+class AliasTable:
+    """Vose's alias method: O(1) draws from fixed weights, two randoms each."""
+    __slots__ = ("prob", "alias")
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            lo, hi = small.pop(), large.pop()
+            self.prob[lo] = scaled[lo]
+            self.alias[lo] = hi
+            scaled[hi] -= 1.0 - scaled[lo]
+            (small if scaled[hi] < 1.0 else large).append(hi)
+
+    def sample(self, rng):
+        i = int(rng.random() * len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+class EventTable(tuple):
+    """
+    Parsed random events, with an alias table when their weights differ.
+    Equal weights keep the plain uniform choice(), so seeded runs don't move.
+    """
+    def __new__(cls, events):
+        self = super().__new__(cls, (e if isinstance(e, tuple) else parse_event(e) for e in events))
+        weights = [e[3] for e in self]
+        self.alias = AliasTable(weights) if len(set(weights)) > 1 else None
+        return self
+
+    def draw(self, rng):
+        if self.alias is None:
+            return rng.choice(self)
+        return self[self.alias.sample(rng)]
+
+class ContentPack:
+    """
+    Needs phrases and random events, parsed once.  Packs from load_content()
+    are cached for the whole process and every pet shares their tables.
+    """
+    __slots__ = ("phrases", "events")
+
+    def __init__(self, phrases, events):
+        self.phrases = tuple(phrases)
+        self.events = events if isinstance(events, EventTable) else EventTable(events)
+
+    def to_bytes(self):
+        out = [CONTENT_HEADER.pack(CONTENT_MAGIC, CONTENT_VERSION,
+                                   len(self.phrases), len(self.events))]
+        entries = [(t, s, d, 1.0) for t, s, d in self.phrases] + list(self.events)
+        for text, stat, delta, weight in entries:
+            text = text.encode("utf-8")
+            stat = (stat or "").encode("utf-8")
+            out += [CONTENT_ENTRY.pack(delta, weight, len(text), len(stat)), text, stat]
+        return b"".join(out)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        magic, version, n_phrases, n_events = CONTENT_HEADER.unpack_from(blob)
+        if magic != CONTENT_MAGIC or version != CONTENT_VERSION:
+            raise ValueError("not a Gotchi content pack (or an unsupported version)")
+        pos = CONTENT_HEADER.size
+        entries = []
+        for _ in range(n_phrases + n_events):
+            delta, weight, n_text, n_stat = CONTENT_ENTRY.unpack_from(blob, pos)
+            pos += CONTENT_ENTRY.size
+            text = blob[pos:pos + n_text].decode("utf-8")
+            pos += n_text
+            stat = blob[pos:pos + n_stat].decode("utf-8") or None
+            pos += n_stat
+            entries.append((text, stat, delta, weight))
+        phrases = [(t, s, d) for t, s, d, _ in entries[:n_phrases]]
+        return cls(phrases, entries[n_phrases:])
+
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            f.write(self.to_bytes())
+
+_content_cache = {}
+
+def load_content(phrases_file="needs_phrases.txt", events_file="random_events.txt",
+                 pack=None, reload=False):
+    """
+    The ContentPack for these text files, or for a binary pack saved with
+    ContentPack.save(), read from disk only the first time it's asked for.
+    """
+    key = ("pack", str(pack)) if pack is not None else (str(phrases_file), str(events_file))
+    content = _content_cache.get(key)
+    if content is None or reload:
+        if pack is not None:
+            with open(pack, "rb") as f:
+                content = ContentPack.from_bytes(f.read())
+        else:
+            content = ContentPack(read_phrases(phrases_file), read_events(events_file))
+        _content_cache[key] = content
+    return content
+
+def geometric(rng, p):
+    """
+    Number of Bernoulli(p) trials up to and including the first success.
+    Used by fast_forward() to jump over the per-step rolls in one draw.
+    """
+    return int(math.log(1.0 - rng.random()) / math.log(1.0 - p)) + 1
+
+def root_seed(seed=None, rng=None):
+    """
+    Pick the root seed for a Gotchi: the given seed, or one drawn from an
+    injected random.Random / numpy Generator, or from the module-level
+    random (so random.seed() still reproduces unseeded pets).
+    """
+    if seed is not None:
+        return seed
+    if rng is None:
+        return random.getrandbits(64)
+    if hasattr(rng, "getrandbits"):
+        return rng.getrandbits(64)
+    return int(rng.integers(2**63))  # numpy Generator
+
+def substream(seed, name):
+    """
+    Independent random.Random for one subsystem, keyed by (seed, name).
+    String seeds hash through SHA-512, so streams are stable across runs
+    and processes and don't depend on the order they are created in.
+    """
+    return random.Random(f"{seed}/{name}")
 
 def get_est_time():
     return datetime.now(pytz.timezone("US/Eastern"))
 
+# --- Clocks for realtime() ---
+# A clock gives realtime() the time in seconds, the local datetime that
+# drives the clock face, day/night, weather and mood, and a way to wait
+# for input with a timeout.  Swap in a faster clock to run the realtime
+# path at many times real speed.
+
+class RealClock:
+    """Wall-clock time, in the given timezone (US/Eastern by default)."""
+    def __init__(self, tz="US/Eastern"):
+        self.tz = pytz.timezone(tz) if isinstance(tz, str) else tz
+
+    def time(self):
+        return time.time()
+
+    def now(self):
+        return datetime.fromtimestamp(self.time(), self.tz)
+
+    def wait(self, q, timeout):
+        """Next item from queue q, or queue.Empty once timeout clock seconds pass."""
+        return q.get(timeout=max(0.0, timeout))
+
+class ScaledClock(RealClock):
+    """
+    Time-warp: clock time runs `speed` times faster than the wall clock,
+    starting from `start` (a timestamp or aware datetime; default now).
+    """
+    def __init__(self, speed=100.0, start=None, tz="US/Eastern"):
+        super().__init__(tz)
+        self.speed = speed
+        self.origin = time.time() if start is None else _timestamp(start)
+        self.wall_origin = time.time()
+
+    def time(self):
+        return self.origin + (time.time() - self.wall_origin) * self.speed
+
+    def wait(self, q, timeout):
+        return q.get(timeout=max(0.0, timeout) / self.speed)
+
+class VirtualClock(RealClock):
+    """
+    Fully virtual time that only moves when told to.
+
+    auto=True: a wait with nothing queued jumps straight to its deadline,
+    so realtime() runs as fast as the CPU allows; script input for given
+    times with schedule().  auto=False: waits block until another thread
+    calls advance()/set_time() past the deadline or input arrives.
+    """
+    def __init__(self, start=0.0, tz="US/Eastern", auto=True):
+        super().__init__(tz)
+        self.t = _timestamp(start)
+        self.auto = auto
+        self._cond = threading.Condition()
+        self._script = []  # heap of (time, seq, input)
+
+    def time(self):
+        return self.t
+
+    def set_time(self, t):
+        with self._cond:
+            self.t = max(self.t, _timestamp(t))
+            self._cond.notify_all()
+
+    def advance(self, seconds):
+        self.set_time(self.t + seconds)
+
+    def schedule(self, at, item):
+        """Deliver item to the waiting queue once the clock reaches `at`."""
+        heapq.heappush(self._script, (_timestamp(at), len(self._script), item))
+
+    def wait(self, q, timeout):
+        deadline = self.t + max(0.0, timeout)
+        while True:
+            while self._script and self._script[0][0] <= self.t:
+                q.put(heapq.heappop(self._script)[2])
+            try:
+                return q.get_nowait()
+            except queue.Empty:
+                pass
+            if self.t >= deadline:
+                raise queue.Empty
+            if self.auto:
+                self.set_time(min(deadline, self._script[0][0]) if self._script else deadline)
+                continue
+            with self._cond:
+                # short real-time timeout so input from other threads is seen
+                self._cond.wait(0.01)
+
+def _timestamp(t):
+    return t.timestamp() if isinstance(t, datetime) else float(t)
+
 def partial_update_display(new_lines, old_lines):
     """
     Compare new_lines vs old_lines. For each line that differs,
@@ -78,13 +372,87 @@ def main():
     pet = Gotchi()
     pet.realtime()
 
+# --- Observation & events ---
+OBSERVED_STATS = ("hunger", "happiness", "energy", "friendship")
+EVENTS = ("on_death", "on_runaway", "on_message_change", "on_phrase", "on_stat_change")
+
+class Observation:
+    """
+    What the pet looks like right now, as plain values (Gotchi.observe()).
+    `need` is the stat named by the active needs phrase, if any; `status`
+    is how the pet ended, or None while it's alive.
+    """
+    __slots__ = (
+        "time", "clock", "hunger", "happiness", "energy", "friendship",
+        "sick", "away", "day", "mood", "weather", "msg", "need", "status",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    def values(self):
+        """The numeric part as a flat tuple, e.g. for an agent's input."""
+        return (
+            self.hunger, self.happiness, self.energy, self.friendship,
+            float(self.sick), float(self.away), float(self.day), float(self.time),
+        )
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"Observation({fields})"
+
+def observed(method):
+    """
+    Wrap a state-changing Gotchi method so observers registered with
+    Gotchi.on() hear what it changed, and the pet remembers how it ended.
+    The step timer is reset first: the change may bring a rule due (e.g. a
+    stat at zero), even when the method returns before calling set_msg().
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.quiet_until = 0
+        if self.listeners:
+            return self._watched(method, self, *args, **kwargs)
+        status = method(self, *args, **kwargs)
+        if status:
+            self.status = status
+        return status
+    return wrapper
+
 class Gotchi:
-    def __init__(self, needs_phrases=None, random_events=None):
-        if needs_phrases is None:
-            needs_phrases = read_phrases("needs_phrases.txt")
+    # Slots keep the per-pet footprint small and the attribute set fixed;
+    # everything in the snapshot tables above plus the content tables,
+    # RNGs, display caches and the step timer
+    __slots__ = (
+        SNAPSHOT_FLOATS + SNAPSHOT_INTS + SNAPSHOT_BOOLS + tuple(RNG_STREAMS) + (
+            "seed", "needs_phrases", "random_events",
+            "mood", "weather", "active_phrase_data", "clock_str", "msg",
+            "displayed_values", "old_display_lines", "clock",
+            "status", "listeners", "quiet_until",
+        )
+    )
+
+    def __init__(self, needs_phrases=None, random_events=None, seed=None, rng=None, clock=None):
+        # Every random decision draws from its own named substream, so runs
+        # are reproducible from one seed and adding rolls to one subsystem
+        # doesn't shift the others
+        self.seed = root_seed(seed, rng)
+        for name, stream in RNG_STREAMS.items():
+            setattr(self, name, substream(self.seed, stream))
+
+        if needs_phrases is None or random_events is None:
+            content = load_content()
+            if needs_phrases is None:
+                needs_phrases = content.phrases
+            if random_events is None:
+                random_events = content.events
         self.needs_phrases = needs_phrases
-        if random_events is None:
-            random_events = read_events("random_events.txt")
+        if not isinstance(random_events, EventTable):
+            random_events = EventTable(random_events)
         self.random_events = random_events
         # Initialize pet stats
         self.hunger = 5.0
@@ -113,9 +481,10 @@ class Gotchi:
         self.last_day_check = -1
         self.last_phrase_time = self.current_time
         self.active_phrase_data = None  # Will hold (text, stat, delta) or None
-        self.next_random_event_time = self.current_time + random.randint(900, 1800)
+        self.next_random_event_time = self.current_time + self.event_rng.randint(900, 1800)
         self.random_events_this_hour = 0
         self.last_event_hour = 0
+        self.trigger_random_event = False  # set by realtime(), consumed by step()
 
         # A general "message" that shows up top
         self.msg = "           "
@@ -127,14 +496,109 @@ class Gotchi:
         self.old_display_lines = []
 
         # Clock time for display
+        self.clock = clock or RealClock()  # drives realtime() only
         self.clock_str = "00:00"
         self.current_hour = 0
+
+        # How the pet ended (None while alive), and the observers from on()
+        self.status = None
+        self.listeners = None
         self.last_clock_update = self.current_time # for advancing "pet clock time" in non-realtime steps
 
+        # First step at which one of step()'s deadline rules can fire (see
+        # _tick); 0 = recheck them all at the next step
+        self.quiet_until = 0
+
+    @property
+    def alive(self):
+        return self.status is None
+
+    def on(self, event, callback):
+        """
+        Call callback(pet, ...) whenever `event` happens during step() or
+        an action:
+            on_death(pet, status)           died, or never came back
+            on_runaway(pet, status)         friendship ran out
+            on_message_change(pet, old, new)
+            on_phrase(pet, phrase)          a need appeared, or None when it ended
+            on_stat_change(pet, changes)    {stat: (old, new)}
+        Returns callback, so this works as a decorator too.
+        """
+        if event not in EVENTS:
+            raise ValueError(f"unknown event {event!r}, expected one of {EVENTS}")
+        if self.listeners is None:
+            self.listeners = {}
+        self.listeners.setdefault(event, []).append(callback)
+        return callback
+
+    def off(self, event, callback):
+        if self.listeners and callback in self.listeners.get(event, ()):
+            self.listeners[event].remove(callback)
+
+    def add_observer(self, observer):
+        """Register every on_* method an observer object defines."""
+        for event in EVENTS:
+            callback = getattr(observer, event, None)
+            if callable(callback):
+                self.on(event, callback)
+
+    def emit(self, event, *args):
+        for callback in (self.listeners or {}).get(event, ()):
+            callback(self, *args)
+
+    def _watched(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) and emit events for whatever it changed."""
+        before = (self.hunger, self.happiness, self.energy, self.friendship)
+        msg, phrase = self.msg, self.active_phrase_data
+        status = fn(*args, **kwargs)
+        after = (self.hunger, self.happiness, self.energy, self.friendship)
+
+        if after != before:
+            self.emit("on_stat_change", {
+                name: (old, new)
+                for name, old, new in zip(OBSERVED_STATS, before, after)
+                if old != new
+            })
+        if self.msg != msg:
+            self.emit("on_message_change", msg, self.msg)
+        if self.active_phrase_data != phrase:
+            self.emit("on_phrase", self.active_phrase_data)
+        if status:
+            self.status = status
+            self.emit("on_runaway" if status == RAN_AWAY else "on_death", status)
+        return status
+
+    def observe(self):
+        """Cheap structured view of the state -- no text rendering."""
+        return Observation(
+            time=self.current_time,
+            clock=self.clock_str,
+            hunger=self.hunger,
+            happiness=self.happiness,
+            energy=self.energy,
+            friendship=self.friendship,
+            sick=self.pet_sick,
+            away=self.pet_away,
+            day=self.day_time,
+            mood=self.mood,
+            weather=self.weather,
+            msg=self.msg,
+            need=self.active_phrase_data[1].lower() if self.active_phrase_data else None,
+            status=self.status,
+        )
+
     # Function to set an ephemeral message for a certain duration
     def set_msg(self, new_msg, duration=30):
         self.msg = new_msg
         self.msg_expiration_time = self.current_time + duration
+        self.quiet_until = 0
+
+    def reschedule(self):
+        """
+        Recheck every deadline rule at the next step. Call this after
+        changing the pet's state by hand (the methods do it themselves).
+        """
+        self.quiet_until = 0
 
     def generate_display_lines(self):
         """
@@ -193,22 +657,252 @@ class Gotchi:
         for l in self.generate_display_lines():
             print(l)
 
-    def step(self, n=None, real_time=False):
+    def snapshot(self, rngs=False):
+        """
+        Pack the pet's state into a small binary blob (see SNAPSHOT_HEADER).
+        Content tables aren't included: the active needs phrase is stored as
+        its index in needs_phrases.  With rngs=True the six RNG states are
+        included too (15 kB), so a restored pet rolls exactly as this one would.
+        """
+        phrase = -1
+        if self.active_phrase_data:
+            phrase = self.needs_phrases.index(self.active_phrase_data)
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, rngs,
+            *[getattr(self, name) for name in SNAPSHOT_FLOATS],
+            *[int(getattr(self, name)) for name in SNAPSHOT_INTS],
+            *[getattr(self, name) for name in SNAPSHOT_BOOLS],
+            MOODS.index(self.mood), WEATHERS.index(self.weather), phrase,
+            self.clock_str.encode("ascii"),
+        )
+        parts = [header]
+        if rngs:
+            for name in RNG_STREAMS:
+                parts.append(array("I", getattr(self, name).getstate()[1]).tobytes())
+        parts.append(self.msg.encode("utf-8"))
+        return b"".join(parts)
+
+    def restore(self, blob):
+        """
+        Load a snapshot() blob into this pet, in place. The pet keeps its
+        own content tables, and its own RNGs unless the blob carries some.
+        """
+        fields = SNAPSHOT_HEADER.unpack_from(blob)
+        magic, version, has_rngs = fields[:3]
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("not a Gotchi snapshot (or from another version)")
+        i = 3
+        for names in (SNAPSHOT_FLOATS, SNAPSHOT_INTS, SNAPSHOT_BOOLS):
+            for name in names:
+                setattr(self, name, fields[i])
+                i += 1
+        mood, weather, phrase, clock = fields[i:]
+        self.mood = MOODS[mood]
+        self.weather = WEATHERS[weather]
+        self.active_phrase_data = self.needs_phrases[phrase] if phrase >= 0 else None
+        self.clock_str = clock.decode("ascii")
+
+        offset = SNAPSHOT_HEADER.size
+        if has_rngs:
+            size = RNG_STATE_WORDS * 4
+            for name in RNG_STREAMS:
+                words = array("I", blob[offset:offset + size])
+                getattr(self, name).setstate((3, tuple(words), None))
+                offset += size
+        self.msg = bytes(blob[offset:]).decode("utf-8")
+
+        self.status = None
+        self.quiet_until = 0
+        # Render caches belong to whoever was drawing the old state
+        self.displayed_values = None
+        self.old_display_lines = []
+        return self
+
+    def fork(self, seed=None):
+        """
+        Independent copy of this pet for branching (tree search,
+        counterfactuals). The content tables are shared, not copied.
+        By default the copy continues this pet's random streams exactly;
+        pass a seed to give it fresh ones instead.
+        """
+        child = Gotchi.__new__(Gotchi)
+        # All state values are immutable, so copying references is enough
+        for name in Gotchi.__slots__:
+            setattr(child, name, getattr(self, name))
+        child.old_display_lines = []
+        child.listeners = None
+        if seed is None:
+            for name in RNG_STREAMS:
+                # __new__ skips seeding from os.urandom, which setstate overwrites anyway
+                rng = random.Random.__new__(random.Random)
+                rng.setstate(getattr(self, name).getstate())
+                setattr(child, name, rng)
+        else:
+            child.seed = seed
+            for name, stream in RNG_STREAMS.items():
+                setattr(child, name, substream(seed, stream))
+        return child
+
+    __copy__ = fork
+
+    def __deepcopy__(self, memo):
+        return self.fork()
+
+    def step(self, n=None, real_time=False, fast=False):
         """
         Advance the simulation by one step (or n steps)
         This represents a single unit of simulation time
+        With fast=True the n steps are run through fast_forward() instead
         """
         # slightly recursive method: built-in loop for multiple steps
         if n is not None:
+            if fast:
+                return self.fast_forward(n, real_time=real_time)
             for i in range(n):
                 result = self.step(real_time=real_time)
                 if result:
                     return result
             return
 
+        return self._step_once(real_time=real_time)
+
+    def fast_forward(self, n, real_time=False):
+        """
+        Advance the simulation by n steps, jumping straight from one
+        scheduled boundary to the next instead of looping every step.
+
+        Between boundaries nothing but the clock counter moves, so the only
+        per-step work is the needs-phrase and sickness rolls; those are drawn
+        once per stretch as geometric waiting times, which gives the same
+        distribution of outcomes as calling step() n times.
+        """
+        end = self.current_time + n
+        while self.current_time < end:
+            plan = self._plan(real_time)
+            if plan[0] > end:
+                # Nothing happens before the end of the requested stretch
+                self.current_time = end
+                break
+            result = self._advance(plan, real_time)
+            if result:
+                return result
+        return None
+
+    def _plan(self, real_time=False):
+        """
+        The next step that can change anything, as (due, phrase_at, sick_at):
+        the earliest scheduled boundary or drawn roll success. phrase_at /
+        sick_at are the geometric waiting times for the per-step rolls, or
+        None while that roll can't fire.
+        """
+        due = self._next_boundary(real_time)
+        phrase_at = sick_at = None
+        if (
+            not self.pet_sick
+            and not self.pet_away
+            and self.needs_phrases
+            and not self.active_phrase_data
+        ):
+            phrase_at = self.current_time + geometric(self.phrase_rng, NEEDS_PHRASE_CHANCE)
+            due = min(due, phrase_at)
+        if not self.pet_sick and (self.hunger > 10 or self.energy > 9):
+            sick_at = self.current_time + geometric(self.sick_rng, OVERFED_SICK_CHANCE)
+            due = min(due, sick_at)
+        return due, phrase_at, sick_at
+
+    def _advance(self, plan, real_time=False):
+        """
+        Skip the quiet steps before a _plan() and run its due step for real
+        with the rolls already drawn (fresh rolls where none were drawn)
+        """
+        due, phrase_at, sick_at = plan
+        self.current_time = due - 1
+        return self._step_once(
+            real_time,
+            None if phrase_at is None else phrase_at == due,
+            None if sick_at is None else sick_at == due,
+        )
+
+    def _step_once(self, real_time=False, phrase_hit=None, sick_hit=None):
+        # _tick() behind the same bookkeeping as @observed, inlined because
+        # it runs every step
+        if self.listeners:
+            return self._watched(self._tick, real_time, phrase_hit, sick_hit)
+        status = self._tick(real_time, phrase_hit, sick_hit)
+        if status:
+            self.status = status
+        return status
+
+    def _next_boundary(self, real_time=False):
+        """
+        Earliest future step at which a deterministic rule in step() changes
+        something. Steps before it only advance current_time.
+        """
+        now = self.current_time
+        nxt = now + 1
+
+        # Anything unusual (pending event, dead or out-of-range stats) is
+        # simply handled one step at a time
+        if self.trigger_random_event:
+            return nxt
+        stats = (self.hunger, self.happiness, self.energy)
+        if min(stats) <= 0 or max(stats) > 10:
+            return nxt
+
+        due = []
+        if not real_time:
+            due.append(self.last_clock_update + 60)
+        if self.msg != IDLE_MSG:
+            due.append(math.floor(self.msg_expiration_time) + 1)
+        if self.pet_away:
+            due.append(self.away_start + 300)
+        else:
+            due.append(self.last_needs_update + self.needs_interval)
+            wander = self.last_input_time + 300
+            if self.away_used >= 1:
+                wander = max(wander, self.last_away + 600)
+            due.append(wander)
+        if self.active_phrase_data:
+            due.append(self.last_phrase_time + 121)
+        return max(nxt, min(due))
+
+    def _tick(self, real_time=False, phrase_hit=None, sick_hit=None):
+        """
+        One step of simulation time. phrase_hit / sick_hit force the outcome
+        of the per-step rolls (used by fast_forward); None rolls as usual.
+
+        The deadline rules below (clock, message expiry, wandering off and
+        back, needs decay, phrase expiry) are timers: quiet_until caches the
+        first step at which any of them can fire (_next_boundary), and until
+        then a step only runs the two per-step rolls. Anything that moves a
+        deadline earlier resets it (set_msg, restore, reschedule).
+        """
         # single-step behavior: increment time
         self.current_time += 1
 
+        if (
+            self.current_time < self.quiet_until
+            and not self.trigger_random_event
+            and (real_time or (self.current_time - self.last_clock_update) < 60)
+        ):
+            # No timer due: exactly the rolls the full step would make
+            if (
+                not self.pet_sick
+                and not self.pet_away
+                and self.needs_phrases
+                and (self.phrase_rng.random() < NEEDS_PHRASE_CHANCE if phrase_hit is None else phrase_hit)
+                and not self.active_phrase_data
+            ):
+                self.active_phrase_data = self.phrase_rng.choice(self.needs_phrases)
+                self.last_phrase_time = self.current_time
+                self.set_msg(self.active_phrase_data[0], 120)
+            if self.hunger > 10 or self.energy > 9:
+                if (self.sick_rng.random() < OVERFED_SICK_CHANCE) if sick_hit is None else sick_hit:
+                    self.pet_sick = True
+            return None
+        # Rechecked below; left at 0 if this step ends the pet early
+        self.quiet_until = 0
+
         # advance pet time
         if not real_time and (self.current_time - self.last_clock_update) >= 60:
             self.last_clock_update = self.current_time
@@ -225,7 +919,7 @@ class Gotchi:
 
         # If the ephemeral message expired, revert to a friend-hanging message
         if self.current_time > self.msg_expiration_time:
-            self.msg = "Thanks for hanging out, friend!"
+            self.msg = IDLE_MSG
 
         # If no input for a while, pet might wander off
         if not self.pet_away and (self.current_time - self.last_input_time) >= 300:
@@ -239,7 +933,7 @@ class Gotchi:
         # Pet returns after a certain time away
         if self.pet_away and (self.current_time - self.away_start) >= 300:
             self.pet_away = False
-            chance = random.random()
+            chance = self.away_rng.random()
             if chance <= 0.8:
                 # Pet returns feeling better in the lowest stat
                 low_stat = min(
@@ -258,7 +952,7 @@ class Gotchi:
                 self.set_msg("Returned feeling better about life!", 30)
             else:
                 # 20% chance something bad happens
-                if random.random() < 0.2:
+                if self.away_rng.random() < 0.2:
                     self.pet_sick = True
                     self.set_msg("Returned feeling icky...", 30)
                 else:
@@ -298,28 +992,18 @@ class Gotchi:
             if self.friendship > 0:
                 self.friendship = max(0, self.friendship - 0.1)
                 if self.friendship == 0:
-                    return "Your ascii pet has run away."
+                    return RAN_AWAY
 
         # Random events - only in step mode if specifically triggered
-        if hasattr(self, 'trigger_random_event') and self.trigger_random_event:
+        if self.trigger_random_event:
             self.trigger_random_event = False
             if self.random_events:
-                ev = random.choice(self.random_events)
-                self.set_msg(ev, 30)
-                # Quick parse for plus/minus effect
-                if "hunger+" in ev.lower():
-                    self.hunger = min(10, self.hunger + 1)
-                elif "hunger-" in ev.lower():
-                    self.hunger = max(0, self.hunger - 1)
-                elif "happy+" in ev.lower():
-                    if not self.pet_sick:
-                        self.happiness = min(10, self.happiness + 1)
-                elif "happy-" in ev.lower():
-                    self.happiness = max(0, self.happiness - 1)
-                elif "energy+" in ev.lower():
-                    self.energy = min(10, self.energy + 1)
-                elif "energy-" in ev.lower():
-                    self.energy = max(0, self.energy - 1)
+                text, stat, delta, _ = self.random_events.draw(self.event_rng)
+                self.set_msg(text, 30)
+                # The effect was parsed with the event; a sick pet can't
+                # be cheered up by one
+                if stat and not (stat == "happiness" and delta > 0 and self.pet_sick):
+                    setattr(self, stat, min(10, max(0, getattr(self, stat) + delta)))
 
                 if self.hunger == 0 or self.happiness == 0 or self.energy == 0:
                     return "Your ascii pet has died."
@@ -330,10 +1014,10 @@ class Gotchi:
             not self.pet_sick
             and not self.pet_away
             and self.needs_phrases
-            and random.random() < 0.01
+            and (self.phrase_rng.random() < NEEDS_PHRASE_CHANCE if phrase_hit is None else phrase_hit)
             and not self.active_phrase_data
         ):
-            self.active_phrase_data = random.choice(self.needs_phrases)
+            self.active_phrase_data = self.phrase_rng.choice(self.needs_phrases)
             text, stat, delta = self.active_phrase_data
             self.last_phrase_time = self.current_time
             # Show the phrase text for up to 120s (so user can see it)
@@ -353,15 +1037,17 @@ class Gotchi:
 
         # If hunger or energy is too high, random chance to become sick
         if self.hunger > 10 or self.energy > 9:
-            if random.random() < 0.1:
+            if (self.sick_rng.random() < OVERFED_SICK_CHANCE) if sick_hit is None else sick_hit:
                 self.pet_sick = True
 
         # Check if pet died from stats going to zero
         if self.hunger <= 0 or self.happiness <= 0 or self.energy <= 0:
             return "Your ascii pet has died."
 
+        self.quiet_until = self._next_boundary(real_time=True)
         return None  # No special status to report
 
+    @observed
     def sleep(self):
         # Normal sleeping logic
         self.energy = min(10, self.energy + 1)
@@ -385,12 +1071,13 @@ class Gotchi:
         
         return None
 
+    @observed
     def feed(self):
         # Normal feeding logic
         self.hunger = min(10, self.hunger + 1)
         self.energy = max(0, self.energy - 0.25)
         # chance to cure sickness by feeding
-        if self.pet_sick and random.random() < 0.45:
+        if self.pet_sick and self.sick_rng.random() < 0.45:
             self.pet_sick = False
         if self.hunger == 0 or self.energy == 0:
             return "Your ascii pet has died."
@@ -413,6 +1100,7 @@ class Gotchi:
                 
         return None
 
+    @observed
     def play(self):
         # Normal playing logic
         if not self.pet_sick:
@@ -442,131 +1130,216 @@ class Gotchi:
         # This is a helper function for realtime() to convert wall time to sim time
         return int(wall_time / self.needs_interval * 120)  # 120 steps per needs_interval
 
-    def realtime(self):
-        """Run the pet simulation in real-time with terminal display"""
+    def realtime_for_step(self, step):
+        """Inverse of update_time_from_realtime: wall seconds at which `step` is reached"""
+        return step * self.needs_interval / 120
+
+    def update_wall_clock(self, est):
+        """Clock, day/night, weather, mood and the hourly event cap, from the wall clock"""
+        self.clock_str = est.strftime("%H:%M")
+        self.current_hour = est.hour
+
+        # Reset random event counter on hour change
+        if self.current_hour != self.last_event_hour:
+            self.random_events_this_hour = 0
+            self.last_event_hour = self.current_hour
+
+        # Check if it's day or night based on real time
+        if self.current_hour != self.last_day_check:
+            self.last_day_check = self.current_hour
+            self.day_time = (6 <= self.current_hour < 18)
+
+        # Weather check, switch in morning vs afternoon based on real time
+        weather_period = 0 if self.current_hour < 12 else 1
+        if weather_period != self.last_weather_period:
+            self.last_weather_period = weather_period
+            chance = self.weather_rng.random()
+            if chance <= 0.8:
+                self.weather = self.weather_rng.choice(["Clear", "Cloudy"])
+            else:
+                w = self.weather_rng.choice(["Rain", "Snow"])
+                self.weather = w
+                # chance pet gets sick
+                if self.weather_rng.random() <= 0.2:
+                    self.pet_sick = True
+
+        # Mood check in 8-hour blocks based on real time
+        mood_block = self.current_hour // 8
+        if mood_block != self.last_mood_check:
+            self.last_mood_check = mood_block
+            if self.mood_rng.random() <= 0.5:
+                self.mood = self.mood_rng.choice(MOODS)
+
+    def realtime(self, until=None, inputs=None):
+        """
+        Run the pet simulation in real-time with terminal display, on
+        self.clock. Returns the final status, or None on quit or once
+        `until` clock seconds have passed. Input is read from `inputs`, a
+        queue of lines (user_input_queue by default).
+
+        Event-driven: the loop sleeps on the input queue until the next
+        timer is due -- the next sim step that can change anything (see
+        _plan()), the next wall-clock minute, or the next random event --
+        so an idle pet wakes a few times a minute rather than ten times a
+        second. Quiet sim steps in between are skipped as in fast_forward().
+        The timers themselves live in a RealtimeSession.
+        """
         # Clear screen once at the start
         clear_screen()
-        
-        # Initialize real-time tracking variables
-        start_time = time.time()
-        last_step_time = start_time
-        last_display_time = start_time
 
-        while True:
-            # Get current wall-clock time
-            now = time.time()
-            est = get_est_time()
-            self.clock_str = est.strftime("%H:%M")
-            self.current_hour = est.hour
-
-            # Convert elapsed real time to simulation steps
-            elapsed_sim_time = self.update_time_from_realtime(now - start_time)
-            steps_to_run = elapsed_sim_time - self.current_time
-            
-            # Reset random event counter on hour change
-            if self.current_hour != self.last_event_hour:
-                self.random_events_this_hour = 0
-                self.last_event_hour = self.current_hour
-
-            # Check if it's day or night based on real time
-            if self.current_hour != self.last_day_check:
-                self.last_day_check = self.current_hour
-                self.day_time = (6 <= self.current_hour < 18)
-
-            # Weather check, switch in morning vs afternoon based on real time
-            weather_period = 0 if self.current_hour < 12 else 1
-            if weather_period != self.last_weather_period:
-                self.last_weather_period = weather_period
-                chance = random.random()
-                if chance <= 0.8:
-                    self.weather = random.choice(["Clear", "Cloudy"])
-                else:
-                    w = random.choice(["Rain", "Snow"])
-                    self.weather = w
-                    # chance pet gets sick
-                    if random.random() <= 0.2:
-                        self.pet_sick = True
-
-            # Mood check in 8-hour blocks based on real time
-            mood_block = self.current_hour // 8
-            if mood_block != self.last_mood_check:
-                self.last_mood_check = mood_block
-                if random.random() <= 0.5:
-                    self.mood = random.choice(["content", "sad", "excited"])
-                    
-            # Random events check (only in real-time mode)
-            if (
-                self.random_events_this_hour < 2
-                and now >= (start_time + self.next_random_event_time)
-                and not self.pet_away
-            ):
-                self.random_events_this_hour += 1
-                self.next_random_event_time = now + random.randint(1800, 3600) - start_time
-                self.trigger_random_event = True
-
-            # Run simulation steps if needed
-            if steps_to_run > 0:
-                for _ in range(steps_to_run):
-                    status = self.step(real_time=True)
-                    if status:
-                        print(status)
-                        return
-
-            # Process user input
-            if not user_input_queue.empty():
-                inp = user_input_queue.get()
-                self.last_input_time = self.current_time
+        clock = self.clock
+        inputs = user_input_queue if inputs is None else inputs
+        session = RealtimeSession(self, clock.time())
+        inp = None
 
+        while True:
+            now = clock.time()
+            status = session.catch_up(now)
+            if status:
+                print(status)
+                return status
+            if until is not None and now >= session.start_time + until:
+                return None
+
+            # Process user input (caught up to the moment it arrived)
+            if inp is not None:
                 if inp.lower() == "q":
+                    self.last_input_time = self.current_time
                     print("\nExiting.")
                     return
+                status = session.command(inp)
+                if status:
+                    print(status)
+                    return status
+                inp = None
+
+            self.redraw()
+
+            # Sleep until the next timer, or until input arrives
+            wake = session.wake()
+            if until is not None:
+                wake = min(wake, session.start_time + until)
+            try:
+                inp = clock.wait(inputs, wake - clock.time())
+            except queue.Empty:
+                pass
+
+    def redraw(self):
+        """Partial terminal redraw, only if anything visible changed"""
+        # Decide if anything has changed enough to re-draw
+        current_display = (
+            self.clock_str,
+            self.weather,
+            self.mood,
+            self.day_time,
+            round(self.hunger, 2),
+            round(self.happiness, 2),
+            round(self.energy, 2),
+            self.msg,
+            self.pet_sick,
+            self.pet_away
+        )
+
+        if current_display != self.displayed_values:
+            new_display_lines = self.generate_display_lines()
+            partial_update_display(new_display_lines, self.old_display_lines)
+            self.old_display_lines = new_display_lines
+            self.displayed_values = current_display
+
+class RealtimeSession:
+    """
+    realtime()'s timers for one pet, without the loop around them: the
+    wall-clock minute, the random event schedule and the next sim step
+    that can change anything.  The caller owns the waiting, so one thread
+    can keep many pets live (see gotchi_server.py):
+
+        session = RealtimeSession(pet, clock.time())
+        status = session.catch_up(clock.time())   # run whatever is due
+        status = session.command("f")             # player input, once caught up
+        clock.wait(q, session.wake() - clock.time())
+    """
+    __slots__ = ("pet", "start_time", "next_minute", "plan")
+
+    def __init__(self, pet, start_time, next_minute=None):
+        self.pet = pet
+        self.start_time = start_time
+        # wall-clock refresh due immediately
+        self.next_minute = start_time if next_minute is None else next_minute
+        self.plan = None
+
+    def catch_up(self, now):
+        """Run every timer due by clock time `now`; returns the pet's status if it ended."""
+        pet = self.pet
+        start_time = self.start_time
+
+        # Minute rollover: clock text, and the hour-keyed day/weather/mood
+        if now >= self.next_minute:
+            pet.update_wall_clock(datetime.fromtimestamp(now, pet.clock.tz))
+            self.next_minute = (now // 60 + 1) * 60
+            self.plan = None  # weather may have made the pet sick
+
+        # Random events check (only in real-time mode)
+        if (
+            pet.random_events_this_hour < 2
+            and now >= (start_time + pet.next_random_event_time)
+            and not pet.pet_away
+        ):
+            pet.random_events_this_hour += 1
+            pet.next_random_event_time = now + pet.event_rng.randint(1800, 3600) - start_time
+            pet.trigger_random_event = True
+            self.plan = None
 
-                elif inp.lower() == "f" and not self.pet_away:
-                    status = self.feed()
-                    if status:
-                        print(status)
-                        return
-
-                elif inp.lower() == "p" and not self.pet_away:
-                    status = self.play()
-                    if status:
-                        print(status)
-                        return
-
-                elif inp.lower() == "s" and not self.pet_away:
-                    status = self.sleep()
-                    if status:
-                        print(status)
-                        return
-
-                else:
-                    # Catch-all for any typed text
-                    self.set_msg(inp, 30)
+        # Run every sim step that is due, skipping the quiet ones
+        target = pet.update_time_from_realtime(now - start_time)
+        while True:
+            if self.plan is None:
+                self.plan = pet._plan(real_time=True)
+            # (second test: don't let float rounding in the step/seconds
+            # conversion leave a due step unrun with its wake time passed)
+            if self.plan[0] > target and start_time + pet.realtime_for_step(self.plan[0]) > now:
+                break
+            status = pet._advance(self.plan, real_time=True)
+            self.plan = None
+            if status:
+                return status
+        if pet.current_time < target:
+            # Nothing happened in between; the rolls are memoryless, so
+            # drawing fresh waiting times from here on is equivalent
+            pet.current_time = target
+            self.plan = pet._plan(real_time=True)
+        return None
 
-            # Update display if needed - limit to 10fps for efficiency 
-            if now - last_display_time >= 0.1:
-                last_display_time = now
-                
-                # Decide if anything has changed enough to re-draw
-                current_display = (
-                    self.weather,
-                    self.mood,
-                    self.day_time,
-                    round(self.hunger, 2),
-                    round(self.happiness, 2),
-                    round(self.energy, 2),
-                    self.msg,
-                    self.pet_sick,
-                    self.pet_away
-                )
-
-                if current_display != self.displayed_values:
-                    new_display_lines = self.generate_display_lines()
-                    partial_update_display(new_display_lines, self.old_display_lines)
-                    self.old_display_lines = new_display_lines
-                    self.displayed_values = current_display
-
-            time.sleep(0.1)
+    def command(self, inp):
+        """
+        Apply one line of player input (f, p, s or any text to show) at the
+        current sim time; returns the pet's status if it ended.  Quitting is
+        up to the caller.
+        """
+        pet = self.pet
+        pet.last_input_time = pet.current_time
+        cmd = inp.lower()
+        status = None
+        if cmd == "f" and not pet.pet_away:
+            status = pet.feed()
+        elif cmd == "p" and not pet.pet_away:
+            status = pet.play()
+        elif cmd == "s" and not pet.pet_away:
+            status = pet.sleep()
+        else:
+            # Catch-all for any typed text
+            pet.set_msg(inp, 30)
+        self.plan = None if status else pet._plan(real_time=True)
+        return status
+
+    def wake(self):
+        """Clock time at which catch_up() next has something to do."""
+        pet = self.pet
+        if self.plan is None:
+            self.plan = pet._plan(real_time=True)
+        wake = min(self.next_minute, self.start_time + pet.realtime_for_step(self.plan[0]))
+        if pet.random_events_this_hour < 2 and not pet.pet_away:
+            wake = min(wake, self.start_time + pet.next_random_event_time)
+        return wake
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+gotchi_async.py  –  asyncio LLM driver, many episodes per process
+-----------------------------------------------------------------
+
+* One AsyncOpenAI client (one pooled HTTP connection pool) shared by every
+  episode; a semaphore bounds how many completions are in flight
+* Hundreds of episodes run as tasks in one event loop, so throughput is
+  capped by the endpoint rather than by one blocked thread per request
+* Optional paced mode: the pet keeps living in sim time while a request is
+  in flight (as with realtime() + gpt_loop), and a pet that dies mid-call
+  cancels the request
+* An optional llm_ratelimit.RateLimiter keeps every episode inside the
+  endpoint's requests/min and tokens/min quota, retrying 429s with backoff
+* A tiny OpenAI-compatible stub server answers with canned letters, for
+  exercising the whole driver offline
+
+    python gotchi_async.py --stub --episodes 500 --concurrency 200
+    python gotchi_async.py --base-url http://localhost:11434/v1 --model llama3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+from gotchi import Gotchi
+from gotchi_farm import (
+    EPISODE_MINUTES,
+    LLM_CACHE_PATH,
+    SYSTEM_PROMPT,
+    TURN_GAP,
+    content,
+    decision_row,
+    episode_record,
+    llm_cache,
+    results_store,
+    write_artifacts,
+)
+from llm_cache import MODES, LLMCache
+from llm_decision import parse_action
+from llm_ratelimit import RateLimiter, from_env as rate_limiter
+from gotchi_trace import TraceRecorder
+
+CALL_PERIOD = 120   # sim seconds between decisions in paced mode
+
+# ───────────────────────────────────────────────────────────────────────────
+# 1.  DRIVER
+# ───────────────────────────────────────────────────────────────────────────
+class AsyncDriver:
+    def __init__(
+        self,
+        model: str | None = None,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        concurrency: int = 64,
+        temperature: float | None = None,
+        timeout: float = 90,
+        cache: LLMCache | None = None,
+        limiter: RateLimiter | None = None,
+    ):
+        from openai import AsyncOpenAI  # type: ignore
+
+        # Size the connection pool to the concurrency cap so every in-flight
+        # request reuses a kept-alive connection
+        http_client = None
+        try:
+            import httpx  # type: ignore
+            from openai import DefaultAsyncHttpxClient  # type: ignore
+
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=concurrency,
+                    max_keepalive_connections=concurrency,
+                )
+            )
+        except ImportError:
+            pass
+
+        self.client = AsyncOpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY") or "x",
+            base_url=base_url or os.getenv("OPENAI_BASE_URL") or None,
+            http_client=http_client,
+            timeout=timeout,
+        )
+        self.model = model or os.getenv("OPENAI_MODEL", "o3")
+        self.temperature = (
+            temperature if temperature is not None
+            else float(os.getenv("OPENAI_TEMPERATURE", "1"))
+        )
+        self.sem = asyncio.Semaphore(concurrency)
+        self.cache = cache or llm_cache()
+        self.limiter = limiter
+
+    async def _request(self, **kwargs):
+        async with self.sem:
+            return await self.client.chat.completions.create(**kwargs)
+
+    async def _call(self, **kwargs):
+        # Waiting for quota happens outside the semaphore, so it never
+        # holds a connection slot
+        if self.limiter is None:
+            return await self._request(**kwargs)
+        return await self.limiter.acall(self._request, **kwargs)
+
+    async def complete(self, messages: list[dict[str, str]], salt=None) -> str:
+        # Cache hits don't take a concurrency slot
+        resp = await self.cache.acreate(
+            self._call,
+            salt=salt,
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+        )
+        return (resp.choices[0].message.content or "").strip()
+
+    async def decide(self, conversation: list[dict[str, str]], pet: Gotchi) -> str:
+        conversation.append(
+            {"role": "user", "content": "\n".join(pet.generate_display_lines())}
+        )
+        text = await self.complete(conversation, salt=pet.seed)
+        conversation.append({"role": "assistant", "content": text})
+        return (parse_action(text) or "").lower()
+
+    async def run_episode(
+        self,
+        episode: int,
+        seed,
+        minutes: int = EPISODE_MINUTES,
+        pace: float | None = None,
+        trace_dir: str | None = None,
+    ) -> dict:
+        """
+        pace=None: sim time only moves between decisions (as the notebooks
+        do).  pace=k: sim time runs at k sim seconds per wall second and a
+        decision is requested every CALL_PERIOD sim seconds.  With
+        trace_dir, the episode is saved there as a replayable trace.
+        """
+        needs_phrases, random_events = content()
+        pet = Gotchi(needs_phrases, random_events, seed=seed)
+        rec = TraceRecorder(pet, config={"policy": f"llm:{self.model}",
+                                         "minutes": minutes, "pace": pace})
+        turns = random.Random(f"{pet.seed}/turns")
+        conversation = [{"role": "system", "content": SYSTEM_PROMPT}]
+        rows: list[dict[str, float | str]] = []
+        result = None
+        dead = asyncio.Event()
+        tic = time.monotonic()
+
+        async def live():
+            nonlocal result
+            while pet.current_time < minutes * 60:
+                await asyncio.sleep(1 / pace)
+                target = int((time.monotonic() - tic) * pace)
+                status = rec.step(target - pet.current_time)
+                if status:
+                    result = status
+                    break
+            dead.set()
+
+        ticker = asyncio.create_task(live()) if pace else None
+        try:
+            while pet.current_time < minutes * 60 and not dead.is_set():
+                decision = asyncio.create_task(self.decide(conversation, pet))
+                if ticker:
+                    # Whichever comes first: the reply, or the pet dying
+                    ended = asyncio.create_task(dead.wait())
+                    await asyncio.wait({decision, ended}, return_when=asyncio.FIRST_COMPLETED)
+                    ended.cancel()
+                    if dead.is_set():
+                        decision.cancel()
+                        break
+                cmd = await decision
+
+                rows.append(decision_row(episode, pet, cmd))
+                if cmd == "q":
+                    result = "quit"
+                    break
+                status = rec.act(cmd)
+                if not status and not ticker:
+                    status = rec.step(turns.randint(*TURN_GAP) * 60)
+                if status:
+                    result = status
+                    break
+                if ticker:
+                    due = pet.current_time + CALL_PERIOD
+                    while pet.current_time < due and not dead.is_set():
+                        await asyncio.sleep(1 / pace)
+        finally:
+            if ticker:
+                ticker.cancel()
+
+        if trace_dir is not None:
+            rec.finish(result).save(Path(trace_dir) / f"episode_{episode}.trace.json")
+        return episode_record(episode, seed, f"llm:{self.model}", pet, result,
+                              rows, time.monotonic() - tic)
+
+    async def run(self, episodes: int, base_seed: int = 0, **kw):
+        """Yield episode results as they finish."""
+        tasks = [
+            asyncio.create_task(self.run_episode(i, base_seed + i, **kw))
+            for i in range(episodes)
+        ]
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+# ───────────────────────────────────────────────────────────────────────────
+# 2.  STUB SERVER (OpenAI-compatible, canned letters)
+# ───────────────────────────────────────────────────────────────────────────
+async def serve_stub(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    letters: str = "FPS",
+    delay: float = 0.0,
+) -> asyncio.AbstractServer:
+    """
+    Answer every POST .../chat/completions with the next canned letter,
+    after `delay` seconds.  Keeps connections alive, like a real endpoint.
+    """
+    cycle = itertools.cycle(letters)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                length = 0
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                if delay:
+                    await asyncio.sleep(delay)
+                body = json.dumps(
+                    {
+                        "id": "stub",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": "stub",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": next(cycle)},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 1, "total_tokens": 1},
+                    }
+                ).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # client hung up, or the loop is shutting down mid-request
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+# ───────────────────────────────────────────────────────────────────────────
+# 3.  MAIN
+# ───────────────────────────────────────────────────────────────────────────
+async def amain(args) -> None:
+    server = None
+    base_url = args.base_url
+    if args.stub:
+        server = await serve_stub(delay=args.stub_delay)
+        port = server.sockets[0].getsockname()[1]
+        base_url = f"http://127.0.0.1:{port}/v1"
+
+    cache = LLMCache(LLM_CACHE_PATH, mode=args.cache) if args.cache else llm_cache()
+    # GOTCHI_RPM / GOTCHI_TPM set the shared quota (the stub has none)
+    limiter = None if args.stub else rate_limiter()
+    driver = AsyncDriver(model=args.model, base_url=base_url,
+                         concurrency=args.concurrency, cache=cache,
+                         limiter=limiter)
+    results = []
+    tic = time.time()
+    try:
+        async for r in driver.run(args.episodes, args.seed,
+                                  minutes=args.minutes, pace=args.pace,
+                                  trace_dir=args.traces):
+            results.append(r)
+            print(f"[{len(results)}/{args.episodes}] episode {r['episode']}: "
+                  f"{r['result']} @ {r['sim_time'] // 60} min", file=sys.stderr)
+    finally:
+        await driver.aclose()
+        if server:
+            server.close()
+            await server.wait_closed()
+
+    csv_path, json_path, shard = write_artifacts(results)
+    elapsed = time.time() - tic
+    print(f"\n{len(results)} episodes in {elapsed:.1f}s "
+          f"({sum(r['decisions'] for r in results) / max(elapsed, 1e-9):.1f} decisions/s)",
+          file=sys.stderr)
+    if limiter is not None:
+        rl = limiter.stats()
+        print(f"Rate limit: {rl['retries']} retries ({rl['throttled']} throttled), "
+              f"mean queue wait {rl['mean_queue_wait_s']}s vs service "
+              f"{rl['mean_service_s']}s", file=sys.stderr)
+    print(f" ➜ CSV log saved to  {csv_path}", file=sys.stderr)
+    print(f" ➜ Summaries saved to {json_path}", file=sys.stderr)
+    print(f" ➜ Results stored as {shard} in {results_store().root}", file=sys.stderr)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Drive many Gotchi episodes with an async LLM client.")
+    ap.add_argument("--episodes", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=64,
+                    help="max completions in flight")
+    ap.add_argument("--model", default=None)
+    ap.add_argument("--base-url", default=None)
+    ap.add_argument("--seed", type=int, default=0, help="seed of episode 0")
+    ap.add_argument("--minutes", type=int, default=EPISODE_MINUTES)
+    ap.add_argument("--pace", type=float, default=None,
+                    help="sim seconds per wall second (default: turn-based)")
+    ap.add_argument("--stub", action="store_true",
+                    help="serve canned letters from a local stub endpoint")
+    ap.add_argument("--stub-delay", type=float, default=0.0)
+    ap.add_argument("--cache", choices=MODES, default=None,
+                    help="LLM response cache mode (default: $GOTCHI_LLM_CACHE or off)")
+    ap.add_argument("--traces", default=None, metavar="DIR",
+                    help="save a replayable trace of every episode here")
+    asyncio.run(amain(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+"""
+GotchiBatch: many pets simulated at once as NumPy arrays.
+
+Holds the state of N pets as struct-of-arrays and applies the step-mode
+rules of gotchi.Gotchi (step, feed, play, sleep) as masked array operations,
+so scoring a policy over thousands of seeds costs a handful of array ops per
+step instead of one Python call per pet per step.
+
+Like Gotchi.fast_forward(), each pet keeps the step at which it next needs
+attention (a needs decay, wander/return, phrase expiry, or a pre-drawn
+phrase/sickness roll). The only state the pets share is day/night, so
+step() runs the rules for every pet due before the next day/night flip in
+one pass, each pet at its own due step, and repeats until nobody is due;
+a pass costs the same whether the due steps coincide or not.
+
+All pets share the simulation clock (they are stepped together), so the
+clock-related fields that are identical across pets are plain scalars.
+Random events are realtime-only in Gotchi and are not modelled here, and
+the display message is not tracked since it never feeds back into the stats.
+After editing the state arrays directly (e.g. last_input_time), call
+reschedule() so the pets' due steps are recomputed.
+
+parity() (python gotchi_batch.py, tests/test_gotchi_batch.py) checks the
+batch against Gotchi and times both. Measured over 3 sim hours with a
+decision every minute, against Gotchi.step(fast=True) per pet: ~4x at 500
+pets, ~13x at 2,000, ~28x at 10,000 -- not the 100x aimed for; every array
+op has a fixed cost, so small batches gain the least.
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from gotchi import NEEDS_PHRASE_CHANCE, OVERFED_SICK_CHANCE, load_content
+
+# Per-pet termination codes and the strings Gotchi.step() returns for them
+ALIVE = 0
+DIED = 1
+NEVER_RETURNS = 2
+RAN_AWAY = 3
+STATUS_MESSAGES = {
+    ALIVE: None,
+    DIED: "Your ascii pet has died.",
+    NEVER_RETURNS: "Your ascii pet never returns.",
+    RAN_AWAY: "Your ascii pet has run away.",
+}
+
+# Action codes for act()
+NOOP, FEED, PLAY, SLEEP = 0, 1, 2, 3
+
+STATS = ("hunger", "happiness", "energy")
+MOODS = ("content", "sad", "excited")
+
+NEVER = np.iinfo(np.int64).max
+
+
+class GotchiBatch:
+    def __init__(self, n, needs_phrases=None, seed=None):
+        if needs_phrases is None:
+            needs_phrases = load_content().phrases
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+
+        # Needs phrases as parallel (stat code, delta) tables
+        self.needs_phrases = needs_phrases
+        self.phrase_stat = np.array(
+            [STATS.index(s.lower()) if s.lower() in STATS else -1 for _, s, _ in needs_phrases],
+            dtype=np.int8,
+        )
+        self.phrase_delta = np.array([d for _, _, d in needs_phrases], dtype=np.float64)
+
+        # Pet stats
+        self.hunger = np.full(n, 5.0)
+        self.happiness = np.full(n, 5.0)
+        self.energy = np.full(n, 5.0)
+        self.friendship = np.full(n, 5.0)
+
+        self.pet_sick = np.zeros(n, dtype=bool)
+        self.pet_away = np.zeros(n, dtype=bool)
+        self.away_start = np.zeros(n, dtype=np.int64)
+        self.away_used = np.zeros(n, dtype=np.int64)
+        self.last_away = np.zeros(n, dtype=np.int64)
+
+        # Timing/intervals (current_time and the clock are shared)
+        self.current_time = 0
+        self.last_input_time = np.zeros(n, dtype=np.int64)
+        self.last_needs_update = np.zeros(n, dtype=np.int64)
+        self.needs_interval = 120
+        self.mood = np.zeros(n, dtype=np.int8)  # index into MOODS
+        self.active_phrase = np.full(n, -1, dtype=np.int64)  # index or -1
+        self.last_phrase_time = np.zeros(n, dtype=np.int64)
+
+        self.hour = 0
+        self.minute = 0
+        self.day_time = True
+        self.last_clock_update = 0
+
+        # Termination code per pet, and the sim time it happened at
+        self.status = np.zeros(n, dtype=np.int8)
+        self.end_time = np.full(n, -1, dtype=np.int64)
+
+        # Scheduling: next step each pet needs attention, and the step its
+        # pending phrase / sickness roll succeeds at (NEVER if not drawn)
+        self.next_due = np.full(n, NEVER, dtype=np.int64)
+        self.phrase_at = np.full(n, NEVER, dtype=np.int64)
+        self.sick_at = np.full(n, NEVER, dtype=np.int64)
+        self.reschedule()
+
+    @property
+    def alive(self):
+        return self.status == ALIVE
+
+    @property
+    def clock_str(self):
+        return f"{self.hour:02d}:{self.minute:02d}"
+
+    def messages(self):
+        """Per-pet status strings, as Gotchi.step() would have returned them."""
+        return [STATUS_MESSAGES[int(c)] for c in self.status]
+
+    def _select(self, mask):
+        """Indices of the live pets in mask (default: all live pets)."""
+        live = self.status == ALIVE
+        if mask is not None:
+            live &= np.asarray(mask, dtype=bool)
+        return np.flatnonzero(live)
+
+    def _end(self, idx, code, now=None):
+        """
+        Terminate the pets in idx, at their step in now (default: the
+        shared current_time); returns the survivors of idx.
+        """
+        dead = idx[self.status[idx] == ALIVE]
+        self.status[dead] = code
+        self.end_time[dead] = self.current_time if now is None else now[dead]
+        self.next_due[dead] = NEVER
+        return idx[self.status[idx] == ALIVE]
+
+    def _low(self, idx):
+        return np.minimum(np.minimum(self.hunger[idx], self.happiness[idx]), self.energy[idx])
+
+    def reschedule(self, mask=None):
+        """
+        Recompute the next due step of the pets in mask (default: all).
+        Roll waiting times are redrawn, which is fine since they are
+        memoryless.
+        """
+        self._reschedule(self._select(mask))
+
+    def _reschedule(self, idx, now=None):
+        idx = idx[self.status[idx] == ALIVE]
+        now = np.full(idx.size, self.current_time) if now is None else now[idx]
+        away = self.pet_away[idx]
+        sick = self.pet_sick[idx]
+        phrase = self.active_phrase[idx] >= 0
+
+        wander = self.last_input_time[idx] + 300
+        wander = np.where(
+            self.away_used[idx] >= 1, np.maximum(wander, self.last_away[idx] + 600), wander
+        )
+        due = np.where(
+            away,
+            self.away_start[idx] + 300,
+            np.minimum(self.last_needs_update[idx] + self.needs_interval, wander),
+        )
+        due = np.where(phrase, np.minimum(due, self.last_phrase_time[idx] + 121), due)
+
+        # Dead or out-of-range stats are handled on the very next step
+        h, ha, e = self.hunger[idx], self.happiness[idx], self.energy[idx]
+        odd = (np.minimum(np.minimum(h, ha), e) <= 0) | (np.maximum(np.maximum(h, ha), e) > 10)
+        due = np.where(odd, now + 1, due)
+
+        # Waiting times for the per-step rolls, only while they can fire
+        phrase_at = np.full(idx.size, NEVER, dtype=np.int64)
+        if self.phrase_stat.size:
+            can = ~sick & ~away & ~phrase
+            phrase_at[can] = now[can] + self.rng.geometric(NEEDS_PHRASE_CHANCE, int(can.sum()))
+        sick_at = np.full(idx.size, NEVER, dtype=np.int64)
+        can = ~sick & ((h > 10) | (e > 9))
+        sick_at[can] = now[can] + self.rng.geometric(OVERFED_SICK_CHANCE, int(can.sum()))
+
+        self.phrase_at[idx] = phrase_at
+        self.sick_at[idx] = sick_at
+        self.next_due[idx] = np.maximum(now + 1, np.minimum(due, np.minimum(phrase_at, sick_at)))
+
+    def step(self, n=None):
+        """
+        Advance every live pet by one step (or n steps).
+        Returns the status array; terminated pets are frozen.
+        """
+        end = self.current_time + (1 if n is None else n)
+        while True:
+            # Last step that still sees the current day/night
+            stop = min(end, self._next_flip() - 1)
+            while True:
+                idx = np.flatnonzero(self.next_due <= stop)
+                if not idx.size:
+                    break
+                self._tick(idx)
+            if stop == end:
+                self._advance_clock(end)
+                break
+            self._advance_clock(stop + 1)
+        return self.status
+
+    def _next_flip(self):
+        """The step at which _advance_clock() next flips day_time."""
+        per_tick = self.needs_interval // 60
+        if per_tick <= 0:
+            return NEVER
+        # The (13 - hour)th hour change wraps 12 -> 1
+        ticks = -(-(60 * (13 - self.hour) - self.minute) // per_tick)
+        return self.last_clock_update + 60 * ticks
+
+    def _advance_clock(self, t):
+        """Move the shared clock (and day/night) forward to step t."""
+        while self.last_clock_update + 60 <= t:
+            self.last_clock_update += 60
+            self.minute += self.needs_interval // 60
+            if self.minute >= 60:
+                self.minute -= 60
+                self.hour += 1
+                if self.hour > 12:
+                    self.hour = 1
+                    self.day_time = not self.day_time
+        self.current_time = t
+
+    def _roll(self, idx, at, p, now):
+        """This step's roll for idx: the pre-drawn outcome, or a fresh one."""
+        at = at[idx]
+        fresh = at == NEVER
+        hit = at == now[idx]
+        hit[fresh] = self.rng.random(int(fresh.sum())) < p
+        return hit
+
+    def _tick(self, idx):
+        """
+        One step of the Gotchi rules for the (due) pets in idx, each at its
+        own due step.
+        """
+        now = self.next_due.copy()
+        away = self.pet_away
+
+        # If no input for a while, pet might wander off
+        w = idx[
+            ~away[idx]
+            & (now[idx] - self.last_input_time[idx] >= 300)
+            & ((self.away_used[idx] < 1) | (now[idx] - self.last_away[idx] >= 600))
+        ]
+        away[w] = True
+        self.away_start[w] = now[w]
+        self.last_away[w] = now[w]
+
+        # Pet returns after a certain time away
+        back = idx[away[idx] & (now[idx] - self.away_start[idx] >= 300)]
+        if back.size:
+            away[back] = False
+            good = self.rng.random(back.size) <= 0.8
+            gi = back[good]
+            if gi.size:
+                # Lowest stat wins, ties in hunger/happiness/energy order
+                low = np.argmin(
+                    np.stack([self.hunger[gi], self.happiness[gi], self.energy[gi]]), axis=0
+                )
+                h = gi[low == 0]
+                self.hunger[h] = np.minimum(10.0, self.hunger[h] + 1.5)
+                ha = gi[low == 1]
+                ha = ha[~self.pet_sick[ha]]
+                self.happiness[ha] = np.minimum(10.0, self.happiness[ha] + 1.5)
+                e = gi[low == 2]
+                self.energy[e] = np.minimum(10.0, self.energy[e] + 1.5)
+            bi = back[~good]
+            self.pet_sick[bi[self.rng.random(bi.size) < 0.2]] = True
+            self.away_used[back] += 1
+
+        # If the pet is away but stats are zero, pet never returns
+        lost = idx[away[idx] & (self._low(idx) <= 0)]
+        if lost.size:
+            self._end(lost, NEVER_RETURNS, now)
+            idx = idx[self.status[idx] == ALIVE]
+
+        # Periodic needs decrease (when pet not away)
+        due = idx[~away[idx] & (now[idx] - self.last_needs_update[idx] >= self.needs_interval)]
+        if due.size:
+            self.last_needs_update[due] = now[due]
+            sick = self.pet_sick[due]
+            d = np.where(sick, 0.2, 0.5)
+            mood = self.mood[due]
+
+            happiness = self.happiness[due]
+            happiness = np.where(mood == 1, np.maximum(0, happiness - 0.2), happiness)
+            self.hunger[due] = np.maximum(0, self.hunger[due] - (d * 1.2 if self.day_time else d))
+            energy_d = np.where(mood == 2, d * 1.5, d if self.day_time else d * 1.2)
+            self.energy[due] = np.maximum(0, self.energy[due] - energy_d)
+            self.happiness[due] = np.where(sick, happiness, np.maximum(0, happiness - d))
+
+            # If any go to zero, pet dies
+            self._end(due[self._low(due) == 0], DIED, now)
+            due = due[self.status[due] == ALIVE]
+
+            # Friendship decays
+            fi = due[self.friendship[due] > 0]
+            self.friendship[fi] = np.maximum(0, self.friendship[fi] - 0.1)
+            self._end(fi[self.friendship[fi] == 0], RAN_AWAY, now)
+            idx = idx[self.status[idx] == ALIVE]
+
+        # Possibly spawn a needs phrase
+        if self.phrase_stat.size:
+            cand = idx[~self.pet_sick[idx] & ~away[idx] & (self.active_phrase[idx] < 0)]
+            spawn = cand[self._roll(cand, self.phrase_at, NEEDS_PHRASE_CHANCE, now)]
+            self.active_phrase[spawn] = self.rng.integers(self.phrase_stat.size, size=spawn.size)
+            self.last_phrase_time[spawn] = now[spawn]
+
+        # Clear the active phrase if it's too old
+        stale = idx[(self.active_phrase[idx] >= 0) & (now[idx] - self.last_phrase_time[idx] > 120)]
+        self.active_phrase[stale] = -1
+
+        # Cap stats at 10
+        self.hunger[idx] = np.minimum(self.hunger[idx], 10)
+        self.happiness[idx] = np.minimum(self.happiness[idx], 10)
+        self.energy[idx] = np.minimum(self.energy[idx], 10)
+
+        # If hunger or energy is too high, random chance to become sick
+        cand = idx[~self.pet_sick[idx] & ((self.hunger[idx] > 10) | (self.energy[idx] > 9))]
+        self.pet_sick[cand[self._roll(cand, self.sick_at, OVERFED_SICK_CHANCE, now)]] = True
+
+        # Check if pet died from stats going to zero
+        dead = idx[self._low(idx) <= 0]
+        if dead.size:
+            self._end(dead, DIED, now)
+            idx = idx[self.status[idx] == ALIVE]
+
+        self._reschedule(idx, now)
+
+    # --- Player actions, applied to the pets in mask (default: all) ---
+    def _befriend_and_answer(self, idx, stat, values):
+        # In step simulation, we don't need real time comparison
+        f = idx[self.friendship[idx] < 10]
+        self.friendship[f] = np.minimum(10, self.friendship[f] + 0.2)
+
+        # Active phrase about this stat gets its delta applied and cleared
+        p = idx[self.active_phrase[idx] >= 0]
+        p = p[self.phrase_stat[self.active_phrase[p]] == stat]
+        values[p] = np.minimum(10, values[p] - self.phrase_delta[self.active_phrase[p]])
+        self.active_phrase[p] = -1
+
+    def feed(self, mask=None):
+        idx = self._select(mask)
+        self.hunger[idx] = np.minimum(10, self.hunger[idx] + 1)
+        self.energy[idx] = np.maximum(0, self.energy[idx] - 0.25)
+        # chance to cure sickness by feeding
+        sick = idx[self.pet_sick[idx]]
+        self.pet_sick[sick[self.rng.random(sick.size) < 0.45]] = False
+        self._end(idx[(self.hunger[idx] == 0) | (self.energy[idx] == 0)], DIED)
+        self._befriend_and_answer(idx[self.status[idx] == ALIVE], 0, self.hunger)
+        self._reschedule(idx)
+        return self.status
+
+    def play(self, mask=None):
+        idx = self._select(mask)
+        h = idx[~self.pet_sick[idx]]
+        self.happiness[h] = np.minimum(10, self.happiness[h] + 1)
+        self.energy[idx] = np.maximum(0, self.energy[idx] - 0.25)
+        self._end(idx[(self.happiness[idx] == 0) | (self.energy[idx] == 0)], DIED)
+        self._befriend_and_answer(idx[self.status[idx] == ALIVE], 1, self.happiness)
+        self._reschedule(idx)
+        return self.status
+
+    def sleep(self, mask=None):
+        idx = self._select(mask)
+        self.energy[idx] = np.minimum(10, self.energy[idx] + 1)
+        self.hunger[idx] = np.maximum(0, self.hunger[idx] - 0.25)
+        self._end(idx[(self.energy[idx] == 0) | (self.hunger[idx] == 0)], DIED)
+        self._befriend_and_answer(idx[self.status[idx] == ALIVE], 2, self.energy)
+        self._reschedule(idx)
+        return self.status
+
+    def touch(self, mask=None):
+        """Record player input now for the pets in mask (resets wandering)."""
+        idx = self._select(mask)
+        self.last_input_time[idx] = self.current_time
+        self._reschedule(idx)
+
+    def act(self, actions):
+        """Apply one action code (NOOP/FEED/PLAY/SLEEP) per pet."""
+        actions = np.asarray(actions)
+        self.feed(actions == FEED)
+        self.play(actions == PLAY)
+        self.sleep(actions == SLEEP)
+        return self.status
+
+
+# --- Parity with the scalar simulator ---
+def _tend(hunger, happiness, energy, level):
+    """Scripted policy: act on the lowest stat once it drops below level (per pet)."""
+    low = np.argmin(np.stack([hunger, happiness, energy]), axis=0)
+    act = np.array([FEED, PLAY, SLEEP])[low]
+    return np.where(np.minimum(np.minimum(hunger, happiness), energy) < level, act, NOOP)
+
+
+def _run_scalar(pets, actions, every, touch):
+    """One chunk for a list of Gotchi: act as told, then step `every` steps."""
+    for pet, a in zip(pets, actions):
+        if pet.status is not None:
+            continue
+        if touch or a != NOOP:
+            pet.last_input_time = pet.current_time
+        action = {FEED: pet.feed, PLAY: pet.play, SLEEP: pet.sleep}.get(int(a))
+        if not (action and action()):
+            pet.step(every, fast=not touch)
+
+
+def _end_codes(pets):
+    codes = {msg: code for code, msg in STATUS_MESSAGES.items()}
+    return np.array([codes[pet.status] for pet in pets])
+
+
+def parity(pets=2000, steps=8 * 3600, every=40, levels=(3.0, 8.0), z=4.0, seed=0):
+    """
+    Run GotchiBatch and gotchi.Gotchi side by side under the same scripted
+    policy, each pet tending at a level drawn from `levels`, and check they
+    agree. Returns a report dict with "ok".
+
+    Trajectories: with no needs phrases and player input every `every`
+    steps, none of the random rules can fire (pets never wander off, and
+    levels <= 8 keep them from being overfed), so from varied starting stats
+    and with each pet skipping a share of its turns (the same skips on both
+    sides) every pet's stats, status, end step and the clock must match
+    Gotchi.step() after each chunk. The scalar side steps one step at a
+    time here.
+
+    Stats: with the random rules on and input only when the policy acts,
+    the two can only agree in distribution, so the share of each end status
+    and the mean end time must lie within z standard errors. This run is also
+    timed on both sides (the scalar side with fast=True).
+    """
+    from gotchi import Gotchi
+
+    rng = np.random.default_rng(seed)
+    chunks = steps // every
+    fields = ("hunger", "happiness", "energy", "friendship")
+    report = {}
+
+    # Exact trajectories (a tenth of the pets: the scalar side is per step)
+    n = max(1, pets // 10)
+    start = rng.integers(12, 33, size=(3, n)) / 4.0
+    level = rng.uniform(*levels, size=pets)
+    skip = rng.uniform(0.0, 0.8, size=n)
+    batch = GotchiBatch(n, needs_phrases=[], seed=seed)
+    batch.hunger[:], batch.happiness[:], batch.energy[:] = start
+    batch.reschedule()
+    scalar = [Gotchi(needs_phrases=[], seed=seed + i) for i in range(n)]
+    for pet, (h, ha, e) in zip(scalar, start.T):
+        pet.hunger, pet.happiness, pet.energy = float(h), float(ha), float(e)
+        pet.reschedule()
+
+    gap, mismatched = 0.0, 0
+    for _ in range(chunks):
+        actions = _tend(batch.hunger, batch.happiness, batch.energy, level[:n])
+        actions[rng.random(n) < skip] = NOOP
+        batch.touch()
+        batch.act(actions)
+        batch.step(every)
+        _run_scalar(scalar, actions, every, touch=True)
+        for f in fields:
+            ref = np.array([getattr(pet, f) for pet in scalar])
+            gap = max(gap, float(np.abs(getattr(batch, f) - ref).max()))
+        codes = _end_codes(scalar)
+        ended = np.array([pet.current_time for pet in scalar])
+        mismatched += int((batch.status != codes).sum())
+        mismatched += int((batch.end_time != np.where(codes == ALIVE, -1, ended)).sum())
+        live = [pet for pet in scalar if pet.status is None]
+        if live:
+            mismatched += batch.clock_str != live[0].clock_str
+            mismatched += batch.day_time != live[0].day_time
+    report["trajectory_pets"] = n
+    report["trajectory_max_gap"] = gap
+    report["trajectory_mismatches"] = mismatched
+    report["trajectory_ended"] = int((batch.status != ALIVE).sum())
+
+    # Outcome distributions with the random rules on
+    batch = GotchiBatch(pets, seed=seed)
+    scalar = [Gotchi(seed=seed + pets + i) for i in range(pets)]
+    batch_time = scalar_time = 0.0
+    for _ in range(chunks):
+        tic = time.perf_counter()
+        actions = _tend(batch.hunger, batch.happiness, batch.energy, level)
+        batch.touch(actions != NOOP)
+        batch.act(actions)
+        batch.step(every)
+        batch_time += time.perf_counter() - tic
+
+        tic = time.perf_counter()
+        ref = np.array([[pet.hunger, pet.happiness, pet.energy] for pet in scalar]).T
+        _run_scalar(scalar, _tend(*ref, level), every, touch=False)
+        scalar_time += time.perf_counter() - tic
+
+    ends = {}
+    ref_codes = _end_codes(scalar)
+    ref_time = np.array([pet.current_time for pet in scalar])
+    end_time = np.where(batch.status == ALIVE, batch.current_time, batch.end_time)
+    worst = 0.0
+    for code, msg in STATUS_MESSAGES.items():
+        p, q = float((batch.status == code).mean()), float((ref_codes == code).mean())
+        se = np.sqrt(max((p + q) / 2 * (1 - (p + q) / 2), 1 / pets) * 2 / pets)
+        worst = max(worst, abs(p - q) / se)
+        ends[msg or "alive"] = (p, q)
+    se = np.sqrt((end_time.var() + ref_time.var()) / pets) or 1.0
+    worst = max(worst, abs(end_time.mean() - ref_time.mean()) / se)
+    report["end_status"] = ends
+    report["mean_end_time"] = (float(end_time.mean()), float(ref_time.mean()))
+    report["worst_z"] = float(worst)
+    report["seconds"] = {"batch": round(batch_time, 3), "scalar": round(scalar_time, 3)}
+    report["speedup"] = round(scalar_time / batch_time, 1)
+
+    report["ok"] = bool(gap < 1e-9 and mismatched == 0 and worst < z)
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check GotchiBatch against gotchi.Gotchi.")
+    ap.add_argument("--pets", type=int, default=2000)
+    ap.add_argument("--hours", type=float, default=8.0, help="simulated hours per pet")
+    ap.add_argument("--every", type=int, default=40, help="steps between decisions")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    report = parity(args.pets, int(args.hours * 3600), args.every, seed=args.seed)
+    print(json.dumps(report, indent=2))
+    if not report["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+gotchi_bench.py  –  reproducible benchmarks for the simulation and harness
+--------------------------------------------------------------------------
+
+* Fixed seeds, repeated runs, median / p95 per benchmark, machine metadata
+* --save writes the results as a baseline JSON; --baseline compares against
+  one and exits 1 when a benchmark got slower than the allowed tolerance
+
+    python gotchi_bench.py                         # run and print
+    python gotchi_bench.py --save bench_baseline.json
+    python gotchi_bench.py --baseline bench_baseline.json --tolerance 0.25 \\
+        --tolerance-for render_frame=0.5
+    python gotchi_bench.py --only step_ --repeat 9
+
+Benchmarks (smaller is better; "unit" says per what):
+    step_single      step() called once per sim step
+    step_loop        step(n), one step at a time
+    step_fast        step(n, fast=True)
+                     (all three over 20k sim steps of seeded pets, left alone)
+    episode_60min    a 60-minute scripted farm episode, decisions included
+    render_frame     generate_display_lines + partial_update_display diff
+    harness_decision one LLM-style decision with a stubbed completion
+                     (screen capture, context window, parse, act, skip ahead)
+    memory_per_pet   bytes allocated per live Gotchi
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable
+
+import gotchi
+from gotchi import Gotchi
+from gotchi_farm import SYSTEM_PROMPT, TURN_GAP, apply_command, content, run_episode
+from llm_cache import LLMCache, cached_response
+from llm_context import ContextWindow
+from llm_decision import parse_action
+
+SEED = 1234
+STEPS = 20_000          # sim steps per step_* run
+
+# ───────────────────────────────────────────────────────────────────────────
+# 1.  BENCHMARKS
+# ───────────────────────────────────────────────────────────────────────────
+# Each benchmark runs once and returns (value, unit); the runner repeats it.
+Bench = Callable[[], "tuple[float, str]"]
+
+
+def _pet(seed: int) -> Gotchi:
+    # content from the repo, not the cwd, so the suite runs from anywhere
+    return Gotchi(*content(), seed=seed)
+
+
+def _per_step(run) -> tuple[float, str]:
+    """
+    Time run(pet, n) over STEPS sim steps in total, starting the next seeded
+    pet whenever one dies or runs away (left alone, they all do).
+    """
+    done = 0
+    k = 0
+    tic = time.perf_counter()
+    while done < STEPS:
+        pet = _pet(SEED + k)
+        run(pet, STEPS - done)
+        done += pet.current_time
+        k += 1
+    return (time.perf_counter() - tic) / done * 1e6, "us/step"
+
+
+def bench_step_single() -> tuple[float, str]:
+    def run(pet, n):
+        step = pet.step
+        for _ in range(n):
+            if step():
+                break
+    return _per_step(run)
+
+
+def bench_step_loop() -> tuple[float, str]:
+    return _per_step(lambda pet, n: pet.step(n))
+
+
+def bench_step_fast() -> tuple[float, str]:
+    return _per_step(lambda pet, n: pet.step(n, fast=True))
+
+
+def bench_episode_60min() -> tuple[float, str]:
+    tic = time.perf_counter()
+    for i in range(20):
+        run_episode(i, SEED + i, "scripted")
+    return (time.perf_counter() - tic) / 20 * 1e3, "ms/episode"
+
+
+def bench_render_frame() -> tuple[float, str]:
+    pet = _pet(SEED)
+    frames = 2000
+    old: list[str] = []
+    out = io.StringIO()
+    tic = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        for i in range(frames):
+            pet.step(7, fast=True)
+            if i % 3 == 0:
+                pet.feed()
+            lines = pet.generate_display_lines()
+            gotchi.partial_update_display(lines, old)
+            old = lines
+            if pet.status:
+                pet = _pet(SEED + i)
+    return (time.perf_counter() - tic) / frames * 1e6, "us/frame"
+
+
+def bench_harness_decision() -> tuple[float, str]:
+    rng = random.Random(SEED)
+    cache = LLMCache(":memory:", mode="off")
+
+    def create(**kwargs):
+        # an instant, canned reply: what's left is the harness's own cost
+        return cached_response(f"[{rng.choice('FPS')}]", {})
+
+    decisions = 0
+    tic = time.perf_counter()
+    for ep in range(20):
+        pet = _pet(SEED + ep)
+        turns = random.Random(f"{pet.seed}/turns")
+        window = ContextWindow(SYSTEM_PROMPT, strategy="last_turns")
+        while pet.current_time < 3600:
+            window.append("user", "\n".join(pet.generate_display_lines()))
+            resp = cache.create(create, salt=pet.seed, model="stub",
+                                messages=window.messages())
+            text = resp.choices[0].message.content
+            window.append("assistant", text)
+            decisions += 1
+            status = apply_command(pet, (parse_action(text) or "").lower())
+            if status or pet.step(turns.randint(*TURN_GAP) * 60, fast=True):
+                break
+    return (time.perf_counter() - tic) / decisions * 1e6, "us/decision"
+
+
+def bench_memory_per_pet() -> tuple[float, str]:
+    content()           # shared tables are not per-pet cost
+    n = 2000
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    pets = [_pet(SEED + i) for i in range(n)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    del pets
+    return size / n, "bytes/pet"
+
+
+BENCHMARKS: dict[str, Bench] = {
+    "step_single": bench_step_single,
+    "step_loop": bench_step_loop,
+    "step_fast": bench_step_fast,
+    "episode_60min": bench_episode_60min,
+    "render_frame": bench_render_frame,
+    "harness_decision": bench_harness_decision,
+    "memory_per_pet": bench_memory_per_pet,
+}
+
+# ───────────────────────────────────────────────────────────────────────────
+# 2.  RUNNER
+# ───────────────────────────────────────────────────────────────────────────
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    k = (len(values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def machine() -> dict:
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "numpy": numpy_version,
+    }
+
+
+def run(names: list[str], repeat: int, warmup: int = 1) -> dict:
+    results = {}
+    for name in names:
+        bench = BENCHMARKS[name]
+        for _ in range(warmup):
+            bench()
+        samples = []
+        unit = ""
+        for _ in range(repeat):
+            random.seed(SEED)
+            value, unit = bench()
+            samples.append(value)
+        results[name] = {
+            "unit": unit,
+            "median": statistics.median(samples),
+            "p95": percentile(samples, 0.95),
+            "min": min(samples),
+            "samples": samples,
+        }
+        print(f"{name:18s} {results[name]['median']:12.3f} {unit:12s} "
+              f"(p95 {results[name]['p95']:.3f})", file=sys.stderr)
+    return {
+        "created": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "seed": SEED,
+        "repeat": repeat,
+        "machine": machine(),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float,
+            per_bench: dict[str, float]) -> list[str]:
+    """Benchmarks whose median is more than tolerance (a fraction) above baseline."""
+    failures = []
+    for name, now in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        allowed = per_bench.get(name, tolerance)
+        change = now["median"] / base["median"] - 1 if base["median"] else 0.0
+        flag = "REGRESSION" if change > allowed else "ok"
+        print(f"{name:18s} {base['median']:12.3f} -> {now['median']:12.3f} "
+              f"{now['unit']:12s} {change:+7.1%}  (allowed +{allowed:.0%}) {flag}",
+              file=sys.stderr)
+        if change > allowed:
+            failures.append(name)
+    if baseline.get("machine") != current["machine"]:
+        print("note: baseline was recorded on a different machine", file=sys.stderr)
+    return failures
+
+# ───────────────────────────────────────────────────────────────────────────
+# 3.  MAIN
+# ───────────────────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark Gotchi and its harness.")
+    ap.add_argument("--only", default=None, help="run benchmarks whose name contains this")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--save", default=None, help="write results as a baseline JSON")
+    ap.add_argument("--baseline", default=None, help="compare against this baseline JSON")
+    ap.add_argument("--tolerance", type=float, default=0.20,
+                    help="allowed slowdown as a fraction (default 0.20)")
+    ap.add_argument("--tolerance-for", action="append", default=[], metavar="NAME=FRAC",
+                    help="per-benchmark tolerance, e.g. render_frame=0.5")
+    args = ap.parse_args()
+
+    names = [n for n in BENCHMARKS if args.only is None or args.only in n]
+    if not names:
+        sys.exit(f"no benchmark matches {args.only!r}")
+    per_bench = {}
+    for item in args.tolerance_for:
+        name, _, frac = item.partition("=")
+        per_bench[name] = float(frac)
+
+    current = run(names, args.repeat)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f" ➜ Baseline saved to {args.save}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = compare(current, baseline, args.tolerance, per_bench)
+        if failures:
+            sys.exit(f"regressed: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
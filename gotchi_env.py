@@ -0,0 +1,291 @@
+"""
+gotchi_env.py  –  Gymnasium-style environment around Gotchi
+-----------------------------------------------------------
+
+* GotchiEnv: reset(seed) -> (obs, info), step(action) ->
+  (obs, reward, terminated, truncated, info), one decision per step
+* Frame-skip: sim seconds fast-forwarded after each decision, fixed or
+  drawn per decision (the notebooks' 3-10 minutes by default)
+* Pluggable reward shaping (REWARDS, or any callable)
+* SyncVectorEnv / SubprocVectorEnv: N envs stepped together, auto-reset on
+  episode end (the last observation goes to info["final_observation"])
+
+The observation is a float32 vector of what the screen shows (OBS_FIELDS);
+friendship stays hidden and is only reported in info.  env.render() gives
+the text screen, for agents that read it.  When gymnasium is installed
+GotchiEnv is a gymnasium.Env with matching spaces.
+
+    env = GotchiEnv(frame_skip=300)
+    obs, info = env.reset(seed=0)
+    obs, reward, terminated, truncated, info = env.step(FEED)
+
+    venv = SubprocVectorEnv(64, workers=8, frame_skip=300)
+    obs, infos = venv.reset(seed=0)
+    obs, rewards, terminated, truncated, infos = venv.step(actions)
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import random
+from typing import Callable
+
+import numpy as np
+
+from gotchi import Gotchi, Observation
+from gotchi_batch import FEED, NOOP, PLAY, SLEEP
+from gotchi_farm import EPISODE_MINUTES, TURN_GAP, apply_command, content
+
+try:
+    import gymnasium as gym  # type: ignore
+    from gymnasium import spaces  # type: ignore
+except ImportError:
+    gym = spaces = None
+
+# ───────────────────────────────────────────────────────────────────────────
+# 1.  OBSERVATIONS & ACTIONS
+# ───────────────────────────────────────────────────────────────────────────
+OBS_FIELDS = (
+    "hunger", "happiness", "energy",              # 0..10
+    "sick", "away", "day",                        # flags
+    "need_hunger", "need_happiness", "need_energy",
+    "sad", "excited",                             # mood ("content" = neither)
+)
+ACTIONS = (NOOP, FEED, PLAY, SLEEP)
+COMMANDS = {NOOP: "", FEED: "f", PLAY: "p", SLEEP: "s"}
+
+
+def encode(obs: Observation) -> np.ndarray:
+    return np.array(
+        (
+            obs.hunger, obs.happiness, obs.energy,
+            obs.sick, obs.away, obs.day,
+            obs.need == "hunger", obs.need == "happiness", obs.need == "energy",
+            obs.mood == "sad", obs.mood == "excited",
+        ),
+        dtype=np.float32,
+    )
+
+# ───────────────────────────────────────────────────────────────────────────
+# 2.  REWARD SHAPING
+# ───────────────────────────────────────────────────────────────────────────
+# reward(prev, obs, status) with prev/obs the Observation before the action
+# and after the frame-skip, status the end-of-episode string or None.
+Reward = Callable[[Observation, Observation, "str | None"], float]
+
+
+def survival_reward(prev: Observation, obs: Observation, status) -> float:
+    """+1 per decision survived, -1 when the pet dies or leaves."""
+    return -1.0 if status else 1.0
+
+
+def wellbeing_reward(prev: Observation, obs: Observation, status) -> float:
+    """Visible stats as a fraction of full, -1 when the pet dies or leaves."""
+    if status:
+        return -1.0
+    return (obs.hunger + obs.happiness + obs.energy) / 30.0
+
+
+def friendship_reward(prev: Observation, obs: Observation, status) -> float:
+    """Change in the hidden friendship stat."""
+    return obs.friendship - prev.friendship - (1.0 if status else 0.0)
+
+
+REWARDS: dict[str, Reward] = {
+    "survival": survival_reward,
+    "wellbeing": wellbeing_reward,
+    "friendship": friendship_reward,
+}
+
+# ───────────────────────────────────────────────────────────────────────────
+# 3.  SINGLE ENV
+# ───────────────────────────────────────────────────────────────────────────
+class GotchiEnv(gym.Env if gym else object):  # type: ignore[misc]
+    metadata = {"render_modes": ["ansi"]}
+
+    def __init__(
+        self,
+        frame_skip: int | tuple[int, int] = (TURN_GAP[0] * 60, TURN_GAP[1] * 60),
+        reward: str | Reward = "survival",
+        max_time: int = EPISODE_MINUTES * 60,
+        render_mode: str | None = None,
+    ):
+        """
+        frame_skip: sim seconds between decisions, or a (lo, hi) range drawn
+        per decision.  max_time: sim seconds before the episode is truncated.
+        """
+        self.frame_skip = frame_skip
+        self.reward_fn = REWARDS[reward] if isinstance(reward, str) else reward
+        self.max_time = max_time
+        self.render_mode = render_mode
+        if spaces is not None:
+            self.observation_space = spaces.Box(0.0, 10.0, (len(OBS_FIELDS),), np.float32)
+            self.action_space = spaces.Discrete(len(ACTIONS))
+
+        self.pet: Gotchi | None = None
+        self.seeds: random.Random | None = None   # next episode's seed
+        self.skip_rng: random.Random | None = None
+        self.last: Observation | None = None
+
+    def reset(self, *, seed=None, options=None):
+        if seed is None:
+            if self.seeds is None:
+                self.seeds = random.Random()
+            seed = self.seeds.getrandbits(64)
+        else:
+            # later unseeded resets continue a reproducible sequence
+            self.seeds = random.Random(f"{seed}/episodes")
+
+        needs_phrases, random_events = content()
+        self.pet = Gotchi(needs_phrases, random_events, seed=seed)
+        self.skip_rng = random.Random(f"{self.pet.seed}/turns")
+        self.last = self.pet.observe()
+        return encode(self.last), self._info()
+
+    def step(self, action: int):
+        pet = self.pet
+        prev = self.last
+        status = apply_command(pet, COMMANDS[int(action)]) if action != NOOP else None
+        if not status:
+            skip = self.frame_skip
+            if not isinstance(skip, int):
+                skip = self.skip_rng.randint(*skip)
+            skip = min(skip, self.max_time - pet.current_time)
+            status = pet.step(skip, fast=True) if skip > 0 else None
+
+        self.last = obs = pet.observe()
+        terminated = status is not None
+        truncated = not terminated and pet.current_time >= self.max_time
+        reward = self.reward_fn(prev, obs, status)
+        return encode(obs), reward, terminated, truncated, self._info()
+
+    def _info(self) -> dict:
+        pet = self.pet
+        return {
+            "seed": pet.seed,
+            "time": pet.current_time,
+            "friendship": pet.friendship,
+            "status": pet.status,
+        }
+
+    def render(self):
+        return "\n".join(self.pet.generate_display_lines())
+
+    def close(self):
+        pass
+
+# ───────────────────────────────────────────────────────────────────────────
+# 4.  VECTOR ENVS
+# ───────────────────────────────────────────────────────────────────────────
+class SyncVectorEnv:
+    """N GotchiEnvs stepped in turn in this process, with auto-reset."""
+
+    def __init__(self, n: int, **env_kwargs):
+        self.num_envs = n
+        self.envs = [GotchiEnv(**env_kwargs) for _ in range(n)]
+
+    def reset(self, *, seed=None, options=None):
+        results = [
+            env.reset(seed=None if seed is None else seed + i)
+            for i, env in enumerate(self.envs)
+        ]
+        return np.stack([obs for obs, _ in results]), [info for _, info in results]
+
+    def step(self, actions):
+        obs = np.empty((self.num_envs, len(OBS_FIELDS)), dtype=np.float32)
+        rewards = np.empty(self.num_envs)
+        terminated = np.empty(self.num_envs, dtype=bool)
+        truncated = np.empty(self.num_envs, dtype=bool)
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            o, rewards[i], terminated[i], truncated[i], info = env.step(action)
+            if terminated[i] or truncated[i]:
+                # Auto-reset: hand back the first observation of the next
+                # episode, keeping the last one of this episode in info
+                final_obs, final_info = o, info
+                o, info = env.reset()
+                info["final_observation"] = final_obs
+                info["final_info"] = final_info
+            obs[i] = o
+            infos.append(info)
+        return obs, rewards, terminated, truncated, infos
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+
+
+def _worker(conn, n: int, env_kwargs: dict) -> None:
+    venv = SyncVectorEnv(n, **env_kwargs)
+    try:
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "step":
+                conn.send(venv.step(arg))
+            elif cmd == "reset":
+                conn.send(venv.reset(seed=arg))
+            else:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        venv.close()
+        conn.close()
+
+
+class SubprocVectorEnv:
+    """
+    N GotchiEnvs spread over worker processes, each stepping its slice of
+    envs as a SyncVectorEnv, so one round trip per worker per step.
+    """
+
+    def __init__(self, n: int, workers: int | None = None, **env_kwargs):
+        self.num_envs = n
+        workers = max(1, min(n, workers or mp.cpu_count()))
+        sizes = [n // workers + (i < n % workers) for i in range(workers)]
+        self.bounds = np.cumsum([0] + sizes)
+
+        ctx = mp.get_context()
+        self.conns = []
+        self.procs = []
+        for size in sizes:
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(child, size, env_kwargs), daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+    def reset(self, *, seed=None, options=None):
+        for conn, lo in zip(self.conns, self.bounds):
+            conn.send(("reset", None if seed is None else seed + int(lo)))
+        results = [conn.recv() for conn in self.conns]
+        return (
+            np.concatenate([obs for obs, _ in results]),
+            [info for _, infos in results for info in infos],
+        )
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for conn, lo, hi in zip(self.conns, self.bounds, self.bounds[1:]):
+            conn.send(("step", actions[lo:hi]))
+        results = [conn.recv() for conn in self.conns]
+        obs, rewards, terminated, truncated, infos = zip(*results)
+        return (
+            np.concatenate(obs),
+            np.concatenate(rewards),
+            np.concatenate(terminated),
+            np.concatenate(truncated),
+            [info for chunk in infos for info in chunk],
+        )
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self.procs:
+            proc.join(timeout=5)
+        for conn in self.conns:
+            conn.close()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+gotchi_farm.py  –  run many agent‑vs‑Gotchi episodes across cores
+------------------------------------------------------------------
+
+* Headless episodes: decide → act → fast‑forward the pet, no realtime threads
+* Fans episodes out over a process pool (scripted / random policies) or a
+  thread pool (LLM policies, so many episodes overlap their network waits)
+* Per‑episode seeds, pluggable policies, per‑episode wall‑clock timeout
+* Streams results as episodes finish and writes the usual
+  gotchi_stats_<ts>.csv / summaries_<ts>.json into LOG_DIR, plus a shard
+  of the columnar results store (query it with gotchi_store.py)
+* --traces DIR records every episode as a replayable trace
+  (gotchi_trace.py), so a post-mortem never pays for the policy again
+
+    python gotchi_farm.py --episodes 1000 --workers 32 --policy scripted
+    python gotchi_farm.py --episodes 50 --policy llm --executor thread
+    python gotchi_farm.py --policy mypolicies:make_policy
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+from gotchi import Gotchi, load_content
+from gotchi_store import ResultsStore
+from gotchi_trace import TraceRecorder
+from llm_cache import MODES, LLMCache
+from llm_decision import parse_action
+
+# ───────────────────────────────────────────────────────────────────────────
+# 1.  CONFIG
+# ───────────────────────────────────────────────────────────────────────────
+ROOT = Path(__file__).parent.resolve()
+LOG_DIR = ROOT / "logs"
+
+EPISODE_MINUTES = 60        # sim minutes per episode (as in the notebooks)
+TURN_GAP        = (3, 10)   # sim minutes between decisions, drawn per turn
+
+# LLM response cache: off | record | replay | replay-or-call
+LLM_CACHE_PATH = LOG_DIR / "llm_cache.sqlite"
+
+_llm_cache: LLMCache | None = None
+_store: ResultsStore | None = None
+
+
+def llm_cache() -> LLMCache:
+    """
+    This process's response cache, made on first use so importing the farm
+    (or running a worker whose policy never calls an LLM) touches no files.
+    The mode comes from $GOTCHI_LLM_CACHE, which main() sets before any
+    worker starts.
+    """
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMCache(LLM_CACHE_PATH, mode=os.getenv("GOTCHI_LLM_CACHE", "off"))
+    return _llm_cache
+
+
+def results_store() -> ResultsStore:
+    """The results store, made on first use like llm_cache()."""
+    global _store
+    if _store is None:
+        _store = ResultsStore()   # logs/store
+    return _store
+
+
+SYSTEM_PROMPT = (
+    "You are caring for this simulation.\n"
+    "At each turn you see the ENTIRE screen and must choose exactly one "
+    "action:\n\n"
+    "  [F]eed   [P]lay   [S]leep   [Q]uit\n\n"
+    "Reply with JUST that letter."
+)
+
+Policy = Callable[[Gotchi], str]
+
+def content() -> tuple[tuple, tuple]:
+    """Content tables, parsed once per worker process and shared by every pet."""
+    pack = load_content(ROOT / "needs_phrases.txt", ROOT / "random_events.txt")
+    return pack.phrases, pack.events
+
+# ───────────────────────────────────────────────────────────────────────────
+# 2.  POLICIES
+# ───────────────────────────────────────────────────────────────────────────
+# A policy factory takes the episode seed and returns a callable that maps
+# the pet to one of "f", "p", "s", "q".  Anything importable as
+# "module:factory" can be passed as --policy.
+
+def scripted_policy(seed) -> Policy:
+    """Answer the active need if there is one, else tend the lowest stat."""
+    by_stat = {"hunger": "f", "happiness": "p", "energy": "s"}
+
+    def decide(pet: Gotchi) -> str:
+        if pet.active_phrase_data:
+            cmd = by_stat.get(pet.active_phrase_data[1].lower())
+            if cmd:
+                return cmd
+        return min(
+            (("f", pet.hunger), ("p", pet.happiness), ("s", pet.energy)),
+            key=lambda x: x[1],
+        )[0]
+
+    return decide
+
+
+def random_policy(seed) -> Policy:
+    rng = random.Random(f"{seed}/policy")
+    return lambda pet: rng.choice("fps")
+
+
+def oracle_policy(seed) -> Policy:
+    """The value-iteration optimum for these rules (see gotchi_oracle.py)."""
+    from gotchi_oracle import Oracle
+
+    return Oracle.solve().best
+
+
+def llm_policy(seed) -> Policy:
+    """
+    Chat-completion driver in the style of auto_gotchi.gpt_loop: the whole
+    screen goes in, a single letter comes out.  Configured from the same
+    OPENAI_* environment variables.
+    """
+    from openai import OpenAI  # type: ignore
+
+    client = OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=os.getenv("OPENAI_BASE_URL") or None,
+    )
+    model = os.getenv("OPENAI_MODEL", "o3")
+    temperature = float(os.getenv("OPENAI_TEMPERATURE", "1"))
+    conversation = [{"role": "system", "content": SYSTEM_PROMPT}]
+
+    def decide(pet: Gotchi) -> str:
+        conversation.append(
+            {"role": "user", "content": "\n".join(pet.generate_display_lines())}
+        )
+        resp = llm_cache().create(
+            client.chat.completions.create,
+            salt=seed,
+            model=model, messages=conversation, temperature=temperature, timeout=90,
+        )
+        text = (resp.choices[0].message.content or "").strip()
+        conversation.append({"role": "assistant", "content": text})
+        return (parse_action(text) or "").lower()
+
+    return decide
+
+
+POLICIES: dict[str, Callable[[object], Policy]] = {
+    "scripted": scripted_policy,
+    "random": random_policy,
+    "oracle": oracle_policy,
+    "llm": llm_policy,
+}
+
+
+def prepare_policy(name: str) -> None:
+    """
+    One-off setup a policy needs, run in the parent before any worker
+    starts so N workers don't each redo it: the oracle is solved here and
+    workers get it by fork or from its on-disk cache.
+    """
+    if name == "oracle":
+        from gotchi_oracle import Oracle
+
+        Oracle.solve()
+
+
+def load_policy(name: str) -> Callable[[object], Policy]:
+    if name in POLICIES:
+        return POLICIES[name]
+    module, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module), attr or "make_policy")
+
+# ───────────────────────────────────────────────────────────────────────────
+# 3.  ONE EPISODE (runs inside a worker)
+# ───────────────────────────────────────────────────────────────────────────
+def run_episode(
+    episode: int,
+    seed,
+    policy: str = "scripted",
+    minutes: int = EPISODE_MINUTES,
+    timeout: float | None = None,
+    trace_dir: str | None = None,
+) -> dict:
+    needs_phrases, random_events = content()
+    pet = Gotchi(needs_phrases, random_events, seed=seed)
+    turns = random.Random(f"{pet.seed}/turns")
+    decide = load_policy(policy)(seed)
+    rec = TraceRecorder(pet, config={"policy": policy, "minutes": minutes})
+
+    rows: list[dict[str, float | str]] = []
+    result = None
+    tic = time.monotonic()
+    while pet.current_time < minutes * 60:
+        if timeout is not None and time.monotonic() - tic > timeout:
+            result = "timeout"
+            break
+        cmd = decide(pet)
+        rows.append(decision_row(episode, pet, cmd))
+        if cmd == "q":
+            result = "quit"
+            break
+
+        status = rec.act(cmd)
+        status = status or rec.step(turns.randint(*TURN_GAP) * 60)
+        if status:
+            result = status
+            break
+
+    if trace_dir is not None:
+        rec.finish(result).save(Path(trace_dir) / f"episode_{episode}.trace.json")
+    return episode_record(episode, seed, policy, pet, result, rows,
+                          time.monotonic() - tic)
+
+
+def apply_command(pet: Gotchi, cmd: str) -> str | None:
+    """Apply one decision; it counts as player input, as it does in realtime()."""
+    pet.last_input_time = pet.current_time
+    action = {"f": pet.feed, "p": pet.play, "s": pet.sleep}.get(cmd)
+    return action() if action else None
+
+
+def decision_row(episode: int, pet: Gotchi, cmd: str) -> dict[str, float | str]:
+    return {
+        "episode":   episode,
+        "sim_time":  pet.current_time,
+        "command":   (cmd or "?").upper(),
+        "hunger":    round(pet.hunger, 3),
+        "happiness": round(pet.happiness, 3),
+        "energy":    round(pet.energy, 3),
+        "total":     round(pet.hunger + pet.happiness + pet.energy, 3),
+    }
+
+
+def episode_record(episode, seed, policy, pet, result, rows, wall_time) -> dict:
+    return {
+        "episode":    episode,
+        "seed":       seed,
+        "policy":     policy,
+        "result":     result or "survived",
+        "sim_time":   pet.current_time,
+        "decisions":  len(rows),
+        "hunger":     round(pet.hunger, 3),
+        "happiness":  round(pet.happiness, 3),
+        "energy":     round(pet.energy, 3),
+        "friendship": round(pet.friendship, 3),
+        "wall_time":  round(wall_time, 4),
+        "rows":       rows,
+    }
+
+# ───────────────────────────────────────────────────────────────────────────
+# 4.  THE FARM
+# ───────────────────────────────────────────────────────────────────────────
+def run_farm(
+    episodes: int,
+    policy: str = "scripted",
+    workers: int | None = None,
+    base_seed: int = 0,
+    minutes: int = EPISODE_MINUTES,
+    timeout: float | None = None,
+    executor: str = "auto",
+    trace_dir: str | None = None,
+) -> Iterator[dict]:
+    """
+    Yield episode results as they finish.  Episode i is seeded base_seed+i,
+    so the same arguments reproduce the same episodes in any order.
+    """
+    if executor == "auto":
+        executor = "thread" if policy == "llm" else "process"
+    prepare_policy(policy)
+    if executor == "thread":
+        workers = workers or 32
+        pool = ThreadPoolExecutor(max_workers=workers)
+    else:
+        workers = workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    # Keep a bounded number of episodes queued so huge farms don't build
+    # every future up front
+    window = 4 * workers
+    with pool:
+        pending = set()
+        next_ep = 0
+        while next_ep < episodes or pending:
+            while next_ep < episodes and len(pending) < window:
+                pending.add(
+                    pool.submit(
+                        run_episode, next_ep, base_seed + next_ep, policy, minutes,
+                        timeout, trace_dir,
+                    )
+                )
+                next_ep += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+
+# ───────────────────────────────────────────────────────────────────────────
+# 5.  ARTIFACTS
+# ───────────────────────────────────────────────────────────────────────────
+def write_artifacts(results: list[dict]) -> tuple[Path, Path, str | None]:
+    LOG_DIR.mkdir(exist_ok=True)
+    ts = int(time.time())
+    csv_path  = LOG_DIR / f"gotchi_stats_{ts}.csv"
+    json_path = LOG_DIR / f"summaries_{ts}.json"
+
+    results = sorted(results, key=lambda r: r["episode"])
+    rows = [row for r in results for row in r["rows"]]
+    if rows:
+        with csv_path.open("w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=rows[0].keys())
+            w.writeheader()
+            w.writerows(rows)
+
+    summaries = [
+        f"Episode {r['episode']} (seed {r['seed']}, {r['policy']}): {r['result']} "
+        f"after {r['sim_time'] // 60} min, {r['decisions']} decisions"
+        for r in results
+    ]
+    episodes = [{k: v for k, v in r.items() if k != "rows"} for r in results]
+    with json_path.open("w") as f:
+        json.dump(
+            {
+                "created": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+                "summaries": summaries,
+                "episodes": episodes,
+            },
+            f,
+            indent=2,
+        )
+
+    # the farm's own "llm" policy runs whatever OPENAI_MODEL names
+    model = os.getenv("OPENAI_MODEL", "o3") if results and results[0]["policy"] == "llm" else None
+    shard = results_store().write(results, label=f"run_{ts}", model=model)
+    return csv_path, json_path, shard
+
+# ───────────────────────────────────────────────────────────────────────────
+# 6.  MAIN
+# ───────────────────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run many Gotchi episodes in parallel.")
+    ap.add_argument("--episodes", type=int, default=100)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--policy", default="scripted",
+                    help="scripted | random | oracle | llm | module:factory")
+    ap.add_argument("--seed", type=int, default=0, help="seed of episode 0")
+    ap.add_argument("--minutes", type=int, default=EPISODE_MINUTES)
+    ap.add_argument("--timeout", type=float, default=None,
+                    help="wall-clock seconds per episode")
+    ap.add_argument("--executor", choices=("auto", "process", "thread"), default="auto")
+    ap.add_argument("--cache", choices=MODES, default=None,
+                    help="LLM response cache mode (default: $GOTCHI_LLM_CACHE or off)")
+    ap.add_argument("--traces", default=None, metavar="DIR",
+                    help="save a replayable trace of every episode here")
+    args = ap.parse_args()
+    if args.cache:
+        # read by llm_cache() here and in every worker process
+        os.environ["GOTCHI_LLM_CACHE"] = args.cache
+
+    results = []
+    tic = time.time()
+    for r in run_farm(args.episodes, args.policy, args.workers, args.seed,
+                      args.minutes, args.timeout, args.executor, args.traces):
+        results.append(r)
+        print(f"[{len(results)}/{args.episodes}] episode {r['episode']}: "
+              f"{r['result']} @ {r['sim_time'] // 60} min", file=sys.stderr)
+
+    csv_path, json_path, shard = write_artifacts(results)
+    elapsed = time.time() - tic
+    print(f"\n{len(results)} episodes in {elapsed:.1f}s "
+          f"({len(results) / max(elapsed, 1e-9):.1f}/s)", file=sys.stderr)
+    print(f" ➜ CSV log saved to  {csv_path}", file=sys.stderr)
+    print(f" ➜ Summaries saved to {json_path}", file=sys.stderr)
+    print(f" ➜ Results stored as {shard} in {results_store().root}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
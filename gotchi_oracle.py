@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+gotchi_oracle.py  –  optimal policy for the step-mode rules, by value iteration
+-------------------------------------------------------------------------------
+
+* The decision process the farm runs: act (feed / play / sleep), then the pet
+  is left alone for a turn gap drawn from TURN_GAP, then the next decision
+* State on a grid: mood, day/night, sick, and hunger / happiness / energy /
+  friendship at `levels` points over 0..10; values between grid points are
+  interpolated over the simplex around them (5 grid corners, not 16)
+* Transition and reward tensors built once from the feed / play / sleep /
+  step rules, then NumPy-vectorised value iteration over every state at once
+* The policy table and value function are cached in logs/oracle/, keyed by a
+  hash of the rule config, so each configuration is solved once
+
+Reward per decision: 1 for surviving the gap, plus `balance` times the lowest
+of hunger, happiness and energy (out of 10).  Regret of a decision is the
+oracle's value of the state minus the value of the action taken.
+
+How the rules are abstracted over a turn gap:
+    * needs decay `k` times, with k drawn from the gap and a uniform phase
+      of the needs timer; sickness (d=0.2) counts for the whole gap
+    * energy above 9 after the action makes the pet sick
+    * no input for `wander_after` steps sends the pet off; decay stops while
+      it's away, and it's counted as back (with the usual return roll) by
+      the next decision
+    * needs phrases are left out (they only ever help); random events are
+      realtime-only and mood never changes in step mode
+
+    python gotchi_oracle.py solve --levels 11
+    python gotchi_oracle.py regret logs/traces/*.trace.json
+    python gotchi_farm.py --policy oracle --episodes 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from gotchi import MOODS
+
+# ───────────────────────────────────────────────────────────────────────────
+# 1.  CONFIG
+# ───────────────────────────────────────────────────────────────────────────
+ROOT = Path(__file__).parent.resolve()
+CACHE_DIR = ROOT / "logs" / "oracle"
+
+ORACLE_VERSION = 1
+ACTIONS = ("f", "p", "s")
+STATS = ("hunger", "happiness", "energy", "friendship")
+
+DEFAULT_CONFIG = {
+    "version":       ORACLE_VERSION,
+    "levels":        11,        # grid points per stat over 0..10
+    "gamma":         0.95,      # discount per decision (~20-decision horizon)
+    "balance":       0.25,      # reward weight on the lowest stat
+    "turn_gap":      [3, 10],   # sim minutes between decisions (gotchi_farm.TURN_GAP)
+    "needs_interval": 120,      # steps between needs decays
+    "wander_after":  300,       # steps without input before the pet wanders off
+    "day_length":    360,       # sim minutes between day/night flips
+    "cure_chance":   0.45,      # feeding a sick pet
+    "return_boost":  1.5,       # lowest stat on a good return ...
+    "return_good":   0.8,       # ... which happens this often
+    "return_sick":   0.2,       # share of the other returns that make it sick
+    "tol":           1e-4,
+    "max_iter":      5000,
+}
+
+
+def make_config(**overrides) -> dict:
+    unknown = set(overrides) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"unknown oracle config keys: {sorted(unknown)}")
+    return {**DEFAULT_CONFIG, **overrides}
+
+
+def config_key(config: dict) -> str:
+    """Hash of everything that changes the solution (tol and max_iter don't)."""
+    rules = {k: v for k, v in config.items() if k not in ("tol", "max_iter")}
+    blob = json.dumps(rules, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def grid_shape(config: dict) -> tuple[int, ...]:
+    return (len(MOODS), 2, 2) + (config["levels"],) * len(STATS)
+
+# ───────────────────────────────────────────────────────────────────────────
+# 2.  MODEL
+# ───────────────────────────────────────────────────────────────────────────
+def gap_outcomes(config: dict) -> list[tuple[float, int, bool]]:
+    """(probability, needs decays, wandered off) over the turn gap."""
+    lo, hi = config["turn_gap"]
+    interval = config["needs_interval"]
+    gaps = range(lo, hi + 1)
+    probs: dict[tuple[int, bool], float] = {}
+    for minutes in gaps:
+        steps = minutes * 60
+        wandered = steps >= config["wander_after"]
+        # the wander check runs before the decay in the step it fires
+        active = config["wander_after"] - 1 if wandered else steps
+        k, frac = divmod(active / interval, 1)
+        for decays, p in ((int(k), 1 - frac), (int(k) + 1, frac)):
+            if p > 0:
+                key = (decays, wandered)
+                probs[key] = probs.get(key, 0.0) + p / len(gaps)
+    return [(p, k, w) for (k, w), p in sorted(probs.items())]
+
+
+def _strides(config):
+    shape = grid_shape(config)
+    return np.cumprod((1,) + shape[::-1][:-1])[::-1]
+
+
+def _locate(config, mood, day, sick, stats):
+    """
+    Grid corners and weights interpolating continuous stats: Freudenthal
+    (simplex) interpolation, so len(STATS) + 1 corners instead of 2**len(STATS).
+    """
+    levels = config["levels"]
+    step = 10.0 / (levels - 1)
+    strides = _strides(config)
+    base = (mood * strides[0] + day * strides[1] + sick * strides[2]).astype(np.int64)
+    frac = np.empty((len(STATS), mood.size))
+    for j, x in enumerate(stats):
+        pos = np.clip(x, 0.0, 10.0) / step
+        lower = np.minimum(np.floor(pos), levels - 2)
+        frac[j] = pos - lower
+        base = base + lower.astype(np.int64) * strides[3 + j]
+    # walk from the lower corner along the dimensions in order of how far
+    # the point is along each
+    order = np.argsort(-frac, axis=0)
+    f = np.take_along_axis(frac, order, axis=0)
+    idx = np.empty((len(STATS) + 1, mood.size), dtype=np.int64)
+    idx[0] = base
+    idx[1:] = base + np.cumsum(strides[3:][order], axis=0)
+    w = np.empty_like(idx, dtype=np.float64)
+    w[0] = 1 - f[0]
+    w[1:-1] = f[:-1] - f[1:]
+    w[-1] = f[-1]
+    return idx.astype(np.int32), w
+
+
+def _act(config, action, sick, hunger, happiness, energy, friendship):
+    """[(probability, sick, hunger, happiness, energy, friendship, died)]"""
+    friendship = np.minimum(10.0, friendship + 0.2)
+    if action == "f":
+        hunger = np.minimum(10.0, hunger + 1)
+        energy = np.maximum(0.0, energy - 0.25)
+        died = (hunger <= 0) | (energy <= 0)
+        cure = config["cure_chance"]
+        return [
+            (np.where(sick, 1 - cure, 1.0), sick, hunger, happiness, energy, friendship, died),
+            (np.where(sick, cure, 0.0), np.zeros_like(sick), hunger, happiness, energy,
+             friendship, died),
+        ]
+    if action == "p":
+        happiness = np.where(sick, happiness, np.minimum(10.0, happiness + 1))
+        energy = np.maximum(0.0, energy - 0.25)
+        died = (happiness <= 0) | (energy <= 0)
+    else:
+        energy = np.minimum(10.0, energy + 1)
+        hunger = np.maximum(0.0, hunger - 0.25)
+        died = (energy <= 0) | (hunger <= 0)
+    return [(1.0, sick, hunger, happiness, energy, friendship, died)]
+
+
+def _returns(config, sick, hunger, happiness, energy):
+    """[(probability, sick, hunger, happiness, energy)] for a pet coming back."""
+    boost = config["return_boost"]
+    low = np.argmin(np.stack([hunger, happiness, energy]), axis=0)
+    good = config["return_good"]
+    bad_sick = (1 - good) * config["return_sick"]
+    return [
+        (good, sick,
+         np.where(low == 0, np.minimum(10.0, hunger + boost), hunger),
+         np.where((low == 1) & ~sick, np.minimum(10.0, happiness + boost), happiness),
+         np.where(low == 2, np.minimum(10.0, energy + boost), energy)),
+        (1 - good - bad_sick, sick, hunger, happiness, energy),
+        (bad_sick, np.ones_like(sick), hunger, happiness, energy),
+    ]
+
+
+def build_model(config: dict) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    For each action over every grid state at once: (idx, w, reward), where
+    the expected next value is (w * V[idx]).sum(axis=0) (w is zero where a
+    branch ends the pet) and reward the expected reward.
+    """
+    shape = grid_shape(config)
+    step = 10.0 / (config["levels"] - 1)
+    idx = np.indices(shape).reshape(len(shape), -1)
+    mood, day, sick = idx[0], idx[1].astype(bool), idx[2].astype(bool)
+    stats = [i * step for i in idx[3:]]
+    sad = mood == MOODS.index("sad")
+    excited = mood == MOODS.index("excited")
+    gaps = gap_outcomes(config)
+
+    model = []
+    for action in ACTIONS:
+        corners, weights = [], []
+        reward = np.zeros(mood.size)
+        for p_act, s, h, hp, e, f, died in _act(config, action, sick, *stats):
+            s = s | (e > 9)                 # overfed/overslept: sick within the gap
+            d = np.where(s, 0.2, 0.5)
+            for p_gap, k, wandered in gaps:
+                h2 = h - k * np.where(day, d * 1.2, d)
+                hp2 = hp - k * (np.where(sad, 0.2, 0.0) + np.where(s, 0.0, d))
+                e2 = e - k * np.where(excited, d * 1.5, np.where(day, d, d * 1.2))
+                f2 = f - k * 0.1
+                alive = ~died & (np.minimum(np.minimum(h2, hp2), e2) > 1e-9) & (f2 > 1e-9)
+                rets = (_returns(config, s, h2, hp2, e2) if wandered
+                        else [(1.0, s, h2, hp2, e2)])
+                for p_ret, s3, h3, hp3, e3 in rets:
+                    coef = p_act * p_gap * p_ret * alive
+                    if not np.any(coef):
+                        continue
+                    low = np.minimum(np.minimum(h3, hp3), e3)
+                    reward += coef * (1 + config["balance"] * np.clip(low, 0, 10) / 10)
+                    c, w = _locate(config, mood, day, s3,
+                                   (h3, hp3, e3, np.minimum(10.0, f2)))
+                    corners.append(c)
+                    weights.append((w * coef).astype(np.float32))
+        idx, w = _coalesce(np.concatenate(corners), np.concatenate(weights))
+        model.append((idx, w, reward.astype(np.float32)))
+    return model
+
+
+def _coalesce(idx, w):
+    """Merge the branches' shared corners, so each state gathers each corner once."""
+    order = np.argsort(idx, axis=0, kind="stable")
+    idx = np.take_along_axis(idx, order, axis=0)
+    w = np.take_along_axis(w, order, axis=0)
+    group = np.cumsum(np.vstack([np.zeros((1, idx.shape[1]), bool),
+                                 idx[1:] != idx[:-1]]), axis=0)
+    n = int(group.max()) + 1
+    col = np.broadcast_to(np.arange(idx.shape[1]), idx.shape)
+    out_idx = np.zeros((n, idx.shape[1]), dtype=idx.dtype)
+    out_idx[group, col] = idx
+    out_w = np.bincount((group * idx.shape[1] + col).ravel(), weights=w.ravel(),
+                        minlength=n * idx.shape[1])
+    return out_idx, out_w.reshape(n, -1).astype(np.float32)
+
+# ───────────────────────────────────────────────────────────────────────────
+# 3.  VALUE ITERATION
+# ───────────────────────────────────────────────────────────────────────────
+def value_iteration(config: dict, verbose: bool = False):
+    """(V, Q, iterations): state values and action values over the grid."""
+    shape = grid_shape(config)
+    model = build_model(config)
+    lo, hi = config["turn_gap"]
+    flip = (lo + hi) / 2 / config["day_length"]     # chance day/night flips in a gap
+    gamma = config["gamma"]
+
+    V = np.zeros(int(np.prod(shape)), dtype=np.float32)
+    Q = np.zeros((len(ACTIONS), V.size), dtype=np.float32)
+    tic = time.perf_counter()
+    for it in range(1, config["max_iter"] + 1):
+        grid = V.reshape(shape)
+        mixed = ((1 - flip) * grid + flip * grid[:, ::-1]).ravel()
+        for a, (idx, w, reward) in enumerate(model):
+            Q[a] = reward + gamma * np.einsum("ij,ij->j", w, mixed[idx])
+        new = Q.max(axis=0)
+        delta = float(np.abs(new - V).max())
+        V = new
+        if verbose and it % 50 == 0:
+            print(f"  iteration {it}: delta {delta:.2e} "
+                  f"({time.perf_counter() - tic:.1f}s)", file=sys.stderr)
+        if delta < config["tol"]:
+            break
+    return V, Q, it
+
+# ───────────────────────────────────────────────────────────────────────────
+# 4.  THE ORACLE
+# ───────────────────────────────────────────────────────────────────────────
+_solved: dict[str, "Oracle"] = {}   # config key -> Oracle, per process
+
+
+class Oracle:
+    def __init__(self, config: dict, V, Q, iterations: int = 0):
+        self.config = config
+        self.V = V
+        self.Q = Q
+        self.iterations = iterations
+
+    @classmethod
+    def solve(cls, config: dict | None = None, cache_dir=CACHE_DIR,
+              verbose: bool = False) -> "Oracle":
+        """The solution for config, from the cache if it's been solved before."""
+        config = config or make_config()
+        key = config_key(config)
+        if key in _solved:
+            return _solved[key]
+        path = Path(cache_dir) / f"{key[:16]}.npz" if cache_dir else None
+        if path is not None and path.exists():
+            with np.load(path) as data:
+                oracle = cls(json.loads(str(data["config"])), data["V"], data["Q"],
+                             int(data["iterations"]))
+            _solved[key] = oracle
+            return oracle
+        V, Q, iterations = value_iteration(config, verbose)
+        oracle = _solved[key] = cls(config, V, Q, iterations)
+        if path is not None:
+            # write-then-rename through a file of our own, so concurrent
+            # solvers never see (or replace) each other's half-written cache
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.stem}.",
+                                             suffix=".tmp.npz", delete=False) as tmp:
+                np.savez(tmp, V=V, Q=Q, iterations=iterations,
+                         config=json.dumps(config, sort_keys=True))
+            os.replace(tmp.name, path)
+        return oracle
+
+    @property
+    def policy(self) -> np.ndarray:
+        """Best action per grid state, as indices into ACTIONS (grid-shaped)."""
+        return self.Q.argmax(axis=0).reshape(grid_shape(self.config))
+
+    def _locate(self, pet):
+        one = lambda x: np.array([x])
+        return _locate(
+            self.config, one(MOODS.index(pet.mood)), one(int(pet.day_time)),
+            one(int(pet.pet_sick)),
+            tuple(one(float(getattr(pet, s))) for s in STATS),
+        )
+
+    def q_values(self, pet) -> dict[str, float]:
+        idx, w = self._locate(pet)
+        return {a: float((w * self.Q[i][idx]).sum()) for i, a in enumerate(ACTIONS)}
+
+    def value(self, pet) -> float:
+        return max(self.q_values(pet).values())
+
+    def best(self, pet) -> str:
+        q = self.q_values(pet)
+        return max(q, key=q.get)
+
+    def regret(self, pet, cmd: str) -> float | None:
+        """Value lost by taking cmd here: 0 for the best action, all of it
+        for quitting, None for anything that isn't a decision (no reply)."""
+        q = self.q_values(pet)
+        cmd = (cmd or "").lower()
+        if cmd == "q":
+            return max(q.values())
+        if cmd not in q:
+            return None
+        return max(q.values()) - q[cmd]
+
+
+def trace_regret(oracle: Oracle, trace) -> list[dict]:
+    """Per-decision regret of a recorded episode (see gotchi_trace.py)."""
+    from gotchi_trace import Replayer
+
+    replay = Replayer(trace)
+    rows = []
+    for t, cmd in trace.actions:
+        pet = replay.seek(t)
+        q = oracle.q_values(pet)
+        rows.append({"sim_time": t, "command": cmd.upper(),
+                     "best": oracle.best(pet).upper(),
+                     "regret": round(max(q.values()) - q[cmd], 4)})
+    return rows
+
+# ───────────────────────────────────────────────────────────────────────────
+# 5.  MAIN
+# ───────────────────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Solve and query the Gotchi oracle policy.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("solve", "regret"):
+        p = sub.add_parser(name)
+        p.add_argument("--levels", type=int, default=DEFAULT_CONFIG["levels"])
+        p.add_argument("--gamma", type=float, default=DEFAULT_CONFIG["gamma"])
+        p.add_argument("--balance", type=float, default=DEFAULT_CONFIG["balance"])
+    sub.choices["regret"].add_argument("traces", nargs="+")
+    args = ap.parse_args()
+
+    config = make_config(levels=args.levels, gamma=args.gamma, balance=args.balance)
+    tic = time.perf_counter()
+    oracle = Oracle.solve(config, verbose=True)
+    print(f"Oracle {config_key(config)[:16]}: {oracle.V.size} states, "
+          f"{oracle.iterations} iterations, ready in {time.perf_counter() - tic:.1f}s",
+          file=sys.stderr)
+
+    if args.cmd == "solve":
+        mix = np.bincount(oracle.Q.argmax(axis=0), minlength=len(ACTIONS)) / oracle.V.size
+        print(json.dumps({
+            "key": config_key(config)[:16],
+            "states": int(oracle.V.size),
+            "iterations": oracle.iterations,
+            "policy_mix": {a.upper(): round(float(m), 3) for a, m in zip(ACTIONS, mix)},
+        }, indent=2))
+        return
+
+    from gotchi_trace import Trace
+
+    total = []
+    for path in args.traces:
+        rows = trace_regret(oracle, Trace.load(path))
+        regrets = [r["regret"] for r in rows]
+        total += regrets
+        agree = sum(r["command"] == r["best"] for r in rows)
+        print(f"{path}: {len(rows)} decisions, mean regret "
+              f"{np.mean(regrets) if rows else 0:.3f}, "
+              f"{agree}/{len(rows)} match the oracle")
+    if total:
+        print(f"\nall: {len(total)} decisions, mean regret {np.mean(total):.3f}")
+
+
+if __name__ == "__main__":
+    main()
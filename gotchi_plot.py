@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+gotchi_plot.py  –  downsampled, incremental plots of Gotchi runs
+----------------------------------------------------------------
+
+* Trajectories are downsampled before they reach matplotlib: LTTB (keeps
+  the visual shape) or min/max bucketing (keeps every spike), so a plot
+  costs the same for a 60-turn trial and a 1M-point batch
+* Action markers are one scatter call per action type, thinned to a
+  readable number of markers
+* LivePlot keeps a figure up to date as telemetry streams in, reading only
+  the bytes appended since the last poll
+
+    python gotchi_plot.py logs/telemetry_1722400000 -o run.png
+    python gotchi_plot.py logs/telemetry_1722400000 --live
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+try:
+    import matplotlib.pyplot as plt  # type: ignore
+except ImportError:
+    plt = None
+
+POINTS = 2000          # points per line after downsampling
+MAX_MARKERS = 400      # markers per action type
+
+ACTION_STYLES = {      # command -> (marker, colour, label)
+    "F": ("^", "red", "Feed"),
+    "P": ("o", "green", "Play"),
+    "S": ("s", "blue", "Sleep"),
+    "Q": ("D", "black", "Quit"),
+}
+
+# ───────────────────────────────────────────────────────────────────────────
+# 1.  DOWNSAMPLING
+# ───────────────────────────────────────────────────────────────────────────
+def lttb(x: np.ndarray, y: np.ndarray, n: int = POINTS) -> np.ndarray:
+    """
+    Indices of n points chosen by Largest-Triangle-Three-Buckets: in each
+    bucket, the point forming the largest triangle with the point kept from
+    the previous bucket and the mean of the next one.
+    """
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # n - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    # mean of every bucket, for the "next bucket" vertex
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:size - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:size - 1], edges[:-1] - 1) / counts
+    mean_x = np.append(mean_x, x[-1])
+    mean_y = np.append(mean_y, y[-1])
+
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs(
+            (x[a] - mean_x[i + 1]) * (by - y[a])
+            - (x[a] - bx) * (mean_y[i + 1] - y[a])
+        )
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax(x: np.ndarray, y: np.ndarray, n: int = POINTS) -> np.ndarray:
+    """
+    Indices of the minimum and maximum of y in each of n // 2 buckets, in
+    order, so no peak or trough is lost.
+    """
+    size = len(x)
+    if n >= size or n < 2:
+        return np.arange(size)
+    y = np.asarray(y)
+    buckets = n // 2
+    edges = np.linspace(0, size, buckets + 1).astype(np.int64)
+    counts = np.diff(edges)
+    bucket = np.repeat(np.arange(buckets), counts)
+    # argmin / argmax per bucket without a Python loop: the first index in
+    # each bucket where y equals the bucket's extreme
+    picks = [np.array([0, size - 1])]
+    for reduce in (np.minimum, np.maximum):
+        hits = np.flatnonzero(y == np.repeat(reduce.reduceat(y, edges[:-1]), counts))
+        first = np.flatnonzero(np.diff(bucket[hits], prepend=-1))
+        picks.append(hits[first])
+    return np.unique(np.concatenate(picks))
+
+
+METHODS = {"lttb": lttb, "minmax": minmax}
+
+
+def downsample(x, y, n: int = POINTS, method: str = "lttb") -> tuple[np.ndarray, np.ndarray]:
+    x = np.asarray(x)
+    y = np.asarray(y)
+    idx = METHODS[method](x, y, n)
+    return x[idx], y[idx]
+
+
+def thin(idx: np.ndarray, n: int = MAX_MARKERS) -> np.ndarray:
+    """At most n of idx, evenly spaced."""
+    if len(idx) <= n:
+        return idx
+    return idx[np.linspace(0, len(idx) - 1, n).astype(np.int64)]
+
+# ───────────────────────────────────────────────────────────────────────────
+# 2.  DRAWING
+# ───────────────────────────────────────────────────────────────────────────
+def plot_series(ax, x, y, n: int = POINTS, method: str = "lttb", **style):
+    """ax.plot of a downsampled trajectory; returns the Line2D."""
+    xs, ys = downsample(x, y, n, method)
+    (line,) = ax.plot(xs, ys, **style)
+    return line
+
+
+def plot_actions(ax, x, commands, y=-0.3, styles=ACTION_STYLES,
+                 max_markers: int = MAX_MARKERS, **kw) -> dict:
+    """
+    One scatter per action type at height y (a number or one value per
+    action); label them with action_legend.  Returns {command: PathCollection}.
+    """
+    x = np.asarray(x)
+    commands = np.char.upper(np.asarray(commands, dtype=str))
+    y = np.broadcast_to(np.asarray(y, dtype=np.float64), x.shape)
+    artists = {}
+    for cmd, (marker, colour, _) in styles.items():
+        idx = thin(np.flatnonzero(commands == cmd), max_markers)
+        artists[cmd] = ax.scatter(x[idx], y[idx], marker=marker, color=colour,
+                                  zorder=5, **kw)
+    return artists
+
+
+def action_legend(ax, styles=ACTION_STYLES, **kw):
+    from matplotlib.lines import Line2D  # type: ignore
+
+    handles = [
+        Line2D([0], [0], marker=m, color="w", markerfacecolor=c,
+               markersize=10, label=f"{cmd}: {label}")
+        for cmd, (m, c, label) in styles.items()
+    ]
+    return ax.legend(handles=handles, **kw)
+
+
+def draw_totals(path: Path, totals, n: int = POINTS) -> None:
+    """The harness graph: total stat value per turn, saved as a PNG."""
+    if len(totals) == 0:
+        return
+    if plt is None:
+        raise ImportError("matplotlib is required for plotting")
+    totals = np.asarray(totals, dtype=np.float64)
+    turns = np.arange(len(totals))
+    plt.style.use("dark_background")
+    plt.rcParams["font.family"] = "monospace"
+    fig, ax = plt.subplots(figsize=(10, 5), facecolor="black")
+    ax.set_facecolor("black")
+    # per-point markers only while they can still be told apart
+    markers = {"marker": "o", "markersize": 4} if len(totals) <= 200 else {}
+    plot_series(ax, turns, totals, n, color="orange", linewidth=2,
+                markerfacecolor="orange", markeredgecolor="orange", **markers)
+    ax.set_title("Hunger + Happiness + Energy over Time", pad=12)
+    ax.set_xlabel("Turn (#)")
+    ax.set_ylabel("Total Stat Value")
+    ax.grid(color="gray", linestyle="--", linewidth=0.4, alpha=0.4)
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+    plt.close(fig)
+
+# ───────────────────────────────────────────────────────────────────────────
+# 3.  LIVE PLOTS
+# ───────────────────────────────────────────────────────────────────────────
+class Tail:
+    """Records appended to a telemetry prefix's JSONL files since the last read."""
+
+    def __init__(self, prefix: str | Path, kind: str | None = "action"):
+        self.prefix = Path(prefix)
+        self.kind = kind
+        self.offsets: dict[Path, int] = {}
+
+    def read(self) -> list[dict]:
+        records = []
+        for path in sorted(self.prefix.parent.glob(f"{self.prefix.name}.*.jsonl")):
+            with path.open("rb") as f:
+                f.seek(self.offsets.get(path, 0))
+                data = f.read()
+            # only whole lines; a line still being written is read next time
+            end = data.rfind(b"\n") + 1
+            self.offsets[path] = self.offsets.get(path, 0) + end
+            for line in data[:end].splitlines():
+                try:
+                    r = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if self.kind in (None, r.get("kind")):
+                    records.append(r)
+        return records
+
+
+class LivePlot:
+    """
+    Stat lines and action markers that grow as records arrive.  The full
+    history stays in numpy buffers; each redraw downsamples it again, so a
+    redraw costs the same however long the run has been going.
+
+        live = LivePlot()
+        live.extend(records)      # dicts with sim_time, command and stats
+        live.redraw()
+    """
+
+    STATS = {"hunger": "r", "happiness": "g", "energy": "b"}
+
+    def __init__(self, ax=None, n: int = POINTS, method: str = "lttb"):
+        if ax is None:
+            _, ax = plt.subplots(figsize=(12, 6))
+        self.ax = ax
+        self.n = n
+        self.method = method
+        self.size = 0
+        self.time = np.empty(1024)
+        self.stats = {k: np.empty(1024) for k in self.STATS}
+        self.commands = np.empty(1024, dtype="<U1")
+        self.lines = {
+            k: ax.plot([], [], f"{c}-", label=k.capitalize(), linewidth=2)[0]
+            for k, c in self.STATS.items()
+        }
+        self.markers = plot_actions(ax, [], [])
+        ax.set_xlabel("Time (minutes)")
+        ax.set_ylabel("Stats Value")
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc="upper left")
+
+    def _grow(self, need: int) -> None:
+        cap = len(self.time)
+        if need <= cap:
+            return
+        cap = max(need, 2 * cap)
+        self.time = np.resize(self.time, cap)
+        self.commands = np.resize(self.commands, cap)
+        self.stats = {k: np.resize(v, cap) for k, v in self.stats.items()}
+
+    def extend(self, records: Iterable[dict]) -> int:
+        records = list(records)
+        if not records:
+            return 0
+        lo, hi = self.size, self.size + len(records)
+        self._grow(hi)
+        self.time[lo:hi] = [r["sim_time"] / 60 for r in records]
+        self.commands[lo:hi] = [str(r.get("command", "?"))[:1].upper() for r in records]
+        for k, buf in self.stats.items():
+            buf[lo:hi] = [r[k] for r in records]
+        self.size = hi
+        return len(records)
+
+    def redraw(self) -> None:
+        t = self.time[:self.size]
+        for k, line in self.lines.items():
+            line.set_data(*downsample(t, self.stats[k][:self.size], self.n, self.method))
+        commands = self.commands[:self.size]
+        for cmd, artist in self.markers.items():
+            idx = thin(np.flatnonzero(commands == cmd))
+            artist.set_offsets(np.column_stack((t[idx], np.full(len(idx), -0.3))))
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.set_ylim(bottom=-1)       # room for the action markers
+        self.ax.figure.canvas.draw_idle()
+
+    def follow(self, tail: Tail, interval: float = 1.0, until=None) -> None:
+        """Poll tail and redraw whenever something new came in."""
+        plt.ion()
+        plt.show(block=False)
+        while until is None or not until():
+            if self.extend(tail.read()):
+                self.redraw()
+            plt.pause(interval)
+
+# ───────────────────────────────────────────────────────────────────────────
+# 4.  CLI
+# ───────────────────────────────────────────────────────────────────────────
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Plot a Gotchi telemetry log.")
+    ap.add_argument("prefix", help="path prefix, e.g. logs/telemetry_1722400000")
+    ap.add_argument("-o", "--output", default=None, help="save a PNG instead of showing")
+    ap.add_argument("--live", action="store_true", help="keep updating as the run goes on")
+    ap.add_argument("--points", type=int, default=POINTS)
+    ap.add_argument("--method", choices=tuple(METHODS), default="lttb")
+    args = ap.parse_args()
+    if plt is None:
+        sys.exit("matplotlib is required for plotting")
+
+    tail = Tail(args.prefix)
+    live = LivePlot(n=args.points, method=args.method)
+    live.ax.set_title(f"Gotchi run: {Path(args.prefix).name}")
+    if args.live:
+        try:
+            live.follow(tail)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    tic = time.perf_counter()
+    live.extend(tail.read())
+    live.redraw()
+    if args.output:
+        live.ax.figure.savefig(args.output, dpi=150)
+        print(f" ➜ {live.size} points plotted to {args.output} "
+              f"in {time.perf_counter() - tic:.2f}s", file=sys.stderr)
+    else:
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
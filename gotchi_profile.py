@@ -0,0 +1,339 @@
+"""
+Opt-in profiling for Gotchi runs: per-phase timers and counters.
+
+enable() swaps timed wrappers in for Gotchi's phase methods at class level
+(and onto the input queue); disable() puts the originals back.  While it's
+off nothing is wrapped, so the hot path is exactly the uninstrumented code.
+
+Timers (seconds):
+    tick          one simulated step (_tick)
+    plan          scheduling the next step that can change anything (_plan)
+    fast_forward  whole fast-forward calls
+    wall_clock    clock text, day/night, weather and mood (update_wall_clock)
+    redraw        the redraw check, including rendering when it repaints
+    render        generate_display_lines
+    display       partial_update_display's terminal writes
+    action        feed / play / sleep
+    wait          realtime() idle, waiting for the next timer or input
+    input_latency enqueue on user_input_queue -> the next redraw after it
+    llm_latency   chat-completion calls (reported by the harness, observe())
+
+Counters: steps, fast_forward_steps, redraws, lines_rewritten, inputs, and
+what the steps did: wanders, returns, needs_decays, random_events, phrases,
+sick.
+
+    prof = gotchi_profile.enable()
+    prof.autodump("logs/profile.prom", interval=60)   # or .json
+    pet.realtime()
+    prof.dump("logs/profile.json")
+    gotchi_profile.disable()
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+import gotchi
+from gotchi import Gotchi, RealClock, ScaledClock, VirtualClock
+
+# Histogram bucket upper bounds, in seconds (1 us .. 10 s)
+BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1, 2.5, 5)) + (10.0,)
+
+_active = None
+
+
+class Timer:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)   # last one is +Inf
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Profiler:
+    def __init__(self):
+        self.counters = Counter()
+        self.timers = {}
+        self.started = time.time()
+        self.pending_input = None   # enqueue time of input not yet shown
+        self._lock = threading.Lock()
+        self._dumper = None
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = Timer()
+            timer.add(seconds)
+
+    def timed(self, name):
+        """Context manager timing its block into `name`."""
+        return _Timed(self, name)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+            self.started = time.time()
+
+    # ── export ────────────────────────────────────────────────────────────
+    def snapshot(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "elapsed": time.time() - self.started,
+                "counters": dict(self.counters),
+                "timers": {
+                    name: {
+                        "count": t.count,
+                        "total_s": t.total,
+                        "mean_us": t.total / t.count * 1e6 if t.count else 0.0,
+                        "p50_us": t.quantile(0.5) * 1e6,
+                        "p95_us": t.quantile(0.95) * 1e6,
+                        "max_us": t.max * 1e6,
+                    }
+                    for name, t in self.timers.items()
+                },
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="gotchi_"):
+        """Prometheus text exposition: counters, and one histogram per timer."""
+        out = []
+        with self._lock:
+            for name, n in sorted(self.counters.items()):
+                out += [f"# TYPE {prefix}{name}_total counter", f"{prefix}{name}_total {n}"]
+            for name, t in sorted(self.timers.items()):
+                metric = f"{prefix}{name}_seconds"
+                out.append(f"# TYPE {metric} histogram")
+                seen = 0
+                for bound, n in zip(BUCKETS, t.buckets):
+                    seen += n
+                    out.append(f'{metric}_bucket{{le="{bound:g}"}} {seen}')
+                out.append(f'{metric}_bucket{{le="+Inf"}} {t.count}')
+                out += [f"{metric}_sum {t.total:.9f}", f"{metric}_count {t.count}"]
+        return "\n".join(out) + "\n"
+
+    def dump(self, path):
+        """Write a snapshot to path: Prometheus text for .prom/.txt, else JSON."""
+        path = str(path)
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)   # readers never see a half-written file
+
+    def autodump(self, path, interval=60.0):
+        """dump(path) every interval seconds on a daemon thread."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.dump(path)
+        self._dumper = threading.Thread(target=loop, name="profile-dump", daemon=True)
+        self._dumper.start()
+
+
+class _Timed:
+    __slots__ = ("profiler", "name", "tic")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.tic = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.observe(self.name, time.perf_counter() - self.tic)
+
+# ───────────────────────────────────────────────────────────────────────────
+# Wrappers
+# ───────────────────────────────────────────────────────────────────────────
+_patched = []   # (owner, attribute, original) to put back on disable()
+
+
+def _patch(owner, name, make):
+    original = owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)
+    _patched.append((owner, name, original))
+    setattr(owner, name, make(original))
+
+
+def _timed(prof, timer):
+    def make(fn):
+        def wrapper(*args, **kwargs):
+            tic = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                prof.observe(timer, time.perf_counter() - tic)
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return make
+
+
+def _tick(prof):
+    def make(fn):
+        def tick(self, *args, **kwargs):
+            away, sick, phrase = self.pet_away, self.pet_sick, self.active_phrase_data
+            needs, event = self.last_needs_update, self.trigger_random_event
+            tic = time.perf_counter()
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                prof.observe("tick", time.perf_counter() - tic)
+                prof.count("steps")
+                if self.pet_away != away:
+                    prof.count("wanders" if self.pet_away else "returns")
+                if self.pet_sick and not sick:
+                    prof.count("sick")
+                if self.active_phrase_data and not phrase:
+                    prof.count("phrases")
+                if self.last_needs_update != needs:
+                    prof.count("needs_decays")
+                if event and not self.trigger_random_event:
+                    prof.count("random_events")
+        return tick
+    return make
+
+
+def _fast_forward(prof):
+    def make(fn):
+        def fast_forward(self, n, *args, **kwargs):
+            prof.count("fast_forward_steps", n)
+            tic = time.perf_counter()
+            try:
+                return fn(self, n, *args, **kwargs)
+            finally:
+                prof.observe("fast_forward", time.perf_counter() - tic)
+        return fast_forward
+    return make
+
+
+def _redraw(prof):
+    def make(fn):
+        def redraw(self):
+            tic = time.perf_counter()
+            fn(self)
+            toc = time.perf_counter()
+            prof.observe("redraw", toc - tic)
+            if prof.pending_input is not None:
+                prof.observe("input_latency", toc - prof.pending_input)
+                prof.pending_input = None
+        return redraw
+    return make
+
+
+def _display(prof):
+    def make(fn):
+        def partial_update_display(new_lines, old_lines):
+            changed = sum(
+                1 for i in range(max(len(new_lines), len(old_lines)))
+                if (new_lines[i] if i < len(new_lines) else "")
+                != (old_lines[i] if i < len(old_lines) else "")
+            )
+            prof.count("redraws")
+            prof.count("lines_rewritten", changed)
+            tic = time.perf_counter()
+            fn(new_lines, old_lines)
+            prof.observe("display", time.perf_counter() - tic)
+        return partial_update_display
+    return make
+
+
+def _input_queue(prof, q):
+    enqueued = deque()
+
+    def make_put(put):
+        def timed_put(item, *args, **kwargs):
+            enqueued.append(time.perf_counter())
+            return put(item, *args, **kwargs)
+        return timed_put
+
+    def make_get(get):
+        def timed_get(*args, **kwargs):
+            item = get(*args, **kwargs)   # raises queue.Empty as before
+            prof.count("inputs")
+            if enqueued:
+                prof.pending_input = enqueued.popleft()
+            return item
+        return timed_get
+
+    _patch(q, "put", make_put)
+    _patch(q, "get", make_get)
+
+
+def enable(profiler=None):
+    """Start profiling every Gotchi in this process; returns the Profiler."""
+    global _active
+    if _active is not None:
+        return _active
+    prof = _active = profiler or Profiler()
+    _patch(Gotchi, "_tick", _tick(prof))
+    _patch(Gotchi, "fast_forward", _fast_forward(prof))
+    _patch(Gotchi, "redraw", _redraw(prof))
+    _patch(gotchi, "partial_update_display", _display(prof))
+    for name, timer in (
+        ("_plan", "plan"),
+        ("update_wall_clock", "wall_clock"),
+        ("generate_display_lines", "render"),
+        ("feed", "action"),
+        ("play", "action"),
+        ("sleep", "action"),
+    ):
+        _patch(Gotchi, name, _timed(prof, timer))
+    for clock in (RealClock, ScaledClock, VirtualClock):
+        _patch(clock, "wait", _timed(prof, "wait"))
+    _input_queue(prof, gotchi.user_input_queue)
+    return prof
+
+
+def disable():
+    """Put the original methods back; returns the Profiler that was active."""
+    global _active
+    while _patched:
+        owner, name, original = _patched.pop()
+        if isinstance(owner, type) or owner is gotchi:
+            setattr(owner, name, original)
+        else:
+            delattr(owner, name)   # instance override; the class method shows again
+    prof, _active = _active, None
+    return prof
+
+
+def active():
+    return _active
+
+
+def observe(name, seconds):
+    """Record a timing from outside gotchi (e.g. LLM latency); no-op when off."""
+    if _active is not None:
+        _active.observe(name, seconds)
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+gotchi_server.py  –  host thousands of live pets in one process
+---------------------------------------------------------------
+
+* Every pet runs in real time (as with realtime()) but without a thread:
+  a heap keyed on each pet's next due time (RealtimeSession.wake()) wakes
+  only the pets that have something to do
+* A request first catches its pet up to the current clock time, so
+  answers never wait on the scheduler; a big wave of due pets (every pet
+  has a timer on the minute) is run in slices so requests interleave
+* Pets nobody has asked about for --idle seconds are written to disk and
+  dropped from memory; the next request loads them and catches them up
+* Protocol: one JSON object per line over TCP, one JSON reply per line
+
+    {"op": "create",  "pet": "alice", "seed": 7}
+    {"op": "command", "pet": "alice", "cmd": "f"}       # f / p / s / any text
+    {"op": "observe", "pet": "alice", "screen": true}
+    {"op": "drop",    "pet": "alice"}
+    {"op": "info"}
+    -> {"ok": true, "obs": {...}, "screen": [...]}  or  {"ok": false, "error": "..."}
+
+    python gotchi_server.py --port 8765
+    python gotchi_server.py --load 10000 --clients 32 --seconds 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+
+from gotchi import Gotchi, RealClock, RealtimeSession, ScaledClock, root_seed
+from gotchi_farm import LOG_DIR, content
+
+PETS_DIR = LOG_DIR / "pets"
+
+IDLE_SECONDS = 600     # wall seconds without a request before a pet is saved and dropped
+IDLE_CHECK = 5.0       # wall seconds between idle sweeps
+SLICE = 256            # due pets run between yields to the request handlers
+SAVE_SLICE = 32        # idle pets packed between yields (their writes go to a thread)
+MAX_SLEEP = 1.0        # longest scheduler sleep, in wall seconds
+
+PET_ID = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+
+# Saved pet: magic, version, start_time, next_minute, seed length, status
+# length; then the seed as JSON (so an int seed comes back an int) and the
+# status as UTF-8, then Gotchi.snapshot(rngs=True). Version 1 kept the seed
+# as str(seed).
+HOST_MAGIC = b"GH"
+HOST_VERSION = 2
+HOST_HEADER = struct.Struct("<2sBddHH")
+
+# ───────────────────────────────────────────────────────────────────────────
+# 1.  HOST
+# ───────────────────────────────────────────────────────────────────────────
+class Hosted:
+    """One pet on the host: its realtime timers plus scheduling bookkeeping."""
+    __slots__ = ("id", "session", "due", "touched")
+
+    def __init__(self, pet_id: str, session: RealtimeSession):
+        self.id = pet_id
+        self.session = session
+        self.due: float | None = None   # clock time of its live heap entry
+        self.touched = time.monotonic()
+
+    @property
+    def pet(self) -> Gotchi:
+        return self.session.pet
+
+
+class PetHost:
+    def __init__(self, clock=None, root: str | Path = PETS_DIR,
+                 idle: float = IDLE_SECONDS):
+        self.clock = clock or RealClock()
+        self.root = Path(root)
+        self.idle = idle
+        self.pets: dict[str, Hosted] = {}
+        self.heap: list[tuple[float, int, str]] = []   # (due, seq, pet id)
+        self._seq = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        self._scheduler: asyncio.Task | None = None
+        self._sleep_until = float("inf")
+        self._writing: set[str] = set()       # pet ids with a save in flight
+        self._drop_after: set[str] = set()    # ... dropped while it was
+        self.catch_ups = 0
+
+    # ── pets ──────────────────────────────────────────────────────────────
+    def _path(self, pet_id: str) -> Path:
+        return self.root / f"{pet_id}.pet"
+
+    def create(self, pet_id: str, seed=None) -> Hosted:
+        if not PET_ID.fullmatch(pet_id or ""):
+            raise ValueError(f"bad pet id {pet_id!r}")
+        if pet_id in self.pets or self._path(pet_id).exists():
+            raise ValueError(f"pet {pet_id!r} already exists")
+        needs_phrases, random_events = content()
+        pet = Gotchi(needs_phrases, random_events, seed=root_seed(seed), clock=self.clock)
+        h = self.pets[pet_id] = Hosted(pet_id, RealtimeSession(pet, self.clock.time()))
+        self._catch_up(h, self.clock.time())
+        return h
+
+    def get(self, pet_id: str) -> Hosted:
+        """The pet, loaded from disk if it was dropped while idle."""
+        h = self.pets.get(pet_id)
+        if h is None:
+            if not PET_ID.fullmatch(pet_id or "") or not self._path(pet_id).exists():
+                raise KeyError(f"no pet {pet_id!r}")
+            h = self.pets[pet_id] = self._load(pet_id)
+        h.touched = time.monotonic()
+        return h
+
+    def drop(self, pet_id: str) -> None:
+        """Forget a pet, live or saved, without loading it."""
+        saved = bool(PET_ID.fullmatch(pet_id or "")) and self._path(pet_id).exists()
+        live = self.pets.pop(pet_id, None)          # its heap entries go stale
+        if live is None and not saved and pet_id not in self._writing:
+            raise KeyError(f"no pet {pet_id!r}")
+        if pet_id in self._writing:
+            self._drop_after.add(pet_id)            # _save_idle unlinks it after the write
+        else:
+            self._path(pet_id).unlink(missing_ok=True)
+
+    def command(self, pet_id: str, cmd: str) -> Hosted:
+        h = self.get(pet_id)
+        now = self.clock.time()
+        self._catch_up(h, now)
+        if h.pet.status:
+            raise ValueError(f"pet {pet_id!r} has ended: {h.pet.status}")
+        if h.session.command(cmd):
+            h.due = None
+        else:
+            self._schedule(h)
+        return h
+
+    def observe(self, pet_id: str) -> Hosted:
+        h = self.get(pet_id)
+        self._catch_up(h, self.clock.time())
+        return h
+
+    # ── scheduling ────────────────────────────────────────────────────────
+    def _schedule(self, h: Hosted) -> None:
+        h.due = h.session.wake()
+        heapq.heappush(self.heap, (h.due, next(self._seq), h.id))
+        if h.due < self._sleep_until and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _catch_up(self, h: Hosted, now: float) -> None:
+        if h.pet.status:
+            return
+        self.catch_ups += 1
+        if h.session.catch_up(now):
+            h.due = None               # ended; nothing left to schedule
+        elif h.session.wake() != h.due:
+            self._schedule(h)
+
+    def due(self, now: float):
+        """Run every pet due by `now`, yielding after each one (for slicing)."""
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            due, _, pet_id = heapq.heappop(heap)
+            h = self.pets.get(pet_id)
+            if h is None or h.due != due:
+                continue               # dropped, saved, or rescheduled since
+            self._catch_up(h, now)
+            yield h
+
+    def run_due(self, now: float | None = None) -> int:
+        """Synchronous scheduler pass, e.g. under a VirtualClock."""
+        return sum(1 for _ in self.due(self.clock.time() if now is None else now))
+
+    async def run(self) -> None:
+        """The scheduler: sleep until the earliest due pet, run what's due, repeat."""
+        self._wakeup = asyncio.Event()
+        next_sweep = time.monotonic() + IDLE_CHECK
+        speed = getattr(self.clock, "speed", 1.0)
+        while True:
+            n = 0
+            for _ in self.due(self.clock.time()):
+                n += 1
+                if n % SLICE == 0:
+                    await asyncio.sleep(0)     # let waiting requests in
+            if time.monotonic() >= next_sweep:
+                await self._save_idle()
+                next_sweep = time.monotonic() + IDLE_CHECK
+            self._sleep_until = self.heap[0][0] if self.heap else float("inf")
+            delay = min(MAX_SLEEP, max(0.0, (self._sleep_until - self.clock.time()) / speed))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._sleep_until = float("-inf")   # awake: no need to be woken
+
+    # ── persistence ───────────────────────────────────────────────────────
+    def pack(self, h: Hosted) -> bytes:
+        pet = h.pet
+        seed = json.dumps(pet.seed).encode("utf-8")
+        status = (pet.status or "").encode("utf-8")
+        return b"".join((
+            HOST_HEADER.pack(HOST_MAGIC, HOST_VERSION, h.session.start_time,
+                             h.session.next_minute, len(seed), len(status)),
+            seed, status, pet.snapshot(rngs=True),
+        ))
+
+    def _write(self, saves: list[tuple[str, bytes]]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        for pet_id, blob in saves:
+            path = self._path(pet_id)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(blob)
+            tmp.replace(path)          # a crash never leaves half a pet
+
+    def save(self, h: Hosted) -> None:
+        self._write([(h.id, self.pack(h))])
+
+    def _load(self, pet_id: str) -> Hosted:
+        path = self._path(pet_id)
+        blob = path.read_bytes()
+        try:
+            magic, version, start_time, next_minute, n_seed, n_status = HOST_HEADER.unpack_from(blob)
+            if magic != HOST_MAGIC or version not in (1, HOST_VERSION):
+                raise ValueError("not a saved pet (or from another version)")
+            offset = HOST_HEADER.size
+            seed = blob[offset:offset + n_seed].decode("utf-8")
+            offset += n_seed
+            status = blob[offset:offset + n_status].decode("utf-8") or None
+            offset += n_status
+            if version == HOST_VERSION:
+                seed = json.loads(seed)
+            elif re.fullmatch(r"-?\d+", seed):
+                seed = int(seed)
+            needs_phrases, random_events = content()
+            # the RNG states come from the snapshot; the seed is only kept for forks
+            pet = Gotchi(needs_phrases, random_events, seed=seed, clock=self.clock)
+            pet.restore(blob[offset:])
+        except (struct.error, ValueError, IndexError) as e:   # truncated or corrupt
+            raise ValueError(f"{path} can't be loaded: {e}") from e
+        pet.status = status
+        h = Hosted(pet_id, RealtimeSession(pet, start_time, next_minute))
+        self._catch_up(h, self.clock.time())
+        return h
+
+    def idle_pets(self) -> list[Hosted]:
+        """Pets untouched for self.idle seconds."""
+        cutoff = time.monotonic() - self.idle
+        return [h for h in self.pets.values() if h.touched < cutoff]
+
+    def save_idle(self) -> int:
+        """Save and drop every idle pet (the scheduler does this in slices)."""
+        idle = self.idle_pets()
+        for h in idle:
+            self.save(h)
+            del self.pets[h.id]
+        return len(idle)
+
+    async def _save_idle(self) -> None:
+        """
+        save_idle() without blocking requests: packing stays on the loop,
+        the disk writes go to a thread, and a pet asked for while its write
+        was in flight simply stays live. One dropped meanwhile is unlinked
+        once its write lands.
+        """
+        loop = asyncio.get_running_loop()
+        idle = self.idle_pets()
+        for i in range(0, len(idle), SAVE_SLICE):
+            chunk = idle[i:i + SAVE_SLICE]
+            cutoff = time.monotonic() - self.idle
+            ids = {h.id for h in chunk}
+            self._writing |= ids
+            try:
+                await loop.run_in_executor(None, self._write, [(h.id, self.pack(h)) for h in chunk])
+            finally:
+                self._writing -= ids
+                for pet_id in ids & self._drop_after:   # the write put its file back
+                    self._drop_after.discard(pet_id)
+                    self._path(pet_id).unlink(missing_ok=True)
+            for h in chunk:
+                if h.touched < cutoff and self.pets.get(h.id) is h:
+                    del self.pets[h.id]
+
+    def save_all(self) -> None:
+        for h in self.pets.values():
+            self.save(h)
+
+    # ───────────────────────────────────────────────────────────────────────
+    # 2.  PROTOCOL
+    # ───────────────────────────────────────────────────────────────────────
+    def dispatch(self, req: dict) -> dict:
+        if not isinstance(req, dict):
+            raise ValueError("a request must be a JSON object")
+        op = req.get("op")
+        pet_id = req.get("pet")
+        if op in ("create", "command", "observe", "drop") and not isinstance(pet_id, str):
+            raise ValueError(f"bad pet id {pet_id!r}")
+        if op == "create":
+            h = self.create(pet_id, req.get("seed"))
+        elif op == "command":
+            h = self.command(pet_id, str(req.get("cmd", "")))
+        elif op == "observe":
+            h = self.observe(pet_id)
+        elif op == "drop":
+            self.drop(pet_id)
+            return {"ok": True}
+        elif op == "info":
+            return {"ok": True, "live": len(self.pets), "heap": len(self.heap),
+                    "catch_ups": self.catch_ups}
+        else:
+            raise ValueError(f"unknown op {op!r}")
+        resp = {"ok": True, "obs": h.pet.observe().as_dict()}
+        if req.get("screen"):
+            resp["screen"] = h.pet.generate_display_lines()
+        return resp
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                req = {}
+                try:
+                    req = json.loads(line)
+                    resp = self.dispatch(req)
+                except (KeyError, ValueError, TypeError) as e:
+                    resp = {"ok": False, "error": e.args[0] if e.args else str(e)}
+                if isinstance(req, dict) and "id" in req:
+                    resp["id"] = req["id"]
+                writer.write(json.dumps(resp).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        """Start listening and the scheduler; returns the server."""
+        server = await asyncio.start_server(self.handle, host, port)
+        self._scheduler = asyncio.create_task(self.run())
+        return server
+
+# ───────────────────────────────────────────────────────────────────────────
+# 3.  CLIENT
+# ───────────────────────────────────────────────────────────────────────────
+class PetClient:
+    """One connection to a PetHost; requests go one at a time."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8765) -> "PetClient":
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def call(self, op: str, **fields) -> dict:
+        self.writer.write(json.dumps({"op": op, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+# ───────────────────────────────────────────────────────────────────────────
+# 4.  MAIN
+# ───────────────────────────────────────────────────────────────────────────
+async def load_test(args) -> None:
+    """N pets on a time-warped clock, C clients sending commands flat out."""
+    host = PetHost(ScaledClock(args.speed), root=args.root, idle=args.idle)
+    tic = time.perf_counter()
+    for i in range(args.load):
+        host.create(f"pet{i}", seed=i)
+    print(f"{args.load} pets created in {time.perf_counter() - tic:.2f}s", file=sys.stderr)
+    server = await host.serve(args.host, 0)
+    port = server.sockets[0].getsockname()[1]
+
+    latencies: list[float] = []
+    deadline = time.monotonic() + args.seconds
+
+    async def client(k: int):
+        rng = random.Random(k)
+        c = await PetClient.connect(args.host, port)
+        while time.monotonic() < deadline:
+            pet = f"pet{rng.randrange(args.load)}"
+            t = time.perf_counter()
+            await c.call(rng.choice(("command", "observe")), pet=pet, cmd=rng.choice("fps"))
+            latencies.append(time.perf_counter() - t)
+        await c.close()
+
+    await asyncio.gather(*(client(k) for k in range(args.clients)))
+    server.close()
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3
+
+    alive = sum(1 for h in host.pets.values() if h.pet.alive)
+    print(f"{len(latencies)} requests in {args.seconds}s "
+          f"({len(latencies) / args.seconds:.0f}/s), latency ms "
+          f"p50 {pct(0.5):.2f}  p99 {pct(0.99):.2f}  max {latencies[-1] * 1e3:.2f}\n"
+          f"{host.catch_ups} catch-ups, {alive}/{len(host.pets)} pets alive "
+          f"after {args.seconds * args.speed / 60:.0f} sim minutes", file=sys.stderr)
+
+
+async def amain(args) -> None:
+    clock = ScaledClock(args.speed) if args.speed != 1 else RealClock()
+    host = PetHost(clock, root=args.root, idle=args.idle)
+    server = await host.serve(args.host, args.port)
+    print(f" ➜ Hosting pets on {args.host}:{args.port} (saved to {host.root})",
+          file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        host.save_all()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Host many live Gotchis behind a JSON-lines socket.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--root", default=str(PETS_DIR), help="where idle pets are saved")
+    ap.add_argument("--idle", type=float, default=IDLE_SECONDS,
+                    help="wall seconds without a request before a pet is saved and dropped")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="clock speed (sim seconds per wall second)")
+    ap.add_argument("--load", type=int, default=0, help="run a load test with this many pets")
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    args = ap.parse_args()
+    try:
+        asyncio.run(load_test(args) if args.load else amain(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+gotchi_store.py  –  columnar results store + aggregation CLI
+------------------------------------------------------------
+
+* Episodes go into shards of plain .npy columns (memory-mapped on read),
+  one directory per batch of results, with string columns stored as
+  categorical codes
+* Each shard's shard.json gives its size and policies, so queries can
+  skip shards without opening their columns; it is written last, so a
+  shard without one is still being written and is ignored
+* Aggregates (survival, action mix, stat trajectories, model comparison)
+  are vectorised over the columns -- no per-episode Python objects
+
+    logs/store/<shard>/shard.json
+    logs/store/<shard>/episodes.<column>.npy
+    logs/store/<shard>/decisions.<column>.npy
+    logs/store/<shard>/categories.json
+
+    python gotchi_store.py list
+    python gotchi_store.py compare                  # survival by model
+    python gotchi_store.py actions --policy llm
+    python gotchi_store.py trajectory --stat total --bins 12
+    python gotchi_store.py ingest logs/summaries_1722400000.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.resolve()
+STORE_DIR = ROOT / "logs" / "store"
+
+COMMANDS = ("F", "P", "S", "Q", "?")
+
+# column -> dtype; "cat" columns are stored as codes into categories.json
+# (int16, or wider once there are too many categories for it)
+EPISODE_COLUMNS = {
+    "episode":    np.int64,
+    "seed":       np.int64,  # "cat" in shards whose seeds don't all fit
+    "policy":     "cat",
+    "model":      "cat",     # the LLM behind the policy, else the policy
+    "result":     "cat",
+    "sim_time":   np.int64,
+    "decisions":  np.int32,
+    "hunger":     np.float32,
+    "happiness":  np.float32,
+    "energy":     np.float32,
+    "friendship": np.float32,
+    "wall_time":  np.float32,
+    "first_row":  np.int64,   # offset of the episode's decisions
+}
+DECISION_COLUMNS = {
+    "episode_row": np.int32,  # row of the episode in this shard
+    "sim_time":    np.int64,
+    "command":     np.int8,   # index into COMMANDS
+    "hunger":      np.float32,
+    "happiness":   np.float32,
+    "energy":      np.float32,
+    "total":       np.float32,
+}
+
+# ───────────────────────────────────────────────────────────────────────────
+# 1.  WRITING
+# ───────────────────────────────────────────────────────────────────────────
+INT64 = np.iinfo(np.int64)
+
+
+def _seed_values(labels: list[str]) -> np.ndarray:
+    """Seeds stored as text, back as int64 when they all fit, else as objects."""
+    values = [int(c) if c.lstrip("-").isdigit() else c for c in labels]
+    try:
+        return np.array(values, dtype=np.int64)
+    except (OverflowError, TypeError, ValueError):
+        return np.array(values, dtype=object)
+
+
+def code_dtype(n: int) -> type:
+    """Narrowest integer dtype for codes into n categories."""
+    return np.int16 if n <= np.iinfo(np.int16).max + 1 else np.int32
+
+
+def default_model(policy: str) -> str:
+    # gotchi_async names its policy "llm:<model>"
+    return policy.partition(":")[2] if policy.startswith("llm:") else policy
+
+
+class ResultsStore:
+    def __init__(self, root: str | Path = STORE_DIR):
+        self.root = Path(root)
+
+    @property
+    def index_path(self) -> Path:
+        # where stores kept every entry before shards had their own
+        return self.root / "index.json"
+
+    def index(self) -> list[dict]:
+        """Every finished shard's entry, oldest first."""
+        entries = {}
+        if self.index_path.exists():
+            for e in json.loads(self.index_path.read_text())["shards"]:
+                entries[e["shard"]] = e
+        for path in self.root.glob("*/shard.json"):
+            entries.setdefault(path.parent.name, json.loads(path.read_text()))
+        return sorted(entries.values(), key=lambda e: (e["created"], e["shard"]))
+
+    def write(self, results: list[dict], label: str | None = None,
+              model: str | None = None) -> str | None:
+        """
+        Store episode records as produced by gotchi_farm.run_episode (with
+        their "rows" of decisions) as one new shard.  model tags every
+        episode that doesn't name its own.  Returns the shard id.
+        """
+        if not results:
+            return None
+        results = sorted(
+            ({**r, "model": r.get("model") or model or default_model(r["policy"])}
+             for r in results),
+            key=lambda r: r["episode"],
+        )
+        categories: dict[str, list[str]] = {}
+
+        def encode(name: str, values) -> np.ndarray:
+            labels = [str(v) for v in values]
+            cats = sorted(set(labels))
+            categories[name] = cats
+            lookup = {c: i for i, c in enumerate(cats)}
+            return np.array([lookup[v] for v in labels], dtype=code_dtype(len(cats)))
+
+        rows = [row for r in results for row in r.get("rows", ())]
+        counts = [len(r.get("rows", ())) for r in results]
+        episodes = {
+            name: (
+                encode(name, [r[name] for r in results]) if dtype == "cat"
+                else np.array([r.get(name, 0) for r in results], dtype=dtype)
+            )
+            for name, dtype in EPISODE_COLUMNS.items() if name not in ("seed", "first_row")
+        }
+        # Unseeded pets draw 64-bit root seeds, and seeds may be strings:
+        # those shards keep their seeds as exact text instead
+        seeds = [r.get("seed") for r in results]
+        if all(isinstance(v, int) and INT64.min <= v <= INT64.max for v in seeds):
+            episodes["seed"] = np.array(seeds, dtype=np.int64)
+        else:
+            episodes["seed"] = encode("seed", seeds)
+        episodes["first_row"] = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+
+        decisions = {
+            "episode_row": np.repeat(np.arange(len(results), dtype=np.int32), counts),
+            "command": np.array(
+                [COMMANDS.index(c) if c in COMMANDS else COMMANDS.index("?")
+                 for c in (row["command"] for row in rows)],
+                dtype=np.int8,
+            ),
+        }
+        for name in ("sim_time", "hunger", "happiness", "energy", "total"):
+            decisions[name] = np.array(
+                [row[name] for row in rows], dtype=DECISION_COLUMNS[name]
+            )
+
+        # only now create the shard, so a bad record leaves nothing behind
+        shard = f"{label or 'shard'}_{int(time.time() * 1000)}_{os.getpid()}_{os.urandom(3).hex()}"
+        path = self.root / shard
+        path.mkdir(parents=True)
+        for name, column in episodes.items():
+            np.save(path / f"episodes.{name}.npy", column)
+        for name, column in decisions.items():
+            np.save(path / f"decisions.{name}.npy", column)
+        (path / "categories.json").write_text(json.dumps(categories))
+
+        self._write_entry(path, {
+            "shard": shard,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+            "episodes": len(results),
+            "decisions": len(rows),
+            "policies": categories["policy"],
+            "models": categories["model"],
+        })
+        return shard
+
+    @staticmethod
+    def _write_entry(path: Path, entry: dict) -> None:
+        # one entry per shard, so concurrent writers never rewrite each
+        # other's; write-then-rename, so a reader never sees half of one
+        tmp = path / "shard.json.tmp"
+        tmp.write_text(json.dumps(entry, indent=1))
+        os.replace(tmp, path / "shard.json")
+
+    # ───────────────────────────────────────────────────────────────────────
+    # 2.  READING
+    # ───────────────────────────────────────────────────────────────────────
+    def load(self, policy: str | None = None, shards: list[str] | None = None) -> "Table":
+        """
+        All matching shards as one Table of memory-mapped columns.  policy
+        is a substring filter on policy or model; shards that can't match
+        are never opened.
+        """
+        entries = [
+            e for e in self.index()
+            if (shards is None or e["shard"] in shards)
+            and (policy is None or any(policy in p for p in e["policies"] + e["models"]))
+        ]
+        return Table.concat([Table.open(self.root / e["shard"]) for e in entries], policy)
+
+
+class Table:
+    """Episode and decision columns, with categorical columns decoded lazily."""
+
+    def __init__(self, episodes: dict, decisions: dict, categories: dict):
+        self.episodes = episodes
+        self.decisions = decisions
+        self.categories = categories
+
+    @classmethod
+    def open(cls, path: Path) -> "Table":
+        def columns(prefix, spec):
+            return {
+                name: np.load(path / f"{prefix}.{name}.npy", mmap_mode="r")
+                for name in spec
+            }
+        categories = json.loads((path / "categories.json").read_text())
+        episodes = columns("episodes", EPISODE_COLUMNS)
+        if "seed" in categories:
+            # seeds stored as text (too big for int64, strings, or a shard
+            # from before seeds were integers)
+            seeds = _seed_values(categories.pop("seed"))
+            episodes["seed"] = seeds[episodes["seed"]] if len(seeds) else episodes["seed"]
+        return cls(episodes, columns("decisions", DECISION_COLUMNS), categories)
+
+    @classmethod
+    def concat(cls, tables: list["Table"], policy: str | None = None) -> "Table":
+        """
+        Join shards, remapping each shard's category codes to shared ones,
+        then keep the episodes whose policy or model contains policy.
+        """
+        cats = {
+            name: sorted({c for t in tables for c in t.categories[name]})
+            for name, dtype in EPISODE_COLUMNS.items() if dtype == "cat"
+        }
+        lookup = {name: {c: i for i, c in enumerate(labels)} for name, labels in cats.items()}
+        episodes: dict[str, list] = {name: [] for name in EPISODE_COLUMNS}
+        decisions: dict[str, list] = {name: [] for name in DECISION_COLUMNS}
+        offset = 0
+        for t in tables:
+            for name, dtype in EPISODE_COLUMNS.items():
+                column = t.episodes[name]
+                if dtype == "cat":
+                    remap = np.array([lookup[name][c] for c in t.categories[name]],
+                                     dtype=code_dtype(len(cats[name])))
+                    column = remap[column] if len(remap) else column
+                episodes[name].append(column)
+            for name in DECISION_COLUMNS:
+                column = t.decisions[name]
+                decisions[name].append(column + offset if name == "episode_row" else column)
+            offset += len(t.episodes["episode"])
+
+        def join(parts, dtype):
+            return np.concatenate(parts) if parts else np.zeros(0, dtype)
+
+        ep = {name: join(episodes[name], code_dtype(len(cats[name])) if dtype == "cat" else dtype)
+              for name, dtype in EPISODE_COLUMNS.items()}
+        dec = {name: join(decisions[name], dtype) for name, dtype in DECISION_COLUMNS.items()}
+
+        if policy is not None:
+            match = {
+                name: np.array([policy in c for c in cats[name]] or [False])
+                for name in ("policy", "model")
+            }
+            keep = match["policy"][ep["policy"]] | match["model"][ep["model"]]
+            rows = keep[dec["episode_row"]]
+            renumber = np.cumsum(keep) - 1
+            ep = {name: column[keep] for name, column in ep.items()}
+            dec = {name: column[rows] for name, column in dec.items()}
+            dec["episode_row"] = renumber[dec["episode_row"]].astype(np.int32)
+        # decisions are grouped by episode, in episode order
+        ep["first_row"] = np.searchsorted(dec["episode_row"], np.arange(len(ep["episode"])))
+        return cls(ep, dec, cats)
+
+    def __len__(self) -> int:
+        return len(self.episodes["episode"])
+
+    def groups(self, by: str | None, level: str = "episodes"):
+        """(labels, codes per row) for grouping by a categorical episode column."""
+        if by is None:
+            n = len(self) if level == "episodes" else len(self.decisions["command"])
+            return ["all"], np.zeros(n, dtype=np.int64)
+        codes = self.episodes[by]
+        if level == "decisions":
+            codes = codes[self.decisions["episode_row"]]
+        present, inverse = np.unique(codes, return_inverse=True)
+        return [self.categories[by][c] for c in present], inverse
+
+def columns(rows: list[dict]) -> dict[str, np.ndarray]:
+    """A list of same-keyed dicts (e.g. a notebook's logs) as one array per key."""
+    if not rows:
+        return {}
+    return {k: np.array([r[k] for r in rows]) for k in rows[0]}
+
+# ───────────────────────────────────────────────────────────────────────────
+# 3.  AGGREGATES
+# ───────────────────────────────────────────────────────────────────────────
+def survival(table: Table, by: str | None = None) -> list[dict]:
+    labels, g = table.groups(by)
+    k = len(labels)
+    sim_time = table.episodes["sim_time"].astype(np.float64)
+    n = np.bincount(g, minlength=k)
+    survived_code = (
+        table.categories["result"].index("survived")
+        if "survived" in table.categories["result"] else -1
+    )
+    survived = np.bincount(g, weights=table.episodes["result"] == survived_code, minlength=k)
+    mean = np.bincount(g, weights=sim_time, minlength=k) / np.maximum(n, 1)
+    out = []
+    for i, label in enumerate(labels):
+        times = sim_time[g == i]
+        out.append({
+            by or "group": label,
+            "episodes": int(n[i]),
+            "survived_%": round(100 * survived[i] / max(n[i], 1), 1),
+            "mean_min": round(mean[i] / 60, 1),
+            "median_min": round(float(np.median(times)) / 60, 1) if len(times) else 0.0,
+            "mean_decisions": round(float(table.episodes["decisions"][g == i].mean()), 1)
+            if len(times) else 0.0,
+        })
+    return out
+
+
+def actions(table: Table, by: str | None = None) -> list[dict]:
+    labels, g = table.groups(by, level="decisions")
+    k = len(labels)
+    counts = np.zeros((k, len(COMMANDS)), dtype=np.int64)
+    np.add.at(counts, (g, table.decisions["command"]), 1)
+    out = []
+    for i, label in enumerate(labels):
+        total = max(counts[i].sum(), 1)
+        row = {by or "group": label, "decisions": int(counts[i].sum())}
+        row.update({f"{c}_%": round(100 * counts[i, j] / total, 1) for j, c in enumerate(COMMANDS)})
+        out.append(row)
+    return out
+
+
+def trajectory(table: Table, stat: str = "total", bins: int = 12,
+               by: str | None = None) -> list[dict]:
+    """Mean of a decision-time stat per sim-time bin."""
+    labels, g = table.groups(by, level="decisions")
+    t = table.decisions["sim_time"]
+    end = max(int(t.max()) + 1, 1) if len(t) else 1
+    b = np.minimum(t * bins // end, bins - 1)
+    k = len(labels)
+    flat = g * bins + b
+    total = np.bincount(flat, weights=table.decisions[stat], minlength=k * bins)
+    n = np.bincount(flat, minlength=k * bins)
+    means = np.where(n > 0, total / np.maximum(n, 1), np.nan).reshape(k, bins)
+    out = []
+    for i, label in enumerate(labels):
+        row = {by or "group": label}
+        for j in range(bins):
+            row[f"{j * end // bins // 60}m"] = None if np.isnan(means[i, j]) else round(float(means[i, j]), 2)
+        out.append(row)
+    return out
+
+# ───────────────────────────────────────────────────────────────────────────
+# 4.  INGEST (older CSV / JSON artifacts)
+# ───────────────────────────────────────────────────────────────────────────
+def ingest(store: ResultsStore, json_path: Path) -> str | None:
+    """
+    Store a farm run from its summaries_<ts>.json (which lists episodes)
+    and the gotchi_stats_<ts>.csv next to it (decision rows).
+    """
+    meta = json.loads(json_path.read_text())
+    episodes = meta.get("episodes")
+    if not episodes:
+        print(f"{json_path}: no per-episode records (not a farm run), skipped", file=sys.stderr)
+        return None
+    csv_path = json_path.with_name(json_path.name.replace("summaries_", "gotchi_stats_")).with_suffix(".csv")
+    rows: dict[int, list] = {}
+    if csv_path.exists():
+        with csv_path.open(newline="") as f:
+            for row in csv.DictReader(f):
+                rows.setdefault(int(row["episode"]), []).append({
+                    "sim_time": int(row["sim_time"]),
+                    "command": row["command"],
+                    **{k: float(row[k]) for k in ("hunger", "happiness", "energy", "total")},
+                })
+    results = [{**e, "rows": rows.get(e["episode"], [])} for e in episodes]
+    return store.write(results, label=json_path.stem)
+
+# ───────────────────────────────────────────────────────────────────────────
+# 5.  CLI
+# ───────────────────────────────────────────────────────────────────────────
+def print_table(rows: list[dict]) -> None:
+    if not rows:
+        print("(no episodes)")
+        return
+    keys = list(rows[0])
+    cells = [[str(r.get(k, "")) for k in keys] for r in rows]
+    widths = [max(len(k), *(len(c[i]) for c in cells)) for i, k in enumerate(keys)]
+    print("  ".join(k.ljust(w) for k, w in zip(keys, widths)))
+    for c in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(c, widths)))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Query the Gotchi results store.")
+    ap.add_argument("--store", default=str(STORE_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sub.add_parser("list", help="list shards")
+    for name in ("survival", "actions", "trajectory", "compare"):
+        p = sub.add_parser(name)
+        p.add_argument("--policy", default=None, help="substring filter on policy/model")
+        p.add_argument("--by", default="model" if name == "compare" else None,
+                       choices=("policy", "model", "result"))
+        p.add_argument("--json", action="store_true", help="print JSON instead of a table")
+        if name == "trajectory":
+            p.add_argument("--stat", default="total",
+                           choices=("hunger", "happiness", "energy", "total"))
+            p.add_argument("--bins", type=int, default=12)
+    p = sub.add_parser("ingest", help="store farm runs from summaries_<ts>.json files")
+    p.add_argument("paths", nargs="+")
+    args = ap.parse_args()
+
+    store = ResultsStore(args.store)
+    if args.cmd == "list":
+        print_table([{k: e[k] for k in ("shard", "created", "episodes", "decisions")}
+                     | {"models": ",".join(e["models"])} for e in store.index()])
+        return
+    if args.cmd == "ingest":
+        for path in args.paths:
+            shard = ingest(store, Path(path))
+            if shard:
+                print(f" ➜ {path} stored as {shard}")
+        return
+
+    tic = time.perf_counter()
+    table = store.load(policy=args.policy)
+    if args.cmd in ("survival", "compare"):
+        rows = survival(table, args.by)
+    elif args.cmd == "actions":
+        rows = actions(table, args.by)
+    else:
+        rows = trajectory(table, args.stat, args.bins, args.by)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+    print(f"\n{len(table)} episodes in {time.perf_counter() - tic:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Streaming, crash-safe telemetry as append-only JSON lines.
+
+log() only puts the record on a bounded queue, so the thread that calls it
+(the pet's tick loop, the GPT thread) never waits on the disk; if the queue
+is full the record is counted in `lost` instead.  A background writer thread
+drains the queue in batches, flushes every batch, fsyncs at least every
+fsync_interval seconds, and rotates to a new file once the current one
+passes max_bytes:
+
+    logs/telemetry_<ts>.0000.jsonl
+    logs/telemetry_<ts>.0001.jsonl   ...
+
+Every record is one JSON object with "kind" and "t" (wall time) plus its
+own fields.  A crash loses at most the last unsynced second, and
+read_records() skips a torn final line, so a partial run can always be read
+back.
+
+If the disk fails (an OSError writing, syncing or rotating), the writer
+reports it on stderr once and stops; later records are counted in `lost`,
+and close() raises the error.
+
+    telemetry = TelemetryWriter("logs", prefix="telemetry_123")
+    attach(pet, telemetry, run=1)          # stat/message/phrase/death events
+    telemetry.log("action", command="F", hunger=4.5)
+    telemetry.close()
+    actions = [r for r in read_records(telemetry.files()) if r["kind"] == "action"]
+
+Recover a crashed run from the command line:
+
+    python gotchi_telemetry.py logs/telemetry_<ts> --kind action --csv actions.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import Counter
+import queue
+import threading
+import time
+from pathlib import Path
+
+_STOP = object()
+
+
+class TelemetryWriter:
+    def __init__(
+        self,
+        directory,
+        prefix="telemetry",
+        max_bytes=64 * 1024 * 1024,
+        fsync_interval=1.0,
+        keep=None,
+        max_queue=100_000,
+    ):
+        """
+        keep: number of files to keep, counting the one being written
+        (oldest are deleted; at least 1), or None to keep everything.
+        max_queue: records waiting for the writer before log() drops them.
+        """
+        if keep is not None and keep < 1:
+            raise ValueError(f"keep must be at least 1, got {keep!r}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.fsync_interval = fsync_interval
+        self.keep = keep
+        self.records = 0
+        self.dropped = 0  # records that couldn't be serialised
+        self.lost = 0     # records not queued: queue full, or the writer died
+        self.error = None  # what stopped the writer thread, if anything
+
+        self._queue = queue.Queue(max_queue)
+        self._lost_lock = threading.Lock()
+        self._index = 0
+        self._file = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def log(self, kind, **fields):
+        """Queue one record; never blocks."""
+        if self.error is None:
+            fields["kind"] = kind
+            fields["t"] = time.time()
+            try:
+                self._queue.put_nowait(fields)
+                return
+            except queue.Full:
+                pass
+        with self._lost_lock:
+            self.lost += 1
+
+    def path(self, index):
+        return self.directory / f"{self.prefix}.{index:04d}.jsonl"
+
+    def files(self):
+        """This writer's files, oldest first."""
+        return sorted(self.directory.glob(f"{self.prefix}.*.jsonl"))
+
+    # ── writer thread ─────────────────────────────────────────────────────
+    def _open(self):
+        self._file = open(self.path(self._index), "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._sync()
+        self._file.close()
+        self._index += 1
+        self._open()
+        if self.keep is not None:
+            files = self.files()
+            for old in files[:len(files) - self.keep]:
+                old.unlink(missing_ok=True)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _run(self):
+        try:
+            self._write_all()
+        except Exception as exc:  # noqa: BLE001  (reported, then raised by close())
+            self.error = exc
+            print(f"telemetry: writer stopped ({exc!r}); further records are lost",
+                  file=sys.stderr)
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+
+    def _write_all(self):
+        self._open()
+        last_sync = time.monotonic()
+        stop = False
+        while not stop:
+            try:
+                batch = [self._queue.get(timeout=self.fsync_interval)]
+            except queue.Empty:
+                batch = []
+            # drain whatever else is waiting, so a burst costs one write
+            while len(batch) < 4096:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = []
+            for record in batch:
+                if record is _STOP:
+                    stop = True
+                    continue
+                try:
+                    lines.append(json.dumps(record, ensure_ascii=False, default=str))
+                except (TypeError, ValueError):
+                    self.dropped += 1
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+                self.records += len(lines)
+
+            if stop or time.monotonic() - last_sync >= self.fsync_interval:
+                self._sync()
+                last_sync = time.monotonic()
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        self._file.close()
+
+    def close(self):
+        """
+        Write out everything queued so far and stop the writer thread.
+        Raises RuntimeError if the writer died on a disk error.
+        """
+        if not self._closed:
+            self._closed = True
+            while self._thread.is_alive():
+                try:
+                    self._queue.put(_STOP, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            self._thread.join()
+        if self.error is not None:
+            with self._lost_lock:
+                self.lost += self._queue.qsize()
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+            raise RuntimeError(
+                f"telemetry writer failed: {self.error!r} ({self.lost} records lost)"
+            ) from self.error
+
+
+def read_records(paths):
+    """
+    Yield the records in the given JSONL files in order, skipping a torn
+    line (e.g. the last one written before a crash).
+    """
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def attach(pet, writer, **tags):
+    """
+    Stream a Gotchi's change events (stat changes, messages, needs phrases,
+    death / running away) to writer, each tagged with sim time and **tags.
+    """
+    pet.on("on_stat_change", lambda p, changes: writer.log(
+        "stats", time=p.current_time, changes=changes, **tags))
+    pet.on("on_message_change", lambda p, old, new: writer.log(
+        "message", time=p.current_time, msg=new, **tags))
+    pet.on("on_phrase", lambda p, phrase: writer.log(
+        "phrase", time=p.current_time, phrase=phrase, **tags))
+    for event in ("on_death", "on_runaway"):
+        pet.on(event, lambda p, status: writer.log(
+            "end", time=p.current_time, status=status, **tags))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or export a telemetry log.")
+    ap.add_argument("prefix", help="path prefix, e.g. logs/telemetry_1722400000")
+    ap.add_argument("--kind", default=None, help="only records of this kind")
+    ap.add_argument("--csv", default=None, help="write the selected records as CSV")
+    args = ap.parse_args()
+
+    prefix = Path(args.prefix)
+    paths = sorted(prefix.parent.glob(f"{prefix.name}.*.jsonl"))
+    if not paths:
+        sys.exit(f"no telemetry files match {prefix}.*.jsonl")
+    records = [r for r in read_records(paths) if args.kind in (None, r.get("kind"))]
+
+    for kind, n in Counter(r.get("kind") for r in records).most_common():
+        print(f"{kind:12s} {n}")
+    if args.csv and records:
+        fields = list(dict.fromkeys(k for r in records for k in r))
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=fields)
+            w.writeheader()
+            w.writerows(records)
+        print(f" ➜ {len(records)} records saved to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Episode traces: record a headless episode compactly, replay it exactly.
+
+A trace holds everything needed to re-run an episode through Gotchi.step
+with no policy (and no LLM) in the loop:
+
+    seed     the pet's root seed
+    content  sha256 of its content pack (ContentPack.to_bytes)
+    config   free-form: policy, model, minutes, ...
+    fast     whether step() went through fast_forward
+    input    whether actions counted as player input (last_input_time)
+    ops      in order, [sim_time, "f" | "p" | "s"] for each action,
+             [sim_time, "-"] for any other command (input, no action) and
+             [sim_time, n] for each step(n) call
+    end      sim_time, result and a digest of the final state (RNGs included)
+
+fast_forward draws its rolls once per step() call, so the call boundaries
+are part of the episode and are recorded along with the actions.
+
+    rec = TraceRecorder(pet, config={"policy": "llm"})
+    rec.act("f")
+    rec.step(300)
+    rec.finish(result).save("logs/traces/episode_0.trace.json")
+
+    replay = Replayer(Trace.load("logs/traces/episode_0.trace.json"))
+    replay.run()                # final pet, as fast as the CPU allows
+    replay.verify()             # True if it matches the recorded digest
+    replay.seek(90 * 60)        # the pet at sim minute 90, from a checkpoint
+
+Replaying builds state checkpoints every `every` sim seconds as it goes,
+so after the first pass any seek only replays from the nearest one.
+
+    python gotchi_trace.py logs/traces/episode_0.trace.json --seek 5400
+"""
+import argparse
+import bisect
+import gzip
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+from gotchi import ContentPack, Gotchi, load_content
+
+ROOT = Path(__file__).parent.resolve()
+TRACE_VERSION = 1
+ACTIONS = {"f": "feed", "p": "play", "s": "sleep"}
+NOOP = "-"                  # a command that isn't an action, e.g. an unparsed reply
+CHECKPOINT_EVERY = 600      # sim seconds between replay checkpoints
+
+_content_hashes = {}        # id(events) -> (events, hash); tables are shared
+
+
+def content_hash(phrases, events):
+    """sha256 of the content pack these tables make up."""
+    cached = _content_hashes.get(id(events))
+    if cached is not None and cached[0] is events:
+        return cached[1]
+    digest = hashlib.sha256(ContentPack(phrases, events).to_bytes()).hexdigest()
+    _content_hashes[id(events)] = (events, digest)
+    return digest
+
+
+def state_digest(pet):
+    """Short hash of the pet's full state, RNG streams included."""
+    return hashlib.sha256(pet.snapshot(rngs=True)).hexdigest()[:16]
+
+
+class Trace:
+    __slots__ = ("seed", "content", "config", "fast", "input", "ops", "end")
+
+    def __init__(self, seed, content, config=None, fast=True, input=True,
+                 ops=None, end=None):
+        self.seed = seed
+        self.content = content
+        self.config = config or {}
+        self.fast = fast
+        self.input = input
+        self.ops = ops if ops is not None else []
+        self.end = end
+
+    @property
+    def actions(self):
+        """[(sim_time, "f" | "p" | "s"), ...]"""
+        return [(t, op) for t, op in self.ops if op in ACTIONS]
+
+    def to_dict(self):
+        return {"version": TRACE_VERSION,
+                **{name: getattr(self, name) for name in self.__slots__}}
+
+    @classmethod
+    def from_dict(cls, d):
+        if d.get("version") != TRACE_VERSION:
+            raise ValueError(f"unsupported trace version {d.get('version')!r}")
+        return cls(**{name: d.get(name) for name in cls.__slots__})
+
+    def save(self, path):
+        """Write as JSON (gzipped when path ends in .gz)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        blob = json.dumps(self.to_dict(), separators=(",", ":")).encode("utf-8")
+        path.write_bytes(gzip.compress(blob) if path.suffix == ".gz" else blob)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        blob = Path(path).read_bytes()
+        if blob[:2] == b"\x1f\x8b":
+            blob = gzip.decompress(blob)
+        return cls.from_dict(json.loads(blob))
+
+
+class TraceRecorder:
+    """Drives a new pet's actions and steps, writing down each one."""
+
+    def __init__(self, pet, config=None, fast=True, input=True):
+        if pet.current_time != 0:
+            raise ValueError("a trace has to start from a new pet")
+        self.pet = pet
+        self.trace = Trace(pet.seed, content_hash(pet.needs_phrases, pet.random_events),
+                           config=dict(config or {}), fast=fast, input=input)
+
+    def act(self, cmd):
+        """
+        Apply f / p / s. Any other command changes no stat but still counts
+        as player input, as with gotchi_farm.apply_command, so it is
+        recorded as a NOOP op (or not at all when input isn't recorded).
+        """
+        cmd = (cmd or "").lower()
+        if cmd not in ACTIONS:
+            if not self.trace.input:
+                return None
+            cmd = NOOP
+        self.trace.ops.append([self.pet.current_time, cmd])
+        return apply(self.pet, cmd, self.trace.input)
+
+    def step(self, n):
+        if n <= 0:
+            return None
+        self.trace.ops.append([self.pet.current_time, int(n)])
+        return self.pet.step(n, fast=self.trace.fast)
+
+    def finish(self, result=None):
+        """The finished trace, stamped with the pet's final state."""
+        self.trace.end = {
+            "sim_time": self.pet.current_time,
+            "result": result or self.pet.status or "survived",
+            "digest": state_digest(self.pet),
+        }
+        return self.trace
+
+
+def apply(pet, cmd, input=True):
+    if input:
+        pet.last_input_time = pet.current_time
+    action = ACTIONS.get(cmd)
+    return getattr(pet, action)() if action else None
+
+
+class Replayer:
+    def __init__(self, trace, content=None, every=CHECKPOINT_EVERY):
+        """
+        content: the ContentPack the episode ran with (default: the stock
+        text files); it must hash to the trace's content hash.
+        """
+        self.content = content or load_content(ROOT / "needs_phrases.txt",
+                                               ROOT / "random_events.txt")
+        if content_hash(self.content.phrases, self.content.events) != trace.content:
+            raise ValueError("content pack doesn't match the one the trace was recorded with")
+        self.trace = trace
+        self.every = every
+        # (op index, sim time, snapshot), in op order
+        self.checkpoints = []
+
+    def _new_pet(self):
+        return Gotchi(self.content.phrases, self.content.events, seed=self.trace.seed)
+
+    def _start(self, until):
+        """(pet, next op index) from the last checkpoint at or before sim time until."""
+        if until is not None:
+            i = bisect.bisect_right([t for _, t, _ in self.checkpoints], until)
+        else:
+            i = len(self.checkpoints)
+        if not i:
+            return self._new_pet(), 0
+        index, _, blob = self.checkpoints[i - 1]
+        return self._new_pet().restore(blob), index
+
+    def _checkpoint(self, pet, index):
+        # only where nothing has happened yet at the current sim time, so a
+        # checkpoint at time t is the state seek(t) asks for
+        last = self.checkpoints[-1] if self.checkpoints else (0, 0, None)
+        if (
+            index > last[0]
+            and pet.current_time - last[1] >= self.every
+            and self.trace.ops[index - 1][0] < pet.current_time
+            and pet.alive
+        ):
+            self.checkpoints.append((index, pet.current_time, pet.snapshot(rngs=True)))
+
+    def seek(self, until=None):
+        """
+        A new pet in the state the episode was in at sim time `until`
+        (before any action taken at that time, as the policy saw it), or
+        at the end for None.
+        """
+        pet, index = self._start(until)
+        ops = self.trace.ops
+        fast, input = self.trace.fast, self.trace.input
+        while index < len(ops):
+            t, op = ops[index]
+            if until is not None and t >= until:
+                break
+            self._checkpoint(pet, index)
+            if isinstance(op, str):
+                status = apply(pet, op, input)
+            elif until is not None and t + op > until:
+                # stop partway through this step() call; the stretch up to
+                # `until` plays out exactly as it did inside the whole call
+                pet.step(until - t, fast=fast)
+                break
+            else:
+                status = pet.step(op, fast=fast)
+            if status:
+                pet.status = status
+            index += 1
+        return pet
+
+    def run(self):
+        """The final state of the episode."""
+        return self.seek(None)
+
+    def verify(self):
+        """True if replaying lands on the recorded final state."""
+        end = self.trace.end or {}
+        return state_digest(self.run()) == end.get("digest")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay a recorded Gotchi episode.")
+    ap.add_argument("trace")
+    ap.add_argument("--seek", type=float, default=None,
+                    help="show the pet at this sim time (seconds) instead of the end")
+    args = ap.parse_args()
+
+    trace = Trace.load(args.trace)
+    replay = Replayer(trace)
+    tic = time.perf_counter()
+    ok = replay.verify()
+    elapsed = time.perf_counter() - tic
+    end = trace.end or {}
+    print(f"{len(trace.actions)} actions, {end.get('result')} @ "
+          f"{end.get('sim_time', 0) // 60} min; replayed in {elapsed * 1000:.1f} ms "
+          f"({'matches' if ok else 'DOES NOT match'} the recording)", file=sys.stderr)
+    pet = replay.seek(args.seek)
+    print("\n".join(pet.generate_display_lines()))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
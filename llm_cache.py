@@ -0,0 +1,211 @@
+"""
+Content-addressed cache for chat completions, with record/replay modes.
+
+Responses are stored in SQLite keyed by a hash of the request (model,
+temperature, messages and any other generation parameters), and evicted
+least-recently-used once the store grows past max_bytes.
+
+Modes:
+    off             always call the endpoint, never touch the cache
+    record          always call the endpoint and store the response
+    replay          only answer from the cache; a miss raises CacheMiss
+    replay-or-call  answer from the cache, calling (and storing) on a miss
+
+Wrap whatever function makes the call:
+
+    cache = LLMCache("logs/llm_cache.sqlite", mode="replay-or-call")
+    resp = cache.create(client.chat.completions.create, model=..., messages=...)
+    resp.choices[0].message.content
+
+A cache hit returns a lightweight object with the same .choices[0].message
+and .usage shape as the client response.  Pass salt= (e.g. the episode
+seed) to keep otherwise identical requests from different episodes apart,
+so a replayed evaluation gets back exactly what each episode saw.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+MODES = ("off", "record", "replay", "replay-or-call")
+
+# Request arguments that change transport, not the completion
+TRANSPORT_KWARGS = {"timeout", "request_timeout", "extra_headers", "extra_query"}
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when a request has no stored response."""
+
+
+def request_key(**kwargs):
+    """Stable hash of the generation-relevant request arguments."""
+    body = {k: v for k, v in kwargs.items() if k not in TRANSPORT_KWARGS}
+    blob = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _usage_dict(usage):
+    if usage is None:
+        return {}
+    if hasattr(usage, "model_dump"):
+        return usage.model_dump()
+    try:
+        return dict(usage)
+    except (TypeError, ValueError):
+        return {}
+
+
+def cached_response(content, usage=None):
+    """A response-shaped object for a stored completion."""
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content=content),
+                finish_reason="stop",
+            )
+        ],
+        usage=SimpleNamespace(**{"prompt_tokens": 0, "completion_tokens": 0,
+                                 "total_tokens": 0, **(usage or {})}),
+        cached=True,
+    )
+
+
+class LLMCache:
+    def __init__(self, path, mode="replay-or-call", max_bytes=256 * 1024 * 1024):
+        if mode not in MODES:
+            raise ValueError(f"unknown cache mode {mode!r}, expected one of {MODES}")
+        self.path = str(path)
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _conn(self):
+        if self._db is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_used)"
+            )
+            # running total of responses.size, kept by triggers so every
+            # process sharing the file sees it; seeded once for older files
+            self._db.executescript("""
+                BEGIN IMMEDIATE;
+                CREATE TABLE IF NOT EXISTS responses_size (
+                    id INTEGER PRIMARY KEY CHECK (id = 1), total INTEGER NOT NULL);
+                INSERT OR IGNORE INTO responses_size
+                    SELECT 1, COALESCE(SUM(size), 0) FROM responses;
+                CREATE TRIGGER IF NOT EXISTS responses_size_insert
+                    AFTER INSERT ON responses BEGIN
+                    UPDATE responses_size SET total = total + NEW.size; END;
+                CREATE TRIGGER IF NOT EXISTS responses_size_update
+                    AFTER UPDATE OF size ON responses BEGIN
+                    UPDATE responses_size SET total = total + NEW.size - OLD.size; END;
+                CREATE TRIGGER IF NOT EXISTS responses_size_delete
+                    AFTER DELETE ON responses BEGIN
+                    UPDATE responses_size SET total = total - OLD.size; END;
+                COMMIT;
+            """)
+        return self._db
+
+    def get(self, key):
+        with self._lock:
+            db = self._conn()
+            row = db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with db:
+                db.execute("UPDATE responses SET last_used = ? WHERE key = ?",
+                           (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, content, usage=None):
+        value = json.dumps({"content": content, "usage": usage or {}}, ensure_ascii=False)
+        with self._lock:
+            db = self._conn()
+            with db:
+                # an upsert, not INSERT OR REPLACE, whose implicit delete
+                # wouldn't fire the size trigger
+                db.execute(
+                    "INSERT INTO responses VALUES (?, ?, ?, ?) ON CONFLICT(key) DO UPDATE"
+                    " SET value = excluded.value, size = excluded.size,"
+                    " last_used = excluded.last_used",
+                    (key, value, len(value), time.time()),
+                )
+                self._evict(db)
+
+    def _evict(self, db):
+        total = db.execute("SELECT total FROM responses_size").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute(
+            "SELECT key, size FROM responses ORDER BY last_used"
+        ).fetchall():
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _lookup(self, salt, kwargs):
+        """(key, cached response or None) for a request, honouring the mode."""
+        if self.mode == "off":
+            return None, None
+        key = request_key(**kwargs) if salt is None else request_key(salt=salt, **kwargs)
+        if self.mode == "record":
+            return key, None
+        hit = self.get(key)
+        if hit is not None:
+            self.hits += 1
+            return key, cached_response(hit["content"], hit["usage"])
+        self.misses += 1
+        if self.mode == "replay":
+            raise CacheMiss(f"no cached response for request {key[:12]}")
+        return key, None
+
+    def _store(self, key, resp):
+        self.calls += 1
+        if key is not None:
+            self.put(key, resp.choices[0].message.content, _usage_dict(resp.usage))
+        return resp
+
+    def create(self, call, salt=None, **kwargs):
+        """Answer call(**kwargs) from the cache according to the mode."""
+        key, hit = self._lookup(salt, kwargs)
+        if hit is not None:
+            return hit
+        return self._store(key, call(**kwargs))
+
+    async def acreate(self, call, salt=None, **kwargs):
+        """create() for an async call (e.g. AsyncOpenAI)."""
+        key, hit = self._lookup(salt, kwargs)
+        if hit is not None:
+            return hit
+        return self._store(key, await call(**kwargs))
+
+    def size(self):
+        """Bytes of stored responses."""
+        with self._lock:
+            return self._conn().execute("SELECT total FROM responses_size").fetchone()[0]
+
+    def stats(self):
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses,
+                "calls": self.calls}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
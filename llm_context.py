@@ -0,0 +1,217 @@
+"""
+Bounded context windows for long-running chat conversations.
+
+A ContextWindow owns the conversation instead of a bare list: append the
+messages as they happen and send window.messages() with each request.  The
+request stays the same size however long the run goes on.
+
+Strategies:
+    full        everything (the old unbounded behaviour, for comparison)
+    sliding     system prompt + as many recent messages as fit in max_tokens
+    last_turns  system prompt + the last max_turns turns
+    summary     system prompt + a rolling summary + the last max_turns turns
+
+A turn is one user message plus the replies that follow it.  With the
+summary strategy, turns that fall out of the window are condensed by the
+summarise callable (messages -> str) on a background thread, started as
+soon as a reply arrives, so it runs in the gap between calls rather than in
+front of the next one.  Until it lands, the turns waiting to be compacted
+stay in the request.
+
+    window = ContextWindow(SYSTEM_PROMPT, strategy="summary", summarise=fn)
+    window.append("user", screen)
+    resp = client.chat.completions.create(model=..., messages=window.messages())
+    window.append("assistant", resp.choices[0].message.content)
+    ...
+    window.stats()["tokens_saved"]
+
+Token counts are estimates (about four characters per token), good enough
+to compare strategies and to size the sliding window.
+"""
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+STRATEGIES = ("full", "sliding", "last_turns", "summary")
+
+SUMMARY_PROMPT = (
+    "Condense the conversation below into a short running summary (at most "
+    "120 words) for whoever continues it: what has been observed, what was "
+    "tried, what seemed to work.  Fold in the previous summary if there is one."
+)
+
+
+def estimate_tokens(text):
+    return len(text or "") // 4 + 1
+
+
+def message_tokens(message):
+    # role and framing overhead, roughly as chat endpoints count it
+    return estimate_tokens(message.get("content")) + 4
+
+
+class ContextWindow:
+    def __init__(
+        self,
+        system=None,
+        strategy="summary",
+        max_turns=8,
+        max_tokens=4000,
+        summarise=None,
+        compact_every=4,
+        wait_for_summary=False,
+        history=64,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        if strategy == "summary" and summarise is None:
+            raise ValueError("the summary strategy needs a summarise callable")
+        self.system = system
+        self.strategy = strategy
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summarise = summarise
+        self.compact_every = compact_every
+        # Block on an unfinished summary at the next request, so a run's
+        # requests don't depend on how fast the summariser answered (needed
+        # to replay a run from the LLM cache)
+        self.wait_for_summary = wait_for_summary
+
+        self.turns = deque()            # list of messages per turn, oldest first
+        self.summary = ""
+        self.recent = deque(maxlen=history)   # for tail(), whatever the strategy
+        self._compacting = 0            # oldest turns handed to the summariser
+        self._future = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.tokens_sent = 0
+        self.tokens_full = 0            # what the unbounded history would have sent
+        self.summary_tokens = 0         # spent on compaction calls
+        self.compactions = 0
+        self._history_tokens = message_tokens({"content": system}) if system else 0
+
+    # ── building the conversation ─────────────────────────────────────────
+    def append(self, role, content):
+        message = {"role": role, "content": content}
+        with self._lock:
+            if role == "user" or not self.turns:
+                self.turns.append([message])
+            else:
+                self.turns[-1].append(message)
+            self.recent.append(message)
+            self._history_tokens += message_tokens(message)
+            if self.strategy != "summary":
+                self._trim()
+        if role == "assistant" and self.strategy == "summary":
+            self._maybe_compact()
+
+    def _trim(self):
+        # Drop what no request can reach any more, so memory stays flat too
+        if self.strategy == "last_turns":
+            while len(self.turns) > self.max_turns:
+                self.turns.popleft()
+        elif self.strategy == "sliding":
+            budget = self.max_tokens - self._system_tokens()
+            kept = 0
+            for n, turn in enumerate(reversed(self.turns)):
+                kept += sum(message_tokens(m) for m in turn)
+                if kept > budget and n > 0:
+                    for _ in range(len(self.turns) - n):
+                        self.turns.popleft()
+                    break
+
+    # ── rolling summary ───────────────────────────────────────────────────
+    def _maybe_compact(self):
+        with self._lock:
+            if self._future is not None:
+                return
+            overflow = len(self.turns) - self.max_turns
+            if overflow < self.compact_every:
+                return
+            old = [m for turn in list(self.turns)[:overflow] for m in turn]
+            self._compacting = overflow
+            prompt = [{"role": "system", "content": SUMMARY_PROMPT}]
+            if self.summary:
+                prompt.append({"role": "user", "content": f"Previous summary:\n{self.summary}"})
+            prompt.append({
+                "role": "user",
+                "content": "\n\n".join(f"{m['role']}: {m['content']}" for m in old),
+            })
+            self.summary_tokens += sum(message_tokens(m) for m in prompt)
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=1)
+            self._future = self._pool.submit(self.summarise, prompt)
+
+    def _collect(self):
+        """Swap in a finished summary (called before each request)."""
+        future = self._future
+        if future is None or not (future.done() or self.wait_for_summary):
+            return
+        try:
+            summary = (future.result() or "").strip()
+        except Exception as exc:  # noqa: BLE001
+            # Keep the request bounded anyway: drop the turns unsummarised
+            print(f"[context] summary failed – {exc}", file=sys.stderr)
+            summary = self.summary
+        with self._lock:
+            for _ in range(self._compacting):
+                self.turns.popleft()
+            self.summary = summary
+            self.summary_tokens += estimate_tokens(summary)
+            self.compactions += 1
+            self._compacting = 0
+            self._future = None
+
+    # ── requests ──────────────────────────────────────────────────────────
+    def _system_message(self):
+        content = self.system or ""
+        if self.summary:
+            content = f"{content}\n\nSummary of earlier turns:\n{self.summary}".lstrip()
+        return {"role": "system", "content": content} if content else None
+
+    def _system_tokens(self):
+        system = self._system_message()
+        return message_tokens(system) if system else 0
+
+    def messages(self):
+        """The request payload for the next call."""
+        if self.strategy == "summary":
+            self._collect()
+        with self._lock:
+            turns = list(self.turns)
+            if self.strategy == "summary":
+                # Keep the overflow past a stalled summariser bounded too
+                turns = turns[-(self.max_turns + 2 * self.compact_every):]
+            body = [m for turn in turns for m in turn]
+            system = self._system_message()
+            out = [system, *body] if system else body
+
+            self.requests += 1
+            self.tokens_sent += sum(message_tokens(m) for m in out)
+            self.tokens_full += self._history_tokens
+        return out
+
+    def tail(self, n):
+        """The last n messages of the conversation, as they happened."""
+        return list(self.recent)[-n:]
+
+    def stats(self):
+        saved = self.tokens_full - self.tokens_sent
+        return {
+            "strategy":       self.strategy,
+            "requests":       self.requests,
+            "tokens_sent":    self.tokens_sent,
+            "tokens_full":    self.tokens_full,
+            "tokens_saved":   saved,
+            "summary_tokens": self.summary_tokens,
+            "net_saved":      saved - self.summary_tokens,
+            "compactions":    self.compactions,
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,118 @@
+"""
+One-call decisions: reasoning and the action in a single chat completion,
+and the action parser every harness shares.
+
+Instead of a reasoning call followed by an action call, the model is told
+(once, in the system prompt) to reason briefly and finish with the action:
+
+    trailer  free text ending in a line "ACTION: <letter>"
+    json     a JSON object {"reasoning": ..., "action": ...}, requested
+             with response_format where the endpoint supports it
+
+parse_action() reads the action out of any reply -- the formats above, a
+bare letter with quotes, brackets or markdown around it, or a word such as
+"Feed" -- and returns None rather than guess when there is no clear one.
+Only then is the model asked again, with REASK and a tiny token budget.
+
+    system = SYSTEM_PROMPT + INSTRUCTIONS["trailer"]
+    resp = client.chat.completions.create(..., **REQUEST_KWARGS["trailer"])
+    reasoning, action = split_reply(resp.choices[0].message.content)
+    if action is None:
+        ...   # append REASK, call again with max_completion_tokens=16
+"""
+import json
+import re
+
+ACTIONS = "FPSQ"
+FORMATS = ("trailer", "json")
+WORDS = {"feed": "F", "play": "P", "sleep": "S", "rest": "S", "quit": "Q"}
+
+INSTRUCTIONS = {
+    "trailer": (
+        "\n\nEach turn, think it through in one short paragraph, then end your "
+        "reply with a final line of the form\nACTION: <letter>\nwhere "
+        "<letter> is F, P, S or Q."
+    ),
+    "json": (
+        "\n\nEach turn, reply with only a JSON object of the form "
+        "{\"reasoning\": \"<one short paragraph>\", \"action\": \"<F, P, S or Q>\"}."
+    ),
+}
+# Extra request arguments per format
+REQUEST_KWARGS = {
+    "trailer": {},
+    "json": {"response_format": {"type": "json_object"}},
+}
+REASK = "That reply had no clear action. Reply with just one letter: F, P, S or Q."
+
+# "ACTION: F" anywhere in the reply, not just at the start of a line
+_TRAILER = re.compile(r"(?<![A-Za-z])action[\W_]*[:=\-][\s\W_]*([A-Za-z]+)", re.I)
+_TOKEN = re.compile(r"[\W_]*([A-Za-z]+)[\W_]*")
+_BRACKETED = re.compile(r"\[\s*([A-Za-z])\s*\]")
+
+
+def _action(word, allowed):
+    """A letter or action word as the action it names, else None."""
+    if len(word) == 1:
+        word = word.upper()
+        return word if word in allowed else None
+    letter = WORDS.get(word.lower())
+    return letter if letter and letter in allowed else None
+
+
+def _json_object(text):
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        obj = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def parse_action(text, allowed=ACTIONS):
+    """
+    The action a reply chose, as an upper-case letter from `allowed`, or
+    None when there isn't exactly one clear answer.  Tried in order: a JSON
+    "action" field, the last ACTION: trailer (anywhere in the reply), the
+    whole reply (or its first or last line) being one letter or action
+    word, and a lone bracketed letter such as "[F]".
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+
+    obj = _json_object(text)
+    if obj is not None and "action" in obj:
+        m = _TOKEN.fullmatch(str(obj["action"]).strip())
+        return _action(m.group(1), allowed) if m else None
+
+    trailers = _TRAILER.findall(text)
+    if trailers:
+        return _action(trailers[-1], allowed)
+
+    lines = text.splitlines()
+    for candidate in (text, lines[0], lines[-1]):
+        m = _TOKEN.fullmatch(candidate.strip())
+        if m:
+            action = _action(m.group(1), allowed)
+            if action:
+                return action
+
+    # "[F]" style, but not a reply that just repeats the [F]eed [P]lay menu
+    bracketed = {_action(b, allowed) for b in _BRACKETED.findall(text)} - {None}
+    if len(bracketed) == 1:
+        return bracketed.pop()
+    return None
+
+
+def split_reply(text, allowed=ACTIONS):
+    """(reasoning, action) from a one-call reply; action is None if unclear."""
+    text = (text or "").strip()
+    obj = _json_object(text)
+    if obj is not None and "reasoning" in obj:
+        return str(obj["reasoning"]).strip(), parse_action(text, allowed)
+    trailers = list(_TRAILER.finditer(text))
+    reasoning = text[:trailers[-1].start()].strip() if trailers else text
+    return reasoning, parse_action(text, allowed)
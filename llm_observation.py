@@ -0,0 +1,210 @@
+"""
+Compact encodings of the Gotchi screen for LLM prompts.
+
+Most of the screen never changes between turns: the speech-bubble frame,
+the face (most of the time) and the [F]eed [P]lay [S]leep [Q]uit footer.
+An ObservationEncoder turns the pet into the user message for one turn:
+
+    full     the whole screen, as before
+    diff     only the lines that changed since the previous turn, numbered
+    compact  one key=value line with everything the screen shows
+    delta    compact, but only the keys that changed since the previous turn
+    auto     whichever of diff and delta is shorter this turn
+
+diff, delta and auto send a keyframe (the whole screen, or the compact line
+for delta) on the first turn and every `keyframe` turns after, so a bounded
+context window always holds one to read the changes against.
+
+Put encoder.legend (how to read the format; empty for full) in the system
+prompt, not in the turns: the system prompt and earlier turns then stay
+byte-for-byte the same from request to request, which is what lets
+server-side prompt caches hit.
+
+    encoder = ObservationEncoder("diff")
+    window = ContextWindow(SYSTEM_PROMPT + encoder.legend, ...)
+    window.append("user", encoder.encode(pet))
+    ...
+    encoder.estimate(pet)     # tokens this turn would cost in each mode
+    encoder.stats()["saved_%"]
+
+Token counts come from tiktoken when it is installed, else from a rough
+word/punctuation/whitespace split that tracks it closely enough on screens.
+"""
+import re
+
+MODES = ("full", "diff", "compact", "delta", "auto")
+KEYFRAME = 8     # ContextWindow's default max_turns
+
+LEGENDS = {
+    "full": "",
+    "diff": (
+        "\n\nTo save space, a turn shows either the whole screen or, after "
+        "\"Changed:\", only the screen lines that changed since the previous "
+        "turn, as \"<line number>| <line>\" (blank for an empty line). "
+        "\"Unchanged.\" means the screen is exactly as before."
+    ),
+}
+_KEYS = (
+    "one line of key=value pairs: clock, day (1 = day, 0 = night), weather, "
+    "mood, msg (the speech bubble), face (the pet's face, or away when it is "
+    "gone), and hunger, happiness and energy out of 10."
+)
+LEGENDS["compact"] = "\n\nTo save space, the screen is given as " + _KEYS
+LEGENDS["delta"] = (
+    LEGENDS["compact"] + " Most turns list only the pairs that changed since "
+    "the previous turn; \"Unchanged.\" means nothing did."
+)
+LEGENDS["auto"] = LEGENDS["diff"] + (
+    " Other turns list only what changed as key=value pairs, with the keys "
+    "clock, day (1 = day, 0 = night), weather, mood, msg, face (or away), "
+    "hunger, happiness and energy (out of 10)."
+)
+
+_PIECE = re.compile(r" ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+")
+_encoding = None
+
+
+def count_tokens(text):
+    """Tokens in text: exact with tiktoken installed, else an estimate."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken  # type: ignore
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:  # noqa: BLE001  (not installed, or no vocab offline)
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text or ""))
+    # pre-tokenizer-like split; long runs cost about one token per 8 chars,
+    # anything non-ASCII about one per character
+    n = 0
+    for piece in _PIECE.findall(text or ""):
+        wide = sum(1 for ch in piece if ord(ch) > 127)
+        n += (len(piece) - wide + 7) // 8 + wide
+    return n
+
+
+def face(pet):
+    """The face the screen shows, as text."""
+    if pet.pet_away:
+        return "away"
+    if pet.pet_sick:
+        return "(x_x)"
+    if pet.happiness > 7:
+        return "(^o^)"
+    if pet.happiness < 3:
+        return "(T_T)"
+    return "(^_^)"
+
+
+def fields(pet):
+    """Everything the screen shows, as key -> value text."""
+    msg = pet.msg.strip().replace('"', "'")
+    return {
+        "clock": pet.clock_str,
+        "day": str(int(pet.day_time)),
+        "weather": pet.weather,
+        "mood": pet.mood,
+        "msg": f'"{msg}"',
+        "face": face(pet),
+        "hunger": f"{pet.hunger:.2f}",
+        "happiness": f"{pet.happiness:.2f}",
+        "energy": f"{pet.energy:.2f}",
+    }
+
+
+def compact(values):
+    """fields() as one key=value line."""
+    return " ".join(f"{k}={v}" for k, v in values.items())
+
+
+def delta(old_values, new_values):
+    """The fields that differ from old_values, as key=value pairs."""
+    changed = {k: v for k, v in new_values.items() if old_values.get(k) != v}
+    return compact(changed) if changed else "Unchanged."
+
+
+def diff(old_lines, new_lines):
+    """The lines of new_lines that differ from old_lines, numbered from 1."""
+    changed = [
+        f"{i + 1}| {line}".rstrip()
+        for i, line in enumerate(new_lines)
+        if i >= len(old_lines) or old_lines[i] != line
+    ]
+    if len(old_lines) > len(new_lines):
+        changed += [f"{i + 1}|" for i in range(len(new_lines), len(old_lines))]
+    return "Changed:\n" + "\n".join(changed) if changed else "Unchanged."
+
+
+class ObservationEncoder:
+    def __init__(self, mode="diff", keyframe=KEYFRAME):
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.keyframe = keyframe
+        self.previous = None      # (screen lines, fields) as of the last turn
+        self.since_reset = 0      # turns since the last reset(), for keyframes
+        self.turns = 0
+        self.tokens_sent = 0
+        self.tokens_full = 0      # what sending the whole screen would have cost
+
+    @property
+    def legend(self):
+        return LEGENDS[self.mode]
+
+    def _encodings(self, lines, values):
+        """{mode: text} for this turn, for every mode."""
+        full = "\n".join(lines)
+        out = {"full": full, "compact": compact(values)}
+        if self.previous is None:
+            out["diff"], out["delta"] = full, out["compact"]
+        else:
+            out["diff"] = diff(self.previous[0], lines)
+            out["delta"] = delta(self.previous[1], values)
+        return out
+
+    def _choose(self, encodings):
+        mode = self.mode
+        if mode in ("full", "compact"):
+            return encodings[mode]
+        if self.previous is None or self.since_reset % self.keyframe == 0:
+            # the state the changes are read against
+            return encodings["compact" if mode == "delta" else "full"]
+        if mode == "auto":
+            return min(encodings["diff"], encodings["delta"], key=count_tokens)
+        return encodings[mode]
+
+    def estimate(self, pet):
+        """{mode: tokens} for this turn, without using the turn up."""
+        encodings = self._encodings(pet.generate_display_lines(), fields(pet))
+        out = {mode: count_tokens(text) for mode, text in encodings.items()}
+        out["auto"] = min(out["diff"], out["delta"])
+        return out
+
+    def encode(self, pet):
+        """The user message for this turn."""
+        lines = pet.generate_display_lines()
+        values = fields(pet)
+        encodings = self._encodings(lines, values)
+        text = self._choose(encodings)
+        self.previous = (lines, values)
+        self.since_reset += 1
+        self.turns += 1
+        self.tokens_sent += count_tokens(text)
+        self.tokens_full += count_tokens(encodings["full"])
+        return text
+
+    def reset(self):
+        """Forget the previous screen (new episode); the next turn is a keyframe."""
+        self.previous = None
+        self.since_reset = 0
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "turns": self.turns,
+            "tokens_sent": self.tokens_sent,
+            "tokens_full": self.tokens_full,
+            "saved_%": round(100 * (1 - self.tokens_sent / self.tokens_full), 1)
+            if self.tokens_full else 0.0,
+        }
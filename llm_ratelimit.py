@@ -0,0 +1,378 @@
+"""
+Client-side rate limiting for chat completions, shared by every caller.
+
+One RateLimiter stands for one quota (an API key on an endpoint).  Every
+call through it:
+
+    1. reserves a request from the requests/min bucket and an estimate of
+       its tokens from the tokens/min bucket, waiting until both cover it
+       (reservations queue up in order, so waiters don't stampede)
+    2. waits for a free slot under the concurrency cap
+    3. makes the call, then settles the token estimate against the usage
+       the response reports
+    4. on a 429, 5xx, timeout or dropped connection, backs off and retries:
+       the Retry-After header when the endpoint sends one, else exponential
+       backoff with full jitter
+
+Consecutive failures on an endpoint (not 429s, which just mean "slower")
+open its circuit: calls to it raise CircuitOpen at once for `cooldown`
+seconds, then a single trial call decides whether it closes again.
+
+Buckets hold one minute of quota and start full, the way providers meter,
+so a fresh run can burst and then settles at the limit.
+
+Sit it under the cache, so cache hits cost no quota:
+
+    limiter = RateLimiter(rpm=500, tpm=200_000, concurrency=16)
+    cache.create(limiter.wrap(client.chat.completions.create), model=..., ...)
+    await cache.acreate(limiter.awrap(async_client.chat.completions.create), ...)
+    limiter.stats()     # queue wait vs service time, retries, 429s, ...
+
+from_env() builds one from GOTCHI_RPM, GOTCHI_TPM and GOTCHI_LLM_CONCURRENCY
+(unset or 0 = no limit of that kind).
+"""
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+
+RETRY_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+# Transient errors by class name, across openai client versions
+TRANSIENT = {
+    "APIConnectionError", "APITimeoutError", "InternalServerError",
+    "ServiceUnavailableError", "Timeout", "TryAgain",
+}
+COMPLETION_TOKENS = 512     # assumed reply size when the request sets no cap
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+
+def _status(exc):
+    status = getattr(exc, "status_code", None) or getattr(exc, "http_status", None)
+    return status if isinstance(status, int) else None
+
+
+def classify(exc):
+    """"throttled" (429), "failed" (worth retrying) or None (give up)."""
+    status = _status(exc)
+    if status == 429 or type(exc).__name__ == "RateLimitError":
+        return "throttled"
+    if status in RETRY_STATUS or (status is not None and status >= 500):
+        return "failed"
+    if isinstance(exc, (TimeoutError, ConnectionError)) or type(exc).__name__ in TRANSIENT:
+        return "failed"
+    return None
+
+
+def retry_after(exc):
+    """Seconds the endpoint asked us to wait (Retry-After), or None."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if headers is None:
+        headers = getattr(exc, "headers", None)
+    if not headers:
+        return None
+    headers = {str(k).lower(): v for k, v in headers.items()}
+    try:
+        if "retry-after-ms" in headers:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(kwargs):
+    """Rough prompt + completion tokens of a chat request (4 chars a token)."""
+    chars = 0
+    for message in kwargs.get("messages") or ():
+        content = message.get("content") if isinstance(message, dict) else None
+        chars += len(content) if isinstance(content, str) else 0
+    reply = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or COMPLETION_TOKENS
+    return chars // 4 + reply
+
+
+def _total_tokens(resp):
+    usage = getattr(resp, "usage", None)
+    if isinstance(usage, dict):
+        return usage.get("total_tokens")
+    return getattr(usage, "total_tokens", None)
+
+
+class TokenBucket:
+    """`rate` per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, n):
+        """Take n now, going into debt if need be; seconds until it's covered."""
+        with self._lock:
+            now = self.clock()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            self.level -= n
+            return -self.level / self.rate if self.level < 0 else 0.0
+
+    def settle(self, n):
+        """Give back n (or take more, if negative) once the real cost is known."""
+        with self._lock:
+            self.level = min(self.capacity, self.level + n)
+
+
+class Circuit:
+    __slots__ = ("failures", "open_until", "trial")
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial = False      # a half-open trial call is in flight
+
+
+class RateLimiter:
+    def __init__(self, rpm=None, tpm=None, concurrency=None, max_retries=6,
+                 base_delay=1.0, max_delay=60.0, failures=5, cooldown=30.0,
+                 metrics=None, seed=None, clock=time.monotonic):
+        self.requests = TokenBucket(rpm, clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock) if tpm else None
+        self.concurrency = concurrency or None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failures = failures
+        self.cooldown = cooldown
+        self.metrics = metrics      # metrics(name, seconds), e.g. gotchi_profile.observe
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self._slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self._aslots = None         # asyncio.Semaphore, made on first acall()
+        self._circuits = {}
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "retries": 0, "throttled": 0, "failed": 0,
+                       "circuit_opened": 0, "circuit_rejected": 0}
+        self.queue_wait = 0.0
+        self.service = 0.0
+        self.max_queue_wait = 0.0
+
+    # ── bookkeeping ───────────────────────────────────────────────────────
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _timed(self, queued, started, finished):
+        wait, service = started - queued, finished - started
+        with self._lock:
+            self.queue_wait += wait
+            self.service += service
+            self.max_queue_wait = max(self.max_queue_wait, wait)
+        if self.metrics is not None:
+            self.metrics("llm_queue_wait", wait)
+            self.metrics("llm_service", service)
+
+    def _reserve(self, estimate):
+        """Seconds to wait before a call costing `estimate` tokens may start."""
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.reserve(1)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(estimate))
+        return wait
+
+    def _refund(self, estimate):
+        """Give back what _reserve() took, for a call that never went out."""
+        if self.requests is not None:
+            self.requests.settle(1)
+        if self.tokens is not None:
+            self.tokens.settle(estimate)
+
+    def _settle(self, estimate, resp):
+        actual = _total_tokens(resp)
+        if self.tokens is not None and actual is not None:
+            self.tokens.settle(estimate - actual)
+
+    # ── circuit breaking ──────────────────────────────────────────────────
+    def _enter(self, endpoint):
+        """Raise CircuitOpen unless a call to endpoint may go ahead."""
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or not circuit.open_until:
+                return
+            if self.clock() >= circuit.open_until and not circuit.trial:
+                circuit.trial = True        # half-open: let one call find out
+                return
+            self.counts["circuit_rejected"] += 1
+            left = max(0.0, circuit.open_until - self.clock())
+        raise CircuitOpen(f"circuit open for {endpoint!r}, retry in {left:.0f}s")
+
+    def _result(self, endpoint, ok):
+        with self._lock:
+            circuit = self._circuits.setdefault(endpoint, Circuit())
+            trial, circuit.trial = circuit.trial, False
+            if ok:
+                circuit.failures = 0
+                circuit.open_until = 0.0
+                return
+            circuit.failures += 1
+            if trial or circuit.failures >= self.failures:
+                circuit.open_until = self.clock() + self.cooldown
+                self.counts["circuit_opened"] += 1
+
+    def _abandon(self, endpoint):
+        """A call gave up without an answer: free the half-open trial, if it was one."""
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is not None:
+                circuit.trial = False
+
+    def cooldown_left(self, endpoint="default"):
+        """Seconds until endpoint's circuit lets a call through (0 if closed)."""
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or not circuit.open_until:
+                return 0.0
+            return max(0.0, circuit.open_until - self.clock())
+
+    # ── retries ───────────────────────────────────────────────────────────
+    def _backoff(self, exc, attempt, endpoint, estimate):
+        """Seconds to wait before retrying after exc, or None to re-raise it."""
+        kind = classify(exc)
+        # only failures count against the endpoint: a 429 or 4xx means it answered
+        self._result(endpoint, ok=kind != "failed")
+        if self.tokens is not None:
+            self.tokens.settle(estimate)    # a failed request isn't billed
+        if kind is None:
+            return None
+        self._count(kind)
+        if attempt >= self.max_retries or self.cooldown_left(endpoint):
+            return None
+        self._count("retries")
+        asked = retry_after(exc)
+        if asked is not None:
+            return min(asked, self.max_delay)
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn, endpoint=None, **kwargs):
+        """fn(**kwargs) within the limits, retried on transient errors."""
+        endpoint = endpoint or kwargs.get("model") or "default"
+        estimate = estimate_tokens(kwargs)
+        self._count("calls")
+        for attempt in range(self.max_retries + 1):
+            self._enter(endpoint)
+            queued = self.clock()
+            wait = self._reserve(estimate)
+            if wait:
+                time.sleep(wait)
+            if self._slots is not None:
+                self._slots.acquire()
+            try:
+                started = self.clock()
+                try:
+                    resp = fn(**kwargs)
+                finally:
+                    self._timed(queued, started, self.clock())
+            except Exception as exc:
+                delay = self._backoff(exc, attempt, endpoint, estimate)
+                if delay is None:
+                    raise
+            else:
+                self._result(endpoint, ok=True)
+                self._settle(estimate, resp)
+                return resp
+            finally:
+                if self._slots is not None:
+                    self._slots.release()
+            time.sleep(delay)
+
+    async def acall(self, fn, endpoint=None, **kwargs):
+        """call() for an async fn (e.g. AsyncOpenAI); waits without blocking the loop."""
+        endpoint = endpoint or kwargs.get("model") or "default"
+        estimate = estimate_tokens(kwargs)
+        if self.concurrency and self._aslots is None:
+            self._aslots = asyncio.Semaphore(self.concurrency)
+        self._count("calls")
+        for attempt in range(self.max_retries + 1):
+            self._enter(endpoint)
+            queued = self.clock()
+            wait = self._reserve(estimate)
+            acquired = sent = False
+            try:
+                # waiting counts too: a caller cancelled while queued must
+                # still hand back the half-open trial and its reservation
+                if wait:
+                    await asyncio.sleep(wait)
+                if self._aslots is not None:
+                    await self._aslots.acquire()
+                    acquired = True
+                started = self.clock()
+                sent = True
+                try:
+                    resp = await fn(**kwargs)
+                finally:
+                    self._timed(queued, started, self.clock())
+            except asyncio.CancelledError:
+                self._abandon(endpoint)
+                if not sent:
+                    self._refund(estimate)
+                raise
+            except Exception as exc:  # noqa: BLE001  (CancelledError passes through)
+                delay = self._backoff(exc, attempt, endpoint, estimate)
+                if delay is None:
+                    raise
+            else:
+                self._result(endpoint, ok=True)
+                self._settle(estimate, resp)
+                return resp
+            finally:
+                if acquired:
+                    self._aslots.release()
+            await asyncio.sleep(delay)
+
+    def wrap(self, fn, endpoint=None):
+        """fn as a function that goes through call(), e.g. for LLMCache.create."""
+        return lambda **kwargs: self.call(fn, endpoint=endpoint, **kwargs)
+
+    def awrap(self, fn, endpoint=None):
+        """wrap() for an async fn, e.g. for LLMCache.acreate."""
+        async def limited(**kwargs):
+            return await self.acall(fn, endpoint=endpoint, **kwargs)
+        return limited
+
+    def stats(self):
+        with self._lock:
+            attempts = self.counts["calls"] + self.counts["retries"] or 1
+            return {
+                **self.counts,
+                "queue_wait_s": round(self.queue_wait, 3),
+                "service_s": round(self.service, 3),
+                "mean_queue_wait_s": round(self.queue_wait / attempts, 3),
+                "mean_service_s": round(self.service / attempts, 3),
+                "max_queue_wait_s": round(self.max_queue_wait, 3),
+            }
+
+
+def from_env(**kwargs):
+    """A RateLimiter configured from GOTCHI_RPM / GOTCHI_TPM / GOTCHI_LLM_CONCURRENCY."""
+    def number(name):
+        value = os.getenv(name, "").strip()
+        return int(float(value)) if value else None
+
+    return RateLimiter(
+        rpm=number("GOTCHI_RPM"),
+        tpm=number("GOTCHI_TPM"),
+        concurrency=number("GOTCHI_LLM_CONCURRENCY"),
+        **kwargs,
+    )
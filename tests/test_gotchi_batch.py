@@ -0,0 +1,37 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from gotchi_batch import ALIVE, GotchiBatch, parity  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def report():
+    # 8 h crosses a day/night flip; the seed fixes every draw on both sides
+    return parity(pets=600, steps=8 * 3600, seed=11)
+
+
+def test_trajectories_match_scalar_step(report):
+    assert report["trajectory_max_gap"] == 0.0
+    assert report["trajectory_mismatches"] == 0
+    # some pets ended, some lived past the flip
+    assert 0 < report["trajectory_ended"] < report["trajectory_pets"]
+
+
+def test_outcomes_match_in_distribution(report):
+    assert report["worst_z"] < 4.0
+    alive_batch, alive_scalar = report["end_status"]["alive"]
+    assert 0 < alive_batch < 1 and 0 < alive_scalar < 1
+
+
+def test_same_seed_same_run():
+    def run():
+        batch = GotchiBatch(200, seed=5)
+        for _ in range(60):
+            batch.act(np.where(batch.hunger < 4, 1, 0))
+            batch.step(120)
+        return batch.status.copy(), batch.end_time.copy(), batch.hunger.copy()
+
+    (s1, t1, h1), (s2, t2, h2) = run(), run()
+    assert (s1 == s2).all() and (t1 == t2).all() and (h1 == h2).all()
+    assert (s1 != ALIVE).any()
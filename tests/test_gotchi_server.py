@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+import pytest
+
+from gotchi import VirtualClock
+from gotchi_server import HOST_HEADER, PetHost
+
+
+@pytest.mark.parametrize("seed", [-5, 7, "7", "tomato", 2**64 - 1])
+def test_saved_seed_keeps_its_type(tmp_path, seed):
+    host = PetHost(clock=VirtualClock(), root=tmp_path)
+    host.save(host.create("p", seed))
+    host.pets.clear()
+    assert host.get("p").pet.seed == seed
+
+
+def test_corrupt_pet_file_gets_an_error_reply(tmp_path):
+    host = PetHost(clock=VirtualClock(), root=tmp_path)
+    host.save(host.create("p", 1))
+    host.pets.clear()
+    blob = host._path("p").read_bytes()
+    for bad in (b"", blob[:10], blob[:HOST_HEADER.size + 2], blob[:len(blob) // 2],
+                b"GH\x02" + bytes(len(blob) - 3)):
+        host._path("p").write_bytes(bad)
+        with pytest.raises(ValueError):
+            host.dispatch({"op": "observe", "pet": "p"})
+        assert "p" not in host.pets
+
+
+def test_drop_does_not_load_the_pet(tmp_path, monkeypatch):
+    host = PetHost(clock=VirtualClock(), root=tmp_path)
+    host.save(host.create("p", 1))
+    host.pets.clear()
+    monkeypatch.setattr(host, "_load", lambda pet_id: pytest.fail("drop loaded the pet"))
+    host.drop("p")
+    assert not host._path("p").exists()
+    with pytest.raises(KeyError):
+        host.drop("p")
+
+
+def test_drop_during_idle_save_stays_dropped(tmp_path):
+    host = PetHost(clock=VirtualClock(), root=tmp_path, idle=0)
+    host.create("p", 1)
+    started, release = threading.Event(), threading.Event()
+    write = host._write
+
+    def slow_write(saves):
+        started.set()
+        release.wait(5)
+        write(saves)
+
+    host._write = slow_write
+
+    async def main():
+        save = asyncio.create_task(host._save_idle())
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        host.drop("p")
+        release.set()
+        await save
+
+    asyncio.run(main())
+    assert "p" not in host.pets
+    assert not host._path("p").exists()
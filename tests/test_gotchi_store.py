@@ -0,0 +1,66 @@
+import pytest
+
+from gotchi_store import ResultsStore
+
+
+def record(episode, seed, policy="scripted", result="died"):
+    return {
+        "episode": episode, "seed": seed, "policy": policy, "result": result,
+        "sim_time": 600 + episode, "decisions": 1,
+        "hunger": 1.0, "happiness": 2.0, "energy": 3.0, "friendship": 4.0,
+        "rows": [{"sim_time": 60, "command": "F", "hunger": 1.0,
+                  "happiness": 2.0, "energy": 3.0, "total": 6.0}],
+    }
+
+
+def test_int64_seeds_stay_integers(tmp_path):
+    store = ResultsStore(tmp_path)
+    store.write([record(0, 7), record(1, -5), record(2, 40_000)])
+    table = store.load()
+    assert table.episodes["seed"].dtype.kind == "i"
+    assert sorted(table.episodes["seed"].tolist()) == [-5, 7, 40_000]
+
+
+def test_root_seed_past_int64(tmp_path):
+    # an unseeded Gotchi draws its seed with getrandbits(64)
+    big = 2**63 + 12345
+    store = ResultsStore(tmp_path)
+    store.write([record(0, big)], label="notebook", model="o3")
+    store.write([record(0, 3)])
+    table = store.load()
+    assert sorted(table.episodes["seed"].tolist()) == [3, big]
+    assert len(store.load(policy="o3")) == 1
+
+
+def test_string_seed(tmp_path):
+    store = ResultsStore(tmp_path)
+    store.write([record(0, "alice"), record(1, 2)])
+    assert store.load().episodes["seed"].tolist() == ["alice", 2]
+
+
+def test_bad_record_leaves_no_shard(tmp_path):
+    store = ResultsStore(tmp_path)
+    bad = record(0, 1) | {"sim_time": "soon"}
+    with pytest.raises(ValueError):
+        store.write([bad])
+    assert list(tmp_path.iterdir()) == []
+
+
+def _write_shards(root, worker):
+    store = ResultsStore(root)
+    for i in range(5):
+        store.write([record(i, worker * 100 + i, policy=f"p{worker}")])
+
+
+def test_concurrent_writers_keep_every_shard(tmp_path):
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    with ProcessPoolExecutor(4) as procs, ThreadPoolExecutor(4) as threads:
+        jobs = [procs.submit(_write_shards, tmp_path, w) for w in range(4)]
+        jobs += [threads.submit(_write_shards, tmp_path, w) for w in range(4, 8)]
+        for job in jobs:
+            job.result()
+    store = ResultsStore(tmp_path)
+    assert len(store.index()) == 40
+    assert len(store.load()) == 40
+    assert len(store.load(policy="p3")) == 5
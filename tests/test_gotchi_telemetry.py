@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from gotchi_telemetry import TelemetryWriter, read_records
+
+
+def test_records_round_trip(tmp_path):
+    w = TelemetryWriter(tmp_path, fsync_interval=0.01)
+    for i in range(100):
+        w.log("action", i=i)
+    w.close()
+    assert [r["i"] for r in read_records(w.files())] == list(range(100))
+    assert w.lost == 0 and w.error is None
+
+
+def test_keep_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        TelemetryWriter(tmp_path, keep=0)
+
+
+def test_disk_error_is_reported_not_swallowed(tmp_path, capsys):
+    w = TelemetryWriter(tmp_path, fsync_interval=0.01)
+
+    def full_disk():
+        raise OSError(28, "No space left on device")
+
+    w._sync = full_disk
+    w.log("action", i=0)
+    deadline = time.monotonic() + 5
+    while w.error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert isinstance(w.error, OSError)
+    assert "writer stopped" in capsys.readouterr().err
+
+    for i in range(10):
+        w.log("action", i=i)
+    assert w.lost == 10
+    with pytest.raises(RuntimeError, match="No space left"):
+        w.close()
@@ -0,0 +1,47 @@
+import random
+
+from gotchi import Gotchi
+from gotchi_farm import apply_command, content
+from gotchi_trace import Replayer, Trace, TraceRecorder, state_digest
+
+
+def play(seed, record):
+    """
+    A farm-style episode with some unparsed replies among the commands;
+    returns the pet, its recorder and the state seen at each decision.
+    """
+    rng = random.Random(seed)
+    pet = Gotchi(*content(), seed=seed)
+    rec = TraceRecorder(pet) if record else None
+    seen = {}
+    while pet.current_time < 4 * 3600:
+        cmd = rng.choice(["f", "p", "s", "", "?"])
+        gap = rng.randint(3, 10) * 60
+        seen[pet.current_time] = state_digest(pet)
+        if rec:
+            status = rec.act(cmd) or rec.step(gap)
+        else:
+            status = apply_command(pet, cmd) or pet.step(gap, fast=True)
+        if status:
+            break
+    return pet, rec, seen
+
+
+def test_recording_does_not_change_the_episode():
+    for seed in range(20):
+        plain, _, _ = play(seed, record=False)
+        recorded, _, _ = play(seed, record=True)
+        assert state_digest(plain) == state_digest(recorded)
+
+
+def test_replay_and_seek(tmp_path):
+    for seed in range(10):
+        _, rec, seen = play(seed, record=True)
+        trace = Trace.load(rec.finish().save(tmp_path / f"{seed}.trace.json.gz"))
+        replay = Replayer(trace)
+        assert replay.verify()
+        # seeking to a decision gives the state the policy saw there,
+        # whether that decision was an action or an unparsed reply
+        for t, op in trace.ops:
+            if isinstance(op, str):
+                assert state_digest(replay.seek(t)) == seen[t]
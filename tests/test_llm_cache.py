@@ -0,0 +1,43 @@
+import sqlite3
+
+from llm_cache import LLMCache
+
+
+def stored(path):
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM responses").fetchone()
+
+
+def test_running_size_matches_the_rows(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = LLMCache(path)
+    for i in range(20):
+        cache.put(f"k{i}", "x" * i)
+    cache.put("k3", "y" * 500)          # replacing a row moves the total too
+    assert cache.size() == stored(path)[0]
+    cache.close()
+
+
+def test_evicts_least_recently_used_past_max_bytes(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = LLMCache(path, max_bytes=2000)
+    other = LLMCache(path, max_bytes=2000)   # another process on the same file
+    for i in range(50):
+        (cache if i % 2 else other).put(f"k{i}", "x" * 100)
+    total, rows = stored(path)
+    assert cache.size() == other.size() == total <= 2000
+    assert rows < 50
+    assert cache.get("k49") is not None and cache.get("k1") is None
+    cache.close()
+    other.close()
+
+
+def test_seeds_the_total_for_an_existing_file(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE responses (key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                   " size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        db.execute("INSERT INTO responses VALUES ('a', '{}', 123, 0)")
+    cache = LLMCache(path)
+    assert cache.size() == 123
+    cache.close()